@@ -0,0 +1,122 @@
+"""
+Hit rates of the user agent cache on a skewed replay trace, with plain LRU
+eviction, and with TinyLFU admission.
+
+The trace draws user agents of the test fixtures by a Zipf distribution,
+mixed with user agents seen only once: half of them worthless (UUIDs and
+gibberish), which are cached apart, and half of them unique browser user
+agents, which push popular user agents out of a plain LRU cache.
+
+    python benchmarks/cache_admission.py
+"""
+
+import os
+import random
+import sys
+import uuid
+from itertools import accumulate
+from urllib.parse import unquote
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from device_detector.cache import UACache
+from device_detector.settings import ROOT
+from device_detector.utils import ua_hash
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader  # type: ignore[assignment]
+
+FIXTURE_FILES = (
+    'tests/fixtures/upstream/smartphone-1.yml',
+    'tests/fixtures/upstream/smartphone-2.yml',
+    'tests/fixtures/upstream/tablet-1.yml',
+    'tests/fixtures/upstream/desktop.yml',
+)
+TRACE_LENGTH = 500_000
+# Fraction of the trace that are user agents seen only once
+ONE_OFF_RATIO = 0.3
+ZIPF_EXPONENT = 1.0
+CACHE_SIZES = (1024, 4096, 16384)
+
+
+def load_user_agents() -> list[str]:
+    user_agents: list[str] = []
+    for fixture_file in FIXTURE_FILES:
+        with open(f'{ROOT}/{fixture_file}', 'r', encoding='utf-8') as yf:
+            fixtures = yaml.load(yf, SafeLoader)
+        user_agents.extend(unquote(fixture['user_agent']) for fixture in fixtures)
+    return list(dict.fromkeys(user_agents))
+
+
+def one_off_user_agent(rng: random.Random) -> tuple[str, bool]:
+    """
+    User agent seen only once, and whether it's worthless.
+    """
+    if rng.random() < 0.5:
+        if rng.random() < 0.5:
+            return str(uuid.UUID(int=rng.getrandbits(128))), True
+        return ''.join(rng.choices('abcdefghijklmnopqrstuvwxyz0123456789', k=24)), True
+
+    build = ''.join(rng.choices('ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789', k=10))
+    user_agent = (
+        f'Mozilla/5.0 (Linux; Android 13; SM-S911B Build/{build}) AppleWebKit/537.36 '
+        f'(KHTML, like Gecko) Chrome/120.0.{rng.randrange(10_000)}.0 Mobile Safari/537.36'
+    )
+    return user_agent, False
+
+
+def replay_trace(user_agents: list[str], seed: int = 1) -> list[tuple[str, bool]]:
+    """
+    Cache keys of the trace, and whether each user agent is worthless.
+    """
+    rng = random.Random(seed)
+    popular = user_agents.copy()
+    rng.shuffle(popular)
+    cum_weights = list(accumulate(1 / rank**ZIPF_EXPONENT for rank in range(1, len(popular) + 1)))
+    keys = {ua: ua_hash(ua.lower()) for ua in popular}
+
+    trace = []
+    for ua in rng.choices(popular, cum_weights=cum_weights, k=TRACE_LENGTH):
+        if rng.random() < ONE_OFF_RATIO:
+            one_off, worthless = one_off_user_agent(rng)
+            trace.append((ua_hash(one_off.lower()), worthless))
+        else:
+            trace.append((keys[ua], False))
+    return trace
+
+
+def hit_rate(cache: UACache, trace: list[tuple[str, bool]], cache_worthless: bool) -> float:
+    for key, worthless in trace:
+        if cache.get(key) is None:
+            if worthless and cache_worthless:
+                cache.set_worthless(key, key)
+            else:
+                cache[key] = key
+    return cache.hits / len(trace)
+
+
+def main() -> None:
+    trace = replay_trace(load_user_agents())
+    print(
+        f'{len(trace):,} requests, {len({key for key, _ in trace}):,} distinct user agents, '
+        f'{ONE_OFF_RATIO:.0%} seen once\n'
+    )
+    print(f'{"entries":>8} {"LRU":>8} {"+worthless":>11} {"+TinyLFU":>9}')
+    for size in CACHE_SIZES:
+        rates = (
+            hit_rate(UACache(max_entries=size), trace, cache_worthless=False),
+            hit_rate(UACache(max_entries=size), trace, cache_worthless=True),
+            hit_rate(UACache(max_entries=size, admission=True), trace, cache_worthless=True),
+        )
+        print(
+            f'{size:>8} '
+            + ' '.join(f'{rate:>{width}.1%}' for rate, width in zip(rates, (8, 11, 9)))
+        )
+
+
+if __name__ == '__main__':
+    main()
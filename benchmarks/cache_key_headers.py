@@ -0,0 +1,121 @@
+"""
+Hit rates of the user agent cache when DeviceDetector receives all headers
+of each request, keyed by all header values, and keyed by the client hint
+headers only.
+
+The trace draws the user agents and client hints of the test fixtures by a
+Zipf distribution, and adds the headers that web frameworks pass along:
+cookies, request IDs, trace contexts, forwarding addresses and AJAX markers.
+
+    python benchmarks/cache_key_headers.py
+"""
+
+import os
+import random
+import sys
+import uuid
+from hashlib import blake2s
+from itertools import accumulate
+from urllib.parse import unquote
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from device_detector.cache import UACache
+from device_detector.parser.client_hints import client_hint_headers
+from device_detector.settings import ROOT
+from device_detector.utils import ua_hash
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader  # type: ignore[assignment]
+
+FIXTURE_FILES = (
+    'tests/fixtures/upstream/clienthints.yml',
+    'tests/fixtures/upstream/clienthints-app.yml',
+)
+TRACE_LENGTH = 200_000
+ZIPF_EXPONENT = 1.0
+CACHE_SIZE = 4096
+# Number of distinct visitors, each with their own session cookie
+VISITORS = 20_000
+LANGUAGES = ('en-US,en;q=0.9', 'de-DE,de;q=0.9,en;q=0.8', 'fr-FR,fr;q=0.9', 'es-ES,es;q=0.9')
+
+
+def all_values_hash(user_agent: str, headers: dict) -> str:
+    """
+    Cache key of all header values, as built before keying by client hints only.
+    """
+    cache_key = f'{user_agent}{"-".join(sorted(map(str, headers.values())))}'
+    return blake2s(cache_key.encode('utf-8')).hexdigest()
+
+
+def load_clients() -> list[tuple[str, dict]]:
+    clients = []
+    for fixture_file in FIXTURE_FILES:
+        with open(f'{ROOT}/{fixture_file}', 'r', encoding='utf-8') as yf:
+            fixtures = yaml.load(yf, SafeLoader)
+        clients.extend(
+            (unquote(fixture['user_agent']), fixture.get('headers') or {}) for fixture in fixtures
+        )
+    return clients
+
+
+def request_headers(client_hints: dict, rng: random.Random) -> dict:
+    """
+    Headers of a request, as passed along by a web framework.
+    """
+    headers = {
+        'Host': 'www.example.com',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        'Accept-Encoding': 'gzip, deflate, br',
+        'Accept-Language': rng.choice(LANGUAGES),
+        'Cookie': f'session={rng.randrange(VISITORS):08x}',
+        'X-Request-Id': str(uuid.UUID(int=rng.getrandbits(128))),
+        'Traceparent': f'00-{rng.getrandbits(128):032x}-{rng.getrandbits(64):016x}-01',
+        'X-Forwarded-For': f'203.0.{rng.randrange(256)}.{rng.randrange(256)}',
+        **client_hints,
+    }
+    if rng.random() < 0.3:
+        headers['X-Requested-With'] = 'XMLHttpRequest'
+    return headers
+
+
+def replay_trace(clients: list[tuple[str, dict]], seed: int = 1) -> list[tuple[str, dict]]:
+    rng = random.Random(seed)
+    popular = clients.copy()
+    rng.shuffle(popular)
+    cum_weights = list(accumulate(1 / rank**ZIPF_EXPONENT for rank in range(1, len(popular) + 1)))
+    return [
+        (user_agent, request_headers(client_hints, rng))
+        for user_agent, client_hints in rng.choices(
+            popular, cum_weights=cum_weights, k=TRACE_LENGTH
+        )
+    ]
+
+
+def main() -> None:
+    clients = load_clients()
+    trace = replay_trace(clients)
+    print(
+        f'{len(trace):,} requests of {len(clients):,} clients with client hints, '
+        f'{CACHE_SIZE:,} cache entries\n'
+    )
+
+    cache_keys = {
+        'all header values': lambda ua, headers: all_values_hash(ua.lower(), headers),
+        'client hints only': lambda ua, headers: ua_hash(ua.lower(), client_hint_headers(headers)),
+    }
+    for name, cache_key in cache_keys.items():
+        cache = UACache(max_entries=CACHE_SIZE)
+        for user_agent, headers in trace:
+            key = cache_key(user_agent, headers)
+            if cache.get(key) is None:
+                cache[key] = key
+        print(f'{name:>18}: {cache.hits / len(trace):.1%} hit rate')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Throughput of the user agent cache under concurrent lookups and stores, with
+one lock for the whole cache and with the cache split into shards.
+
+Each thread replays a Zipf distributed trace of cache keys, storing on misses.
+On CPython builds with the GIL only one thread runs at a time, so the thread
+counts mostly show the cost of the locks; the shards pay off on free-threaded
+builds (python3.13t and later) with several cores.
+
+    python benchmarks/cache_threads.py
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+from itertools import accumulate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from device_detector.cache import ShardedUACache, UACache
+
+THREAD_COUNTS = (1, 2, 4, 8)
+OPERATIONS = 400_000
+KEYS = 50_000
+ZIPF_EXPONENT = 1.0
+CACHE_SIZE = 4096
+SHARDS = 16
+
+
+def replay_trace(seed: int) -> list[str]:
+    rng = random.Random(seed)
+    cum_weights = list(accumulate(1 / rank**ZIPF_EXPONENT for rank in range(1, KEYS + 1)))
+    return [f'{key:x}' for key in rng.choices(range(KEYS), cum_weights=cum_weights, k=OPERATIONS)]
+
+
+def run(cache: UACache | ShardedUACache, traces: list[list[str]]) -> float:
+    """
+    Replay one trace per thread, and return the operations per second.
+    """
+    barrier = threading.Barrier(len(traces) + 1)
+
+    def replay(trace: list[str]) -> None:
+        barrier.wait()
+        for key in trace:
+            if cache.get(key) is None:
+                cache[key] = key
+
+    threads = [threading.Thread(target=replay, args=(trace,)) for trace in traces]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return sum(map(len, traces)) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print(
+        f'{OPERATIONS:,} operations per thread, {CACHE_SIZE:,} cache entries, '
+        f'{os.cpu_count()} CPUs, GIL {"enabled" if gil else "disabled"}\n'
+    )
+    print(f'{"threads":>8} {"one lock":>14} {f"{SHARDS} shards":>14}')
+    for thread_count in THREAD_COUNTS:
+        traces = [replay_trace(seed) for seed in range(thread_count)]
+        single = run(UACache(max_entries=CACHE_SIZE), traces)
+        sharded = run(ShardedUACache(shards=SHARDS, max_entries=CACHE_SIZE), traces)
+        print(f'{thread_count:>8} {single:>10,.0f} op/s {sharded:>10,.0f} op/s')
+
+
+if __name__ == '__main__':
+    main()
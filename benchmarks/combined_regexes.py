@@ -0,0 +1,84 @@
+"""
+Throughput of finding the first matching rule of a parser by searching every
+rule in turn, searching only the candidate rules, and searching the combined
+alternations of all rules.
+
+    python benchmarks/combined_regexes.py
+"""
+
+import os
+import sys
+import time
+from urllib.parse import unquote
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from device_detector.parser import OS, Browser, MobileApp, Parser
+from device_detector.settings import ROOT
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader  # type: ignore[assignment]
+
+FIXTURE_FILES = (
+    'tests/parser/fixtures/upstream/client/browser.yml',
+    'tests/parser/fixtures/upstream/client/mobile_app.yml',
+    'tests/parser/fixtures/upstream/oss.yml',
+)
+
+
+def load_user_agents(limit: int = 500) -> list[str]:
+    user_agents = []
+    for fixture_file in FIXTURE_FILES:
+        with open(f'{ROOT}/{fixture_file}', 'r', encoding='utf-8') as yf:
+            fixtures = yaml.load(yf, SafeLoader)
+        user_agents.extend(unquote(fixture['user_agent']) for fixture in fixtures[:limit])
+    return user_agents
+
+
+def every_rule(parser: Parser) -> dict | None:
+    for rule in parser.regex_list:
+        if rule['regex'].search(parser.user_agent):
+            return rule
+    return None
+
+
+def candidates(parser: Parser) -> dict | None:
+    for rule in parser.candidate_regexes():
+        if rule['regex'].search(parser.user_agent):
+            return rule
+    return None
+
+
+def combined_regexes(parser: Parser) -> tuple | None:
+    return parser.load_combined_regexes().first_match(parser.user_agent)
+
+
+def main() -> None:
+    user_agents = load_user_agents()
+    print(f'{len(user_agents)} user agents\n')
+    print(f'{"parser":<10} {"every rule":>12} {"candidates":>12} {"combined":>12}  (UAs/sec)')
+
+    for ParserClass in (Browser, MobileApp, OS):
+        parser = ParserClass('', None)
+        for rule in parser.regex_list:
+            rule['regex'].compile()
+        parser.load_candidate_index()
+        parser.load_combined_regexes()
+
+        results = []
+        for first_match in (every_rule, candidates, combined_regexes):
+            parsers = [ParserClass(ua, None) for ua in user_agents]
+            start = time.perf_counter()
+            for parser in parsers:
+                first_match(parser)
+            results.append(len(parsers) / (time.perf_counter() - start))
+
+        print(f'{ParserClass.__name__:<10} ' + ' '.join(f'{result:>12,.0f}' for result in results))
+
+
+if __name__ == '__main__':
+    main()
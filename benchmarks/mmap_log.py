@@ -0,0 +1,140 @@
+"""
+Throughput of reading the user agents of a log in combined log format line by
+line, as str, and from the memory mapped log with map_user_agents.
+
+Writes a synthetic log of user agents of the test fixtures, drawn by a Zipf
+distribution, to a temporary file of SIZE_MB (1 GB by default). Only reading
+the user agents is timed, not parsing them.
+
+    python benchmarks/mmap_log.py [SIZE_MB]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from itertools import accumulate
+from urllib.parse import unquote
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from device_detector.cli import COMBINED_LOG, parse_line
+from device_detector.log_reader import map_user_agents
+from device_detector.settings import ROOT
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader  # type: ignore[assignment]
+
+FIXTURE_FILES = (
+    'tests/fixtures/upstream/smartphone-1.yml',
+    'tests/fixtures/upstream/tablet-1.yml',
+    'tests/fixtures/upstream/desktop.yml',
+    'tests/fixtures/upstream/bots.yml',
+)
+SIZE_MB = 1024
+ZIPF_EXPONENT = 1.0
+REPETITIONS = 3
+
+
+def load_user_agents() -> list[str]:
+    user_agents = []
+    for fixture_file in FIXTURE_FILES:
+        with open(f'{ROOT}/{fixture_file}', 'r', encoding='utf-8') as yf:
+            fixtures = yaml.load(yf, SafeLoader)
+        user_agents.extend(
+            unquote(fixture['user_agent']).replace('"', r'\"') for fixture in fixtures
+        )
+    return user_agents
+
+
+def write_log(path: str, size: int, seed: int = 1) -> int:
+    rng = random.Random(seed)
+    user_agents = load_user_agents()
+    rng.shuffle(user_agents)
+    ranks = range(1, len(user_agents) + 1)
+    cum_weights = list(accumulate(1 / rank**ZIPF_EXPONENT for rank in ranks))
+
+    lines = 0
+    with open(path, 'w', encoding='utf-8') as log:
+        while log.tell() < size:
+            block = []
+            for user_agent in rng.choices(user_agents, cum_weights=cum_weights, k=10_000):
+                block.append(
+                    f'10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)} - - '
+                    f'[10/Oct/2025:13:55:{rng.randrange(60):02d} +0000] '
+                    f'"GET /item/{rng.randrange(10**6)}?page={rng.randrange(100)} HTTP/1.1" '
+                    f'{rng.choice((200, 200, 200, 304, 404))} {rng.randrange(10**5)} '
+                    f'"https://www.example.com/" "{user_agent}"\n'
+                )
+            log.write(''.join(block))
+            lines += len(block)
+    return lines
+
+
+def read_lines(path: str) -> int:
+    """
+    Lines decoded to str and matched one by one, as by the command line tool.
+    """
+    count = 0
+    with open(path, 'r', encoding='utf-8', errors='replace') as log:
+        for line in log:
+            if parse_line(line.rstrip('\r\n'), 'combined') is not None:
+                count += 1
+    return count
+
+
+def read_lines_match(path: str) -> int:
+    """
+    The least work per line with str lines: a match of the combined log regex.
+    """
+    count = 0
+    with open(path, 'r', encoding='utf-8', errors='replace') as log:
+        for line in log:
+            if (match := COMBINED_LOG.match(line)) is not None and match[3]:
+                count += 1
+    return count
+
+
+def read_mapped(path: str) -> int:
+    return sum(1 for item in map_user_agents(path) if item is not None)
+
+
+def best_time(read: Callable[[str], int], path: str) -> tuple[float, int]:
+    timings = []
+    for _ in range(REPETITIONS):
+        start = time.perf_counter()
+        count = read(path)
+        timings.append(time.perf_counter() - start)
+    return min(timings), count
+
+
+def main() -> None:
+    size = int(sys.argv[1]) * 2**20 if len(sys.argv) > 1 else SIZE_MB * 2**20
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'access.log')
+        lines = write_log(path, size)
+        size = os.path.getsize(path)
+        print(f'{size / 2**20:,.0f} MB log of {lines:,} lines, best of {REPETITIONS}\n')
+
+        methods = (
+            ('for line in open(): parse_line', read_lines),
+            ('for line in open(): match', read_lines_match),
+            ('map_user_agents', read_mapped),
+        )
+        for name, read in methods:
+            elapsed, count = best_time(read, path)
+            assert count == lines, (name, count, lines)
+            print(
+                f'{name:>32} {elapsed:6.2f}s {size / 2**20 / elapsed:7,.0f} MB/s '
+                f'{lines / elapsed:12,.0f} lines/s'
+            )
+
+
+if __name__ == '__main__':
+    main()
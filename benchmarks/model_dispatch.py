@@ -0,0 +1,98 @@
+"""
+Throughput of finding the model of a matched brand by searching every model
+regex of the brand, against searching only the candidate models found by the
+brand's model index, on the smartphone and tablet fixture sets.
+
+    python benchmarks/model_dispatch.py
+"""
+
+import glob
+import os
+import sys
+import time
+from urllib.parse import unquote
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from device_detector.literals import ModelList
+from device_detector.parser import Device
+from device_detector.settings import ROOT
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader  # type: ignore[assignment]
+
+FIXTURE_SETS = (
+    'smartphone',
+    'tablet',
+)
+
+
+def load_user_agents(fixture_set: str) -> list[str]:
+    user_agents = []
+    for fixture_file in sorted(glob.glob(f'{ROOT}/tests/fixtures/upstream/{fixture_set}*.yml')):
+        with open(fixture_file, 'r', encoding='utf-8') as yf:
+            fixtures = yaml.load(yf, SafeLoader)
+        user_agents.extend(unquote(fixture['user_agent']) for fixture in fixtures)
+    return user_agents
+
+
+def brand_models(user_agents: list[str]) -> list[tuple[str, str, ModelList]]:
+    """
+    User agents, lowercased user agents and models of the matched
+    brand, for user agents matching a brand that has models.
+    """
+    entries = []
+    for ua in user_agents:
+        parser = Device(ua, None)
+        if (rule_match := parser.first_matching_rule()) and (models := rule_match[0].get('models')):
+            entries.append((ua, parser.user_agent_lower, models))
+    return entries
+
+
+def every_model(ua: str, ua_lower: str, models: ModelList) -> dict | None:
+    for model in models:
+        if model['regex'].search(ua):
+            return model
+    return None
+
+
+def candidate_models(ua: str, ua_lower: str, models: ModelList) -> dict | None:
+    for model in models.candidates(ua_lower):
+        if model['regex'].search(ua):
+            return model
+    return None
+
+
+def main() -> None:
+    print(f'{"fixtures":<12} {"UAs":>6} {"every model":>12} {"candidates":>12}  (UAs/sec)')
+
+    for fixture_set in FIXTURE_SETS:
+        entries = brand_models(load_user_agents(fixture_set))
+        for models in {id(models): models for _, _, models in entries}.values():
+            models.load_index()
+            for model in models:
+                model['regex'].compile()
+
+        mismatches = sum(every_model(*entry) is not candidate_models(*entry) for entry in entries)
+        if mismatches:
+            print(f'{fixture_set}: {mismatches} user agents matched a different model')
+
+        results = []
+        for find_model in (every_model, candidate_models):
+            start = time.perf_counter()
+            for entry in entries:
+                find_model(*entry)
+            results.append(len(entries) / (time.perf_counter() - start))
+
+        print(
+            f'{fixture_set:<12} {len(entries):>6} '
+            + ' '.join(f'{result:>12,.0f}' for result in results)
+        )
+
+
+if __name__ == '__main__':
+    main()
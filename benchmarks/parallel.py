@@ -0,0 +1,81 @@
+"""
+Throughput of parsing distinct user agents in this process with
+DeviceDetector.parse_many, and in pools of worker processes with
+ParallelParser, by number of processes.
+
+The user agents of the upstream test fixtures are all distinct, so every
+user agent is parsed rather than served from a cache. Pools are started and
+their rules loaded before timing.
+
+    python benchmarks/parallel.py
+"""
+
+import os
+import sys
+import time
+from urllib.parse import unquote
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from device_detector import DeviceDetector, preload
+from device_detector.parallel import ParallelParser
+from device_detector.settings import DDCache, ROOT
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader  # type: ignore[assignment]
+
+FIXTURE_FILES = (
+    'tests/fixtures/upstream/smartphone-1.yml',
+    'tests/fixtures/upstream/smartphone-2.yml',
+    'tests/fixtures/upstream/tablet-1.yml',
+    'tests/fixtures/upstream/desktop.yml',
+    'tests/fixtures/upstream/bots.yml',
+    'tests/fixtures/upstream/clienthints.yml',
+)
+
+
+def load_clients() -> list[tuple[str, dict | None]]:
+    clients = []
+    for fixture_file in FIXTURE_FILES:
+        with open(f'{ROOT}/{fixture_file}', 'r', encoding='utf-8') as yf:
+            fixtures = yaml.load(yf, SafeLoader)
+        clients.extend(
+            (unquote(fixture['user_agent']), fixture.get('headers')) for fixture in fixtures
+        )
+    return clients
+
+
+def main() -> None:
+    clients = load_clients()
+    cpus = os.cpu_count() or 1
+    print(f'{len(clients):,} distinct user agents, {cpus} CPUs\n')
+    preload()
+
+    DDCache.clear_user_agents()
+    start = time.perf_counter()
+    DeviceDetector.parse_many(clients)
+    serial = len(clients) / (time.perf_counter() - start)
+    print(f'{"parse_many":>12} {serial:>8,.0f} UAs/s')
+
+    process_counts = sorted({1, 2, 4, cpus // 2, cpus} - {0})
+    for processes in process_counts:
+        DDCache.clear_user_agents()
+        with ParallelParser(processes=processes) as parser:
+            # Start the workers before timing
+            parser.parse_many(['Googlebot/2.1'] * processes)
+            DDCache.clear_user_agents()
+            start = time.perf_counter()
+            parser.parse_many(clients)
+            parallel = len(clients) / (time.perf_counter() - start)
+        print(
+            f'{processes:>3} process{"es" if processes > 1 else "  "} '
+            f'{parallel:>8,.0f} UAs/s {parallel / serial:>5.2f}x'
+        )
+
+
+if __name__ == '__main__':
+    main()
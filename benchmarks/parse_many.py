@@ -0,0 +1,102 @@
+"""
+Throughput of parsing a log of user agents one line at a time with
+DeviceDetector(ua).parse(), and in batches with DeviceDetector.parse_many.
+
+The log replays user agents and client hints of the upstream test fixtures
+by a Zipf distribution, as most lines of real logs repeat a small set of
+user agents. Each method runs on an empty user agent cache, and again with
+all user agents of the log cached.
+
+    python benchmarks/parse_many.py
+"""
+
+import os
+import random
+import sys
+import time
+from collections.abc import Callable
+from itertools import accumulate
+from urllib.parse import unquote
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from device_detector import DeviceDetector
+from device_detector.settings import DDCache, ROOT
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader  # type: ignore[assignment]
+
+FIXTURE_FILES = (
+    'tests/fixtures/upstream/smartphone-1.yml',
+    'tests/fixtures/upstream/tablet-1.yml',
+    'tests/fixtures/upstream/desktop.yml',
+    'tests/fixtures/upstream/bots.yml',
+    'tests/fixtures/upstream/clienthints.yml',
+)
+TRACE_LENGTH = 200_000
+ZIPF_EXPONENT = 1.0
+CACHE_SIZE = 50_000
+
+LogLines = list[tuple[str, dict | None]]
+
+
+def load_clients() -> LogLines:
+    clients = []
+    for fixture_file in FIXTURE_FILES:
+        with open(f'{ROOT}/{fixture_file}', 'r', encoding='utf-8') as yf:
+            fixtures = yaml.load(yf, SafeLoader)
+        clients.extend(
+            (unquote(fixture['user_agent']), fixture.get('headers')) for fixture in fixtures
+        )
+    return clients
+
+
+def replay_trace(clients: LogLines, seed: int = 1) -> LogLines:
+    rng = random.Random(seed)
+    popular = clients.copy()
+    rng.shuffle(popular)
+    cum_weights = list(accumulate(1 / rank**ZIPF_EXPONENT for rank in range(1, len(popular) + 1)))
+    return rng.choices(popular, cum_weights=cum_weights, k=TRACE_LENGTH)
+
+
+def one_at_a_time(trace: LogLines) -> list:
+    return [DeviceDetector(ua, headers=headers).parse() for ua, headers in trace]
+
+
+def parse_many(trace: LogLines) -> list:
+    return DeviceDetector.parse_many(trace)
+
+
+def lines_per_second(parse: Callable[[LogLines], list], trace: LogLines) -> float:
+    start = time.perf_counter()
+    parse(trace)
+    return len(trace) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    clients = load_clients()
+    trace = replay_trace(clients)
+    distinct = len(set((ua, str(headers)) for ua, headers in trace))
+    print(
+        f'{len(trace):,} log lines of {distinct:,} distinct user agents, '
+        f'{CACHE_SIZE:,} cache entries\n'
+    )
+
+    # Load the rules of all parsers before timing
+    one_at_a_time(clients)
+
+    print(f'{"":>15} {"empty cache":>16} {"cached":>16}')
+    for name, parse in (('one at a time', one_at_a_time), ('parse_many', parse_many)):
+        DDCache.configure_user_agents(max_entries=CACHE_SIZE)
+        DDCache.clear_user_agents()
+        cold = lines_per_second(parse, trace)
+        warm = lines_per_second(parse, trace)
+        print(f'{name:>15} {cold:>10,.0f} lines/s {warm:>10,.0f} lines/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Number of patterns compiled by each regex engine, and parsing throughput,
+for each regex backend. Each backend runs in its own process, so that all
+regexes are compiled with the selected backend.
+
+    python benchmarks/regex_backends.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from urllib.parse import unquote
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from device_detector import DeviceDetector, preload
+from device_detector.regex_backends import BACKENDS, regex_backend_stats, set_regex_backend
+from device_detector.settings import ROOT, DDCache
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader  # type: ignore[assignment]
+
+FIXTURE_FILES = (
+    'tests/fixtures/upstream/smartphone-1.yml',
+    'tests/fixtures/upstream/tablet-1.yml',
+    'tests/fixtures/upstream/desktop.yml',
+    'tests/fixtures/upstream/bots.yml',
+    'tests/fixtures/upstream/mobile_apps.yml',
+)
+
+
+def load_user_agents() -> list[str]:
+    user_agents = []
+    for fixture_file in FIXTURE_FILES:
+        with open(f'{ROOT}/{fixture_file}', 'r', encoding='utf-8') as yf:
+            fixtures = yaml.load(yf, SafeLoader)
+        user_agents.extend(unquote(fixture['user_agent']) for fixture in fixtures)
+    return user_agents
+
+
+def parse_with_backend(backend: str) -> dict:
+    """
+    Compile all regexes with the backend, and parse the fixture user agents.
+    """
+    set_regex_backend(backend)
+    preload(freeze_gc=False)
+    user_agents = load_user_agents()
+
+    results = []
+    start = time.perf_counter()
+    for ua in user_agents:
+        DDCache.clear_user_agents()
+        detector = DeviceDetector(ua).parse()
+        results.append([
+            detector.os_name(),
+            detector.os_version(),
+            detector.client_name(),
+            detector.client_version(),
+            detector.device_type(),
+            detector.device_brand(),
+            detector.device_model(),
+        ])
+    elapsed = time.perf_counter() - start
+
+    return {
+        'stats': regex_backend_stats(),
+        'throughput': len(user_agents) / elapsed,
+        'results': results,
+    }
+
+
+def main() -> None:
+    runs = {}
+    for backend in BACKENDS:
+        process = subprocess.run(
+            [sys.executable, __file__, backend],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        if process.returncode:
+            print(f'{backend}: {process.stderr.strip().splitlines()[-1]}')
+            continue
+        runs[backend] = json.loads(process.stdout)
+
+    expected = runs['regex']['results']
+    print(f'{len(expected)} user agents\n')
+    print(f'{"backend":<8} {"regex":>7} {"re":>7} {"re2":>7} {"UAs/sec":>9} {"mismatches":>11}')
+    for backend, run in runs.items():
+        stats = run['stats']
+        mismatches = sum(result != ex for result, ex in zip(run['results'], expected))
+        print(
+            f'{backend:<8} '
+            + ' '.join(f'{stats.get(engine, 0):>7}' for engine in ('regex', 're', 're2'))
+            + f' {run["throughput"]:>9,.0f} {mismatches:>11}'
+        )
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        print(json.dumps(parse_with_backend(sys.argv[1]), default=str))
+    else:
+        main()
@@ -0,0 +1,75 @@
+"""
+Compare scanning a user agent with the AhoCorasick automaton and candidate
+index of every parser, against a single scan with the shared ParserScanner.
+
+    python benchmarks/shared_scan.py
+"""
+
+import os
+import sys
+import timeit
+from functools import partial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from device_detector import DeviceDetector
+from device_detector.parser import OS, Bot
+
+LONG_BROWSER_UAS = (
+    (
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+        'Chrome/120.0.0.0 Safari/537.36 Edg/120.0.2210.91'
+    ),
+    (
+        'Mozilla/5.0 (Linux; Android 13; SM-S918B Build/TP1A.220624.014; wv) AppleWebKit/537.36 '
+        '(KHTML, like Gecko) Version/4.0 Chrome/119.0.6045.193 Mobile Safari/537.36 '
+        '[FB_IAB/FB4A;FBAV/441.0.0.23.105;]'
+    ),
+    (
+        'Mozilla/5.0 (iPhone; CPU iPhone OS 17_1_2 like Mac OS X) AppleWebKit/605.1.15 '
+        '(KHTML, like Gecko) Mobile/15E148 Instagram 309.1.1.28.108 (iPhone14,2; iOS 17_1_2; '
+        'en_US; en; scale=3.00; 1170x2532; 537288532)'
+    ),
+    (
+        'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) '
+        'HeadlessChrome/120.0.6099.71 Safari/537.36'
+    ),
+)
+
+
+def main(number: int = 2000) -> None:
+    parsers = [
+        Parser('', None)
+        for Parser in (*DeviceDetector.CLIENT_PARSERS, *DeviceDetector.DEVICE_PARSERS, Bot, OS)
+    ]
+    automatons = [parser.load_ahocorasick_patterns() for parser in parsers]
+    indexes = [parser.load_candidate_index() for parser in parsers]
+    cache_names = [parser.cache_name for parser in parsers]
+    scanner = DeviceDetector.parser_scanner()
+
+    def per_parser_scans(ua_lower: str) -> None:
+        for automaton, index in zip(automatons, indexes):
+            if automaton:
+                automaton.find_matches_as_strings(ua_lower)
+            index.candidates(ua_lower)
+
+    def shared_scan(ua: str) -> None:
+        scan = scanner.scan(ua)
+        for cache_name in cache_names:
+            scan.ahocorasick_matches(cache_name)
+            scan.candidates(cache_name)
+
+    print(f'{len(parsers)} parsers, {len(scanner.patterns)} shared patterns\n')
+    print(f'{"length":>6} {"per-parser":>12} {"shared":>10} {"saving":>8}')
+    for ua in LONG_BROWSER_UAS:
+        ua_lower = ua.lower()
+        separate = min(timeit.repeat(partial(per_parser_scans, ua_lower), number=number, repeat=5))
+        shared = min(timeit.repeat(partial(shared_scan, ua), number=number, repeat=5))
+        separate_us = separate / number * 1e6
+        shared_us = shared / number * 1e6
+        saving = 1 - shared_us / separate_us
+        print(f'{len(ua):>6} {separate_us:>10.1f}us {shared_us:>8.1f}us {saving:>8.0%}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,9 @@
 __version__ = '6.1.0'
+from .cache import *
 from .settings import *
 from .parser import *
 from .device_detector import *
+from .result import *
+from .warmup import *
+from .regex_backends import *
+from .aio import *
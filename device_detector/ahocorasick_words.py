@@ -0,0 +1,249 @@
+"""
+Generate and validate the AhoCorasick word lists under regexes/ahocorasick.
+
+The words of a parser gate all of its rules: when none of the words is found
+in a user agent, none of the rules are checked. A rule that can match without
+any of the words being present is silently skipped, while words that are too
+general make the pre-check useless.
+
+The generated words of each fixture file are the required literals of its
+rules (see literals.py), so any user agent matching a rule contains a word.
+Rules without required literals are reported instead, as no word list can
+gate them; the word list of their fixture file is left as it is.
+
+    python -m device_detector.ahocorasick_words             # report
+    python -m device_detector.ahocorasick_words --write     # write word lists
+    python -m device_detector.ahocorasick_words --validate  # replay test fixtures
+
+Rebuild the rule bundle after writing new word lists.
+"""
+
+import argparse
+from collections.abc import Iterable
+from glob import glob
+from typing import NamedTuple
+from urllib.parse import unquote
+
+import yaml
+
+from .literals import required_literals
+from .parser import Parser
+from .settings import ROOT, DDCache
+from .warmup import PRELOAD_PARSERS
+from .yaml_loader import RegexLoader, SafeLoader
+
+# Test fixtures replayed by validate(), relative to the package root
+TEST_FIXTURE_GLOBS = (
+    'tests/fixtures/*/*.yml',
+    'tests/parser/fixtures/*/*.yml',
+    'tests/parser/fixtures/*/*/*.yml',
+)
+
+
+class FixtureWords(NamedTuple):
+    parser: str
+    fixture: str
+    words: set[str]
+    # Patterns of the rules without required literals
+    uncovered: list[str]
+
+    @property
+    def path(self) -> str:
+        return f'{ROOT}/regexes/ahocorasick/{self.fixture}'
+
+
+class FalseNegative(NamedTuple):
+    parser: str
+    user_agent: str
+    pattern: str
+
+
+def rule_literals(rule: dict) -> set[str] | None:
+    """
+    Literals of which any match of the rule contains at least one,
+    or None if the rule has no required literals.
+    """
+    if 'regex' in rule:
+        return required_literals(rule['regex'].pattern)
+
+    all_literals: set[str] = set()
+    for regex in rule.get('regexes', []):
+        if not (literals := required_literals(regex.pattern)):
+            return None
+        all_literals.update(literals)
+
+    return all_literals or None
+
+
+def rule_pattern(rule: dict) -> str:
+    if 'regex' in rule:
+        return rule['regex'].pattern
+    return '|'.join(regex.pattern for regex in rule['regexes'])
+
+
+def rule_matches(rule: dict, user_agent: str) -> bool:
+    if 'regex' in rule:
+        return rule['regex'].search(user_agent) is not None
+    return any(regex.search(user_agent) for regex in rule.get('regexes', []))
+
+
+def gated_parsers(parsers: Iterable[type[RegexLoader]] = PRELOAD_PARSERS) -> list[Parser]:
+    """
+    Parsers that check AhoCorasick words before checking their rules.
+    """
+    gated = []
+    for ParserClass in parsers:
+        parser = ParserClass('', None)  # type: ignore[call-arg]
+        if isinstance(parser, Parser) and parser.fixture_files and parser.load_ahocorasick_words():
+            gated.append(parser)
+    return gated
+
+
+def generate(parsers: Iterable[type[RegexLoader]] = PRELOAD_PARSERS) -> list[FixtureWords]:
+    """
+    Derive the words of each fixture file of the gated parsers from its rules.
+    """
+    fixture_words = []
+
+    for parser in gated_parsers(parsers):
+        regex_list = parser.regex_list
+        start = 0
+        for fixture in parser.fixture_files:
+            end = start + len(parser.yaml_to_list(f'regexes/{fixture}'))
+            words: set[str] = set()
+            uncovered = []
+            for rule in regex_list[start:end]:
+                if literals := rule_literals(rule):
+                    words.update(literals)
+                else:
+                    uncovered.append(rule_pattern(rule))
+            fixture_words.append(FixtureWords(parser.cache_name, fixture, words, uncovered))
+            start = end
+
+    return fixture_words
+
+
+def write(fixture_words: Iterable[FixtureWords]) -> list[str]:
+    """
+    Write the word lists of the fixture files that have no uncovered rules.
+
+    Returns the paths of the written files.
+    """
+    written = []
+    for entry in fixture_words:
+        if entry.uncovered:
+            continue
+        with open(entry.path, 'w', encoding='utf-8') as yf:
+            yaml.safe_dump(entry.words, yf, allow_unicode=True, width=1000)
+        written.append(entry.path)
+
+    if written:
+        # The bundle, if any, holds the previous word lists
+        DDCache['bundle'] = {}
+        DDCache['corasick'] = {}
+        DDCache['scanners'] = {}
+
+    return written
+
+
+def fixture_user_agents(patterns: Iterable[str] = TEST_FIXTURE_GLOBS) -> list[str]:
+    """
+    Distinct user agents of the test fixture files matching the glob patterns,
+    relative to the package root.
+    """
+    user_agents: dict[str, None] = {}
+    for pattern in patterns:
+        for fixture_file in sorted(glob(f'{ROOT}/{pattern}')):
+            with open(fixture_file, 'r', encoding='utf-8') as yf:
+                fixtures = yaml.load(yf, SafeLoader) or []
+            for fixture in fixtures:
+                if isinstance(fixture, dict) and 'user_agent' in fixture:
+                    user_agents[unquote(str(fixture['user_agent']))] = None
+    return list(user_agents)
+
+
+def validate(
+    parsers: Iterable[type[RegexLoader]] = PRELOAD_PARSERS,
+    user_agents: Iterable[str] | None = None,
+) -> tuple[list[FalseNegative], dict[str, int]]:
+    """
+    Replay user agents through the word pre-check of each gated parser.
+
+    Returns the user agents that matched a rule although none of the
+    parser's words were found, and the number of user agents per parser
+    that passed the pre-check but matched no rule.
+
+    Every rule of the parser is searched, not only the candidate rules,
+    as the candidates are derived from the same required literals as the
+    words, and would share any of their mistakes.
+    """
+    if user_agents is None:
+        user_agents = fixture_user_agents()
+
+    parser_classes = [type(parser) for parser in gated_parsers(parsers)]
+    false_negatives = []
+    wasted = dict.fromkeys((ParserClass.__name__ for ParserClass in parser_classes), 0)
+
+    for ua in user_agents:
+        for ParserClass in parser_classes:
+            parser = ParserClass(ua, None)
+            passed = parser.check_all_regexes()
+            rule = next(
+                (rule for rule in parser.regex_list if rule_matches(rule, ua)),
+                None,
+            )
+            if rule is None:
+                if passed:
+                    wasted[parser.cache_name] += 1
+            elif not passed:
+                false_negatives.append(FalseNegative(parser.cache_name, ua, rule_pattern(rule)))
+
+    return false_negatives, wasted
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    arg_parser.add_argument('parsers', nargs='*', help='names of the parsers, default all')
+    arg_parser.add_argument('--write', action='store_true', help='write the word lists')
+    arg_parser.add_argument('--validate', action='store_true', help='replay the test fixtures')
+    args = arg_parser.parse_args()
+
+    parsers = [
+        ParserClass
+        for ParserClass in PRELOAD_PARSERS
+        if not args.parsers or ParserClass.__name__ in args.parsers
+    ]
+    fixture_words = generate(parsers)
+    for entry in fixture_words:
+        print(f'{entry.parser} {entry.fixture}: {len(entry.words)} words')
+        for pattern in entry.uncovered:
+            print(f'    no usable literal: {pattern}')
+
+    if args.write:
+        for path in write(fixture_words):
+            print(f'wrote {path}')
+
+    if args.validate:
+        false_negatives, wasted = validate(parsers)
+        for false_negative in false_negatives:
+            print(
+                f'{false_negative.parser} missed {false_negative.user_agent!r}, '
+                f'matching {false_negative.pattern}'
+            )
+        for cache_name, count in wasted.items():
+            print(f'{cache_name}: {count} user agents passed the pre-check without matching')
+        print(f'{len(false_negatives)} false negatives')
+        if false_negatives:
+            raise SystemExit(1)
+
+
+__all__ = (
+    'FixtureWords',
+    'generate',
+    'validate',
+    'write',
+)
+
+
+if __name__ == '__main__':
+    main()
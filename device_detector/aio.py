@@ -0,0 +1,120 @@
+"""
+Parse user agents from asyncio code without blocking the event loop.
+
+User agents cached in this process are returned right away. Misses are looked
+up in the shared cache and parsed in a bounded pool of threads, as either may
+take milliseconds. Concurrent requests for the same user agent and client
+hints share a single parse, so that a popular user agent appearing for the
+first time doesn't start a parse per request.
+
+    result = await aparse(request.headers['User-Agent'], dict(request.headers))
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+
+from .cache import _missing
+from .device_detector import DeviceDetector
+from .parser.client_hints import client_hint_headers
+from .result import ParsedResult
+from .settings import DDCache
+from .utils import canonical_ua, ua_hash
+
+# Threads parsing the misses of aparse
+MAX_PARSE_THREADS = min(4, os.cpu_count() or 1)
+
+_lock = threading.RLock()
+_executor: ThreadPoolExecutor | None = None
+# Parse of each cache key in flight, awaited by all requests of the key
+_in_flight: dict[str, Future] = {}
+
+
+def parse_executor() -> ThreadPoolExecutor:
+    """
+    Thread pool parsing the misses of aparse, started on first use.
+    """
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=MAX_PARSE_THREADS,
+                thread_name_prefix='device_detector',
+            )
+        return _executor
+
+
+def set_parse_executor(executor: ThreadPoolExecutor | None) -> None:
+    """
+    Parse the misses of aparse in the executor, such as a pool with more
+    threads. The default pool is started again on first use if None.
+    """
+    global _executor
+    with _lock:
+        _executor = executor
+
+
+def parse(
+    key: str,
+    user_agent: str,
+    headers: dict[str, str] | None,
+    skip_bot_detection: bool = False,
+    skip_device_detection: bool = False,
+) -> ParsedResult:
+    """
+    Look up the user agent in the shared cache, or parse it. Runs in the executor.
+    """
+    inputs = {key: (user_agent, headers)}
+    return DeviceDetector.parse_inputs(inputs, skip_bot_detection, skip_device_detection)[key]
+
+
+def parse_done(key: str, future: Future) -> None:
+    with _lock:
+        if _in_flight.get(key) is future:
+            del _in_flight[key]
+
+
+async def aparse(
+    user_agent: str,
+    headers: dict[str, str] | None = None,
+    skip_bot_detection: bool = False,
+    skip_device_detection: bool = False,
+) -> ParsedResult:
+    """
+    ParsedResult of the user agent and client hint headers of a request.
+
+    Args:
+        user_agent: User Agent string to parse
+        headers: Headers of the request, of which only client hints are read
+        skip_bot_detection: Skip checking if client is a bot
+        skip_device_detection: Skip device brand and model lookup.
+    """
+    headers = client_hint_headers(headers)
+    key = ua_hash(canonical_ua(user_agent), headers)
+    if (cached := DDCache['user_agents'].lookup(key)) is not _missing:
+        return cached
+
+    with _lock:
+        if (future := _in_flight.get(key)) is None:
+            future = parse_executor().submit(
+                parse,
+                key,
+                user_agent,
+                headers,
+                skip_bot_detection,
+                skip_device_detection,
+            )
+            _in_flight[key] = future
+            # Runs right away, holding the lock again, if the parse already finished
+            future.add_done_callback(partial(parse_done, key))
+
+    # Cancelling one request must not cancel the parse awaited by the others
+    return await asyncio.shield(asyncio.wrap_future(future))
+
+
+__all__ = (
+    'aparse',
+    'set_parse_executor',
+)
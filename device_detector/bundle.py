@@ -0,0 +1,181 @@
+"""
+Precompiled rule bundle.
+
+Parsing the YAML fixtures is the most expensive part of a cold start, as the
+upstream device fixtures alone are tens of thousands of lines. The bundle
+stores every fixture under `regexes/` and `appdetails/` already parsed, so
+that loaders can unpickle the data instead of parsing YAML.
+
+Build the bundle with `make bundle`, or by calling:
+
+>>> from device_detector.bundle import build_bundle
+>>> build_bundle()
+
+The bundle is keyed by a content hash of the fixture sources. If any fixture
+is edited after the bundle was built, the bundle is ignored and fixtures are
+loaded from YAML until it is rebuilt.
+"""
+
+import os
+import pickle  # nosec B403 - the bundle is only ever written by build_bundle
+import tempfile
+from hashlib import blake2s
+from importlib.resources import files
+from typing import Any
+
+import yaml
+
+try:
+    from importlib.resources.abc import Traversable
+except ImportError:
+    from importlib.abc import Traversable
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+from .settings import ROOT, DDCache
+
+# Increment when the layout of the bundle changes
+BUNDLE_FORMAT = 1
+
+# Directories, relative to the package root, containing fixtures to bundle
+BUNDLE_DIRECTORIES = (
+    'appdetails',
+    'regexes',
+)
+
+RULE_BUNDLE_PATH = os.path.join(ROOT, 'rules.bundle')
+
+
+def fixture_paths() -> dict[str, Traversable]:
+    """
+    Map the path of every bundled fixture, relative to the
+    package root, to the resource it can be read from.
+
+    Resources are used rather than filesystem paths so that
+    fixtures can be read when installed as a zipped egg.
+    """
+    package = files('device_detector')
+    paths = {}
+
+    def walk(resource: Traversable, relative_path: str) -> None:
+        for entry in resource.iterdir():
+            entry_path = f'{relative_path}/{entry.name}'
+            if entry.is_dir():
+                walk(entry, entry_path)
+            elif entry.name.endswith('.yml'):
+                paths[entry_path] = entry
+
+    for directory in BUNDLE_DIRECTORIES:
+        walk(package.joinpath(directory), directory)
+
+    return dict(sorted(paths.items()))
+
+
+def rules_version() -> str:
+    """
+    Content hash of all fixture sources.
+
+    Any change to the regexes, app details or AhoCorasick words
+    results in a new version, so the value can be used to stamp
+    anything derived from the rules.
+    """
+    if version := DDCache.get('rules_version', ''):
+        return version
+
+    digest = blake2s()
+    for relative_path, resource in fixture_paths().items():
+        digest.update(relative_path.encode('utf-8'))
+        digest.update(resource.read_bytes())
+
+    version = digest.hexdigest()
+    DDCache['rules_version'] = version
+
+    return version
+
+
+def build_bundle(path: str = RULE_BUNDLE_PATH) -> str:
+    """
+    Parse all fixtures and write them to the bundle at the given path.
+
+    Each fixture is pickled separately so that loading the bundle is cheap,
+    and every fixture is unpickled into new objects on each use. The loaders
+    modify the parsed data in place, so it can't be shared.
+    """
+    fixtures = {}
+    for relative_path, resource in fixture_paths().items():
+        data = yaml.load(resource.read_bytes(), SafeLoader)
+        fixtures[relative_path] = pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+
+    bundle = {
+        'format': BUNDLE_FORMAT,
+        'version': rules_version(),
+        'fixtures': fixtures,
+    }
+
+    # Write to a temporary file first, so that processes
+    # starting up never read a partially written bundle.
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as bf:
+            pickle.dump(bundle, bf, pickle.HIGHEST_PROTOCOL)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    return path
+
+
+def load_bundle(path: str = RULE_BUNDLE_PATH) -> dict[str, bytes] | None:
+    """
+    Load the pickled fixtures from the bundle at the given path.
+
+    Return None if the bundle doesn't exist, or if it was built
+    from fixtures that differ from the installed fixtures.
+    """
+    try:
+        with open(path, 'rb') as bf:
+            bundle = pickle.load(bf)  # nosec B301
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+
+    if not isinstance(bundle, dict) or bundle.get('format') != BUNDLE_FORMAT:
+        return None
+
+    if bundle.get('version') != rules_version():
+        return None
+
+    return bundle['fixtures']
+
+
+def bundled_fixture(yfile: str) -> Any:
+    """
+    Return the parsed data of the fixture from the default bundle,
+    or None if the fixture isn't available from a valid bundle.
+    """
+    fixtures = DDCache.get('bundle')
+    if fixtures is None:
+        with DDCache.lock('bundle'):
+            if (fixtures := DDCache.get('bundle')) is None:
+                # Cache an empty dict when no valid bundle is
+                # available so the check only happens once.
+                fixtures = load_bundle() or {}
+                DDCache['bundle'] = fixtures
+
+    if (data := fixtures.get(yfile)) is None:
+        return None
+
+    return pickle.loads(data)  # nosec B301
+
+
+__all__ = (
+    'RULE_BUNDLE_PATH',
+    'build_bundle',
+    'load_bundle',
+    'rules_version',
+)
@@ -0,0 +1,673 @@
+"""
+Cache of parsed user agents, keyed by ua_hash.
+
+The cache is bounded by number of entries, and optionally by the approximate
+number of bytes of the cached results, and entries may expire after a TTL.
+Configure it before or while parsing:
+
+    from device_detector import DDCache
+    DDCache.configure_user_agents(max_entries=100_000, max_bytes=256 * 2**20, ttl=3600)
+
+With admission=True, a full cache only admits a user agent that has been seen
+more often than the entry it would evict (TinyLFU), so that a stream of user
+agents seen only once can't push out the popular ones. Worthless user agents
+(gibberish, UUIDs, numbers) are kept in a separate small cache.
+
+A shared cache serves user agents parsed by other processes on misses. Shared
+caches implement the CacheBackend interface, such as the SQLiteCache for the
+processes of a host, or the RedisCache for a fleet of hosts.
+
+The cache is safe to use from many threads, also without the GIL. Each cache
+holds a lock around every change, which threads contend for on every hit, so
+heavily threaded servers should spread the entries over several independently
+locked shards:
+
+    DDCache.configure_user_agents(max_entries=100_000, shards=16)
+"""
+
+import sys
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from time import monotonic
+from typing import Any
+
+MAX_CACHE_SIZE = 1024
+MAX_WORTHLESS_SIZE = 256
+DEFAULT_SHARDS = 16
+
+# Number of counters of a user agent in the frequency sketch
+SKETCH_DEPTH = 4
+# Odd multipliers deriving the counter of each row from the key hash
+SKETCH_SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+SKETCH_MAX_COUNT = 15
+# Translation table halving every counter
+HALVE_COUNTS = bytes(count >> 1 for count in range(256))
+
+_missing = object()
+
+
+def approximate_size(value: Any) -> int:
+    """
+    Approximate number of bytes held by the value.
+
+    Values that define an approximate_size method are measured with it,
+    containers are measured recursively, other objects shallowly.
+    """
+    if (measure := getattr(value, 'approximate_size', None)) is not None:
+        return measure()
+
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(approximate_size(k) + approximate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(approximate_size(item) for item in value)
+    return size
+
+
+class FrequencySketch:
+    """
+    Count-min sketch of how often keys were seen recently.
+
+    Each key has a counter in each of SKETCH_DEPTH rows, and its frequency
+    is the smallest of them. Counters saturate at SKETCH_MAX_COUNT, and are
+    all halved after sample_size increments, so that keys that were popular
+    long ago lose their frequency.
+    """
+
+    __slots__ = (
+        'increments',
+        'mask',
+        'sample_size',
+        'table',
+        'width',
+    )
+
+    def __init__(self, capacity: int) -> None:
+        self.width = 1 << max(6, (capacity - 1).bit_length())
+        self.mask = self.width - 1
+        self.table = bytearray(self.width * SKETCH_DEPTH)
+        self.increments = 0
+        self.sample_size = 10 * self.width
+
+    def counters(self, key: str) -> list[int]:
+        key_hash = hash(key)
+        mask = self.mask
+        return [
+            row * self.width + ((key_hash * seed >> 32) & mask)
+            for row, seed in enumerate(SKETCH_SEEDS)
+        ]
+
+    def frequency(self, key: str) -> int:
+        table = self.table
+        return min(table[counter] for counter in self.counters(key))
+
+    def increment(self, key: str) -> None:
+        table = self.table
+        for counter in self.counters(key):
+            if table[counter] < SKETCH_MAX_COUNT:
+                table[counter] += 1
+
+        self.increments += 1
+        if self.increments >= self.sample_size:
+            self.table = self.table.translate(HALVE_COUNTS)
+            self.increments //= 2
+
+
+class CacheBackend(ABC):
+    """
+    Interface of caches of parsed user agents, keyed by ua_hash.
+
+    Subclasses implement get_many, set_many and clear, and may override get
+    and set where a single key can be looked up more cheaply. Backends shared
+    with other processes serialize results with ParsedResult.to_json, and only
+    serve results parsed by the same rules version.
+    """
+
+    __slots__ = ()
+
+    def get(self, key: str) -> Any:
+        return self.get_many((key,)).get(key)
+
+    def set(self, key: str, value: Any) -> None:
+        self.set_many({key: value})
+
+    @abstractmethod
+    def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        """
+        Cached values of the keys, leaving out keys that aren't cached.
+        """
+
+    @abstractmethod
+    def set_many(self, items: Mapping[str, Any]) -> None:
+        """
+        Cache the values of the keys.
+        """
+
+    @abstractmethod
+    def clear(self) -> None:
+        """
+        Remove all cached values.
+        """
+
+
+class UACache(CacheBackend):
+    """
+    Least-recently-used cache of parsed user agents.
+
+    Entries are kept in an OrderedDict, so hits, insertions and evictions are
+    all O(1) operations implemented in C. The sizes and expiry times of entries
+    are only tracked when max_bytes or ttl are set, and the frequencies of keys
+    only with admission.
+    """
+
+    __slots__ = (
+        'entries',
+        'evictions',
+        'expires',
+        'hits',
+        'lock',
+        'max_bytes',
+        'max_entries',
+        'max_worthless',
+        'misses',
+        'rejections',
+        'shared',
+        'shared_hits',
+        'sizeof',
+        'sizes',
+        'sketch',
+        'total_bytes',
+        'ttl',
+        'worthless',
+        'worthless_expires',
+    )
+
+    def __init__(
+        self,
+        max_entries: int = MAX_CACHE_SIZE,
+        max_bytes: int | None = None,
+        ttl: float | None = None,
+        sizeof: Callable[[Any], int] = approximate_size,
+        admission: bool = False,
+        max_worthless: int = MAX_WORTHLESS_SIZE,
+        shared: CacheBackend | None = None,
+    ) -> None:
+        """
+        Args:
+            max_entries: Maximum number of cached user agents
+            max_bytes: Maximum approximate size of all cached results, or None for no limit
+            ttl: Seconds after which entries expire, or None to never expire
+            sizeof: Function returning the approximate size in bytes of a result
+            admission: Only admit user agents seen more often than the entry they'd evict
+            max_worthless: Maximum number of cached worthless user agents
+            shared: Cache shared with other processes, checked on misses and
+                updated with every new entry
+        """
+        if max_entries < 1:
+            raise ValueError(f'max_entries must be at least 1, not {max_entries}')
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError(f'max_bytes must be at least 1, not {max_bytes}')
+        if ttl is not None and ttl <= 0:
+            raise ValueError(f'ttl must be positive, not {ttl}')
+        if max_worthless < 0:
+            raise ValueError(f'max_worthless must not be negative, not {max_worthless}')
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self.max_worthless = max_worthless
+        self.sketch = FrequencySketch(max_entries) if admission else None
+        self.entries: OrderedDict[str, Any] = OrderedDict()
+        self.worthless: OrderedDict[str, Any] = OrderedDict()
+        self.sizes: dict[str, int] = {}
+        self.expires: dict[str, float] = {}
+        self.worthless_expires: dict[str, float] = {}
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejections = 0
+        self.shared = shared
+        self.shared_hits = 0
+        # Reentrant, as operations holding the lock call each other
+        self.lock = threading.RLock()
+
+    def configuration(self) -> dict[str, Any]:
+        return {
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'ttl': self.ttl,
+            'sizeof': self.sizeof,
+            'admission': self.sketch is not None,
+            'max_worthless': self.max_worthless,
+            'shared': self.shared,
+        }
+
+    def lookup(self, key: str) -> Any:
+        """
+        Value of the key cached in this process, or _missing.
+        """
+        with self.lock:
+            if self.sketch is not None:
+                self.sketch.increment(key)
+
+            try:
+                value = self.entries[key]
+            except KeyError:
+                if (value := self.worthless.get(key, _missing)) is _missing:
+                    return value
+                if self.ttl is not None and self.worthless_expires[key] <= monotonic():
+                    self.discard_worthless(key)
+                    return _missing
+                self.hits += 1
+                return value
+
+            if self.ttl is not None and self.expires[key] <= monotonic():
+                self.discard(key)
+                return _missing
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if (value := self.lookup(key)) is not _missing:
+            return value
+
+        # The shared cache is queried without holding the lock
+        if self.shared is not None and (value := self.shared.get(key)) is not None:
+            self.add_shared({key: value})
+            return value
+
+        with self.lock:
+            self.misses += 1
+        return default
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        """
+        Cached values of the keys, looking up all keys missing
+        from this process in the shared cache at once.
+        """
+        found = {}
+        missing = []
+        with self.lock:
+            for key in keys:
+                if (value := self.lookup(key)) is _missing:
+                    missing.append(key)
+                else:
+                    found[key] = value
+
+        if missing:
+            shared = self.shared.get_many(missing) if self.shared is not None else {}
+            self.add_shared(shared, misses=len(missing) - len(shared))
+            found |= shared
+
+        return found
+
+    def add_shared(self, items: Mapping[str, Any], misses: int = 0) -> None:
+        """
+        Cache the values found in the shared cache, and count the lookups.
+        """
+        with self.lock:
+            for key, value in items.items():
+                self.store(key, value)
+            self.shared_hits += len(items)
+            self.misses += misses
+
+    def __getitem__(self, key: str) -> Any:
+        if (value := self.get(key, self)) is self:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.store(key, value)
+        if self.shared is not None:
+            self.shared.set(key, value)
+
+    def set(self, key: str, value: Any) -> None:
+        self[key] = value
+
+    def set_many(self, items: Mapping[str, Any]) -> None:
+        with self.lock:
+            for key, value in items.items():
+                self.store(key, value)
+        if self.shared is not None:
+            self.shared.set_many(items)
+
+    def store(self, key: str, value: Any) -> None:
+        """
+        Cache the value in this process only.
+        """
+        # Measured before taking the lock, as sizes of results may take a while
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+
+        with self.lock:
+            if replacing := key in self.entries:
+                self.discard(key)
+
+            if not replacing and not self.admit(key, size):
+                self.rejections += 1
+                return
+
+            self.entries[key] = value
+            if self.max_bytes is not None:
+                self.sizes[key] = size
+                self.total_bytes += size
+            if self.ttl is not None:
+                self.expires[key] = monotonic() + self.ttl
+
+            self.purge()
+
+    def admit(self, key: str, size: int) -> bool:
+        """
+        Whether to cache the key. With admission, a key is refused if the cache
+        is full and it wasn't seen more often than the least recently used entry.
+        """
+        if (sketch := self.sketch) is None or not self.entries:
+            return True
+        if len(self.entries) < self.max_entries and (
+            self.max_bytes is None or self.total_bytes + size <= self.max_bytes
+        ):
+            return True
+
+        victim = next(iter(self.entries))
+        return sketch.frequency(key) > sketch.frequency(victim)
+
+    def set_worthless(self, key: str, value: Any) -> None:
+        """
+        Cache the worthless user agent apart from the other entries,
+        so that it neither needs admission nor evicts any of them.
+        It expires after the same TTL as the other entries.
+        """
+        if not self.max_worthless:
+            return
+
+        with self.lock:
+            self.worthless[key] = value
+            self.worthless.move_to_end(key)
+            if self.ttl is not None:
+                self.worthless_expires[key] = monotonic() + self.ttl
+            if len(self.worthless) > self.max_worthless:
+                evicted, _ = self.worthless.popitem(last=False)
+                self.worthless_expires.pop(evicted, None)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.entries or key in self.worthless
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[str]:
+        with self.lock:
+            return iter(list(self.entries))
+
+    def hottest(self, count: int | None = None) -> list[tuple[str, Any]]:
+        """
+        The entries most likely to be requested again, hottest first. With
+        admission, entries are ranked by frequency, otherwise by recency.
+        """
+        with self.lock:
+            self.purge_expired()
+            entries = list(reversed(self.entries.items()))
+            if (sketch := self.sketch) is not None:
+                # Stable sort, so entries seen as often stay ranked by recency
+                entries.sort(key=lambda entry: sketch.frequency(entry[0]), reverse=True)
+            return entries[:count]
+
+    def worthless_entries(self) -> list[tuple[str, Any]]:
+        """
+        The cached worthless user agents, least recently used first.
+        """
+        with self.lock:
+            self.purge_expired()
+            return list(self.worthless.items())
+
+    def discard(self, key: str) -> None:
+        """
+        Remove the entry of the key, if cached.
+        """
+        with self.lock:
+            self.entries.pop(key, None)
+            self.worthless.pop(key, None)
+            self.total_bytes -= self.sizes.pop(key, 0)
+            self.expires.pop(key, None)
+            self.worthless_expires.pop(key, None)
+
+    def discard_worthless(self, key: str) -> None:
+        with self.lock:
+            self.worthless.pop(key, None)
+            self.worthless_expires.pop(key, None)
+
+    def purge(self) -> None:
+        """
+        Evict least recently used entries until within the limits.
+        """
+        with self.lock:
+            entries = self.entries
+            while len(entries) > self.max_entries or (
+                self.max_bytes is not None and self.total_bytes > self.max_bytes
+            ):
+                key, _ = entries.popitem(last=False)
+                self.total_bytes -= self.sizes.pop(key, 0)
+                self.expires.pop(key, None)
+                self.evictions += 1
+
+    def purge_expired(self) -> None:
+        """
+        Remove expired entries, which are otherwise only removed
+        when read or evicted.
+        """
+        with self.lock:
+            now = monotonic()
+            for key in [key for key, expires in self.expires.items() if expires <= now]:
+                self.discard(key)
+            expired = [key for key, expires in self.worthless_expires.items() if expires <= now]
+            for key in expired:
+                self.discard_worthless(key)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.worthless.clear()
+            self.sizes.clear()
+            self.expires.clear()
+            self.worthless_expires.clear()
+            self.total_bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'worthless': len(self.worthless),
+                'bytes': self.total_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'rejections': self.rejections,
+                'shared_hits': self.shared_hits,
+            }
+
+
+class ShardedUACache(CacheBackend):
+    """
+    User agent cache split into shards of their own lock and LRU order,
+    so that threads only contend when their keys fall in the same shard.
+
+    The limits apply to each shard in equal parts, and least recently used
+    entries are evicted per shard, which approximates a single LRU cache.
+    """
+
+    __slots__ = (
+        'max_entries',
+        'shards',
+        'shared',
+    )
+
+    def __init__(
+        self,
+        shards: int = DEFAULT_SHARDS,
+        max_entries: int = MAX_CACHE_SIZE,
+        max_bytes: int | None = None,
+        ttl: float | None = None,
+        sizeof: Callable[[Any], int] = approximate_size,
+        admission: bool = False,
+        max_worthless: int = MAX_WORTHLESS_SIZE,
+        shared: CacheBackend | None = None,
+    ) -> None:
+        """
+        Args:
+            shards: Number of independently locked shards
+            Others: See UACache, the limits being those of all shards together
+        """
+        if shards < 1:
+            raise ValueError(f'shards must be at least 1, not {shards}')
+        if max_entries < shards:
+            raise ValueError(f'max_entries must be at least the {shards} shards, not {max_entries}')
+
+        self.max_entries = max_entries
+        self.shared = shared
+        self.shards = tuple(
+            # The shards don't query the shared cache, so that get_many
+            # looks up the keys missing from all shards at once.
+            UACache(
+                max_entries=max_entries // shards,
+                max_bytes=max_bytes // shards if max_bytes is not None else None,
+                ttl=ttl,
+                sizeof=sizeof,
+                admission=admission,
+                max_worthless=-(-max_worthless // shards),
+            )
+            for _ in range(shards)
+        )
+
+    def configuration(self) -> dict[str, Any]:
+        first = self.shards[0]
+        max_bytes = first.max_bytes * len(self.shards) if first.max_bytes is not None else None
+        return first.configuration() | {
+            'shards': len(self.shards),
+            'max_entries': self.max_entries,
+            'max_bytes': max_bytes,
+            'max_worthless': first.max_worthless * len(self.shards),
+            'shared': self.shared,
+        }
+
+    def shard(self, key: str) -> UACache:
+        return self.shards[hash(key) % len(self.shards)]
+
+    def lookup(self, key: str) -> Any:
+        return self.shard(key).lookup(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        shard = self.shard(key)
+        if (value := shard.lookup(key)) is not _missing:
+            return value
+
+        if self.shared is not None and (value := self.shared.get(key)) is not None:
+            shard.add_shared({key: value})
+            return value
+
+        shard.add_shared({}, misses=1)
+        return default
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        found = {}
+        missing: dict[UACache, list[str]] = {}
+        for key in keys:
+            shard = self.shard(key)
+            if (value := shard.lookup(key)) is _missing:
+                missing.setdefault(shard, []).append(key)
+            else:
+                found[key] = value
+
+        if missing:
+            shared = {}
+            if self.shared is not None:
+                shared = self.shared.get_many([key for keys in missing.values() for key in keys])
+            for shard, shard_keys in missing.items():
+                items = {key: shared[key] for key in shard_keys if key in shared}
+                shard.add_shared(items, misses=len(shard_keys) - len(items))
+            found |= shared
+
+        return found
+
+    def __getitem__(self, key: str) -> Any:
+        if (value := self.get(key, self)) is self:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.store(key, value)
+        if self.shared is not None:
+            self.shared.set(key, value)
+
+    def set(self, key: str, value: Any) -> None:
+        self[key] = value
+
+    def set_many(self, items: Mapping[str, Any]) -> None:
+        for key, value in items.items():
+            self.store(key, value)
+        if self.shared is not None:
+            self.shared.set_many(items)
+
+    def store(self, key: str, value: Any) -> None:
+        self.shard(key).store(key, value)
+
+    def set_worthless(self, key: str, value: Any) -> None:
+        self.shard(key).set_worthless(key, value)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and key in self.shard(key)
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self.shards)
+
+    def __iter__(self) -> Iterator[str]:
+        return (key for shard in self.shards for key in shard)
+
+    def hottest(self, count: int | None = None) -> list[tuple[str, Any]]:
+        """
+        The entries most likely to be requested again, hottest first. With
+        admission, entries are ranked by frequency, otherwise by their
+        recency within their shard.
+        """
+        ranked = []
+        for shard in self.shards:
+            for position, (key, value) in enumerate(shard.hottest()):
+                if shard.sketch is not None:
+                    rank = -shard.sketch.frequency(key)
+                else:
+                    rank = position
+                ranked.append((rank, key, value))
+        ranked.sort(key=lambda entry: entry[0])
+        return [(key, value) for _, key, value in ranked[:count]]
+
+    def worthless_entries(self) -> list[tuple[str, Any]]:
+        return [entry for shard in self.shards for entry in shard.worthless_entries()]
+
+    def discard(self, key: str) -> None:
+        self.shard(key).discard(key)
+
+    def purge_expired(self) -> None:
+        for shard in self.shards:
+            shard.purge_expired()
+
+    def clear(self) -> None:
+        for shard in self.shards:
+            shard.clear()
+
+    def stats(self) -> dict[str, int]:
+        totals: dict[str, int] = {}
+        for shard in self.shards:
+            for name, value in shard.stats().items():
+                totals[name] = totals.get(name, 0) + value
+        return totals
+
+
+__all__ = (
+    'CacheBackend',
+    'ShardedUACache',
+    'UACache',
+)
@@ -0,0 +1,421 @@
+"""
+Parse the user agents of access logs from the command line.
+
+    python -m device_detector access.log.gz --fields client_name,os_name,device_type
+    tail -F access.log | python -m device_detector --output-format csv
+
+Reads combined log format lines (Apache, nginx), JSON lines, or raw user
+agents, from files or standard input, and writes the chosen fields of each
+parsed user agent as JSON lines or CSV. The default auto format is
+detected line by line, so logs may mix formats. Uncompressed files read
+with --format combined are memory mapped instead, see log_reader. Lines
+are streamed through the batched, cached parsing path, so memory stays
+constant regardless of the size of the logs. The throughput, the share of
+unique user agents and the cache hit rate are reported to stderr at the end.
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import math
+import os
+import re
+import sys
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import ExitStack
+from itertools import islice, tee
+from typing import IO, Any
+
+from .device_detector import BATCH_SIZE, DeviceDetector
+from .log_reader import MISSING, map_user_agents, unescape
+from .result import ParsedResult
+from .settings import DDCache
+
+LOG_FORMATS = ('auto', 'combined', 'json', 'ua')
+OUTPUT_FORMATS = ('jsonl', 'csv')
+
+# Accessors of ParsedResult that can be written
+FIELDS = (
+    'user_agent',
+    'is_bot',
+    'is_known',
+    'is_mobile',
+    'is_desktop',
+    'is_television',
+    'is_feature_phone',
+    'uses_mobile_browser',
+    'engine',
+    'client_name',
+    'client_version',
+    'client_type',
+    'client_application_id',
+    'secondary_client_name',
+    'secondary_client_version',
+    'secondary_client_type',
+    'preferred_client_name',
+    'preferred_client_version',
+    'preferred_client_type',
+    'device_type',
+    'device_brand',
+    'device_model',
+    'os_name',
+    'os_version',
+    'pretty_name',
+)
+DEFAULT_FIELDS = (
+    'user_agent',
+    'client_name',
+    'client_version',
+    'client_type',
+    'os_name',
+    'os_version',
+    'device_type',
+    'device_brand',
+    'device_model',
+    'is_bot',
+)
+
+# Keys of the user agent in JSON log lines
+UA_KEYS = ('user_agent', 'http_user_agent', 'user-agent', 'useragent', 'ua', 'agent')
+
+# Remote host, identity, user, [time], "request", status, bytes, "referer", "user agent",
+# followed by the quoted fields that the log format appends, such as client hints.
+QUOTED_FIELD = r'"([^"\\]*(?:\\.[^"\\]*)*)"'
+COMBINED_LOG = re.compile(
+    rf'^\S+ \S+ \S+ \[[^\]]*\] {QUOTED_FIELD} \S+ \S+ {QUOTED_FIELD} {QUOTED_FIELD}(.*)$'
+)
+QUOTED = re.compile(QUOTED_FIELD)
+
+Item = tuple[str, dict[str, str] | None]
+
+
+def open_log(path: str) -> IO[str]:
+    """
+    Open a log file, or standard input for '-', decompressing .gz files.
+    """
+    if path == '-':
+        return sys.stdin
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    return open(path, 'r', encoding='utf-8', errors='replace')
+
+
+def read_lines(paths: Iterable[str]) -> Iterator[str]:
+    for path in paths:
+        log = open_log(path)
+        try:
+            for line in log:
+                yield line.rstrip('\r\n')
+        finally:
+            if log is not sys.stdin:
+                log.close()
+
+
+def json_value(record: dict, path: str) -> Any:
+    """
+    Value of a dotted path of nested JSON objects, such as request.headers.user-agent.
+    """
+    value: Any = record
+    for key in path.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def parse_json(line: str, ua_field: str | None) -> Item | None:
+    """
+    User agent and headers of a JSON log line. All string values of the
+    top level and of a nested headers object are passed as headers, of
+    which only client hints are read.
+    """
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(record, dict):
+        return None
+
+    headers = {key: value for key, value in record.items() if isinstance(value, str)}
+    if isinstance(nested := record.get('headers'), dict):
+        headers |= {key: value for key, value in nested.items() if isinstance(value, str)}
+
+    if ua_field:
+        user_agent = json_value(record, ua_field)
+    else:
+        lower = {key.lower(): value for key, value in headers.items()}
+        user_agent = next((lower[key] for key in UA_KEYS if key in lower), None)
+
+    if not isinstance(user_agent, str):
+        return None
+    return user_agent, {key: value for key, value in headers.items() if value != MISSING}
+
+
+def parse_combined(line: str, extra_fields: list[str]) -> Item | None:
+    """
+    User agent of a combined log format line, and the quoted fields
+    following it, named by extra_fields.
+    """
+    if (match := COMBINED_LOG.match(line)) is None:
+        return None
+    user_agent = unescape(match[3])
+    headers = None
+    if extra_fields:
+        values = map(unescape, QUOTED.findall(match[4]))
+        headers = {
+            name: value for name, value in zip(extra_fields, values) if value and value != MISSING
+        }
+    return ('' if user_agent == MISSING else user_agent), headers
+
+
+def parse_line(
+    line: str,
+    log_format: str,
+    ua_field: str | None = None,
+    extra_fields: list[str] | None = None,
+) -> Item | None:
+    """
+    User agent and client hint headers of a log line, or None if it has none.
+    """
+    if log_format == 'ua':
+        return line, None
+    if log_format == 'json' or (log_format == 'auto' and line.startswith('{')):
+        return parse_json(line, ua_field)
+    if (item := parse_combined(line, extra_fields or [])) is not None or log_format == 'combined':
+        return item
+    # Raw user agents, in auto detection
+    return (line, None) if line else None
+
+
+def log_items(
+    paths: Iterable[str],
+    log_format: str,
+    ua_field: str | None = None,
+    extra_fields: list[str] | None = None,
+) -> Iterator[Item | None]:
+    """
+    User agent and client hint headers of each line of the logs, or None for
+    lines without.
+    """
+    for path in paths:
+        if log_format == 'combined' and path != '-' and not path.endswith('.gz'):
+            yield from map_user_agents(path, extra_fields or ())
+        else:
+            for line in read_lines((path,)):
+                yield parse_line(line, log_format, ua_field, extra_fields)
+
+
+class DistinctCounter:
+    """
+    HyperLogLog estimate of the number of distinct cache keys, which are
+    hex digests already, in constant memory. The error is about 1.6%.
+    """
+
+    BITS = 12
+
+    __slots__ = ('registers',)
+
+    def __init__(self) -> None:
+        self.registers = bytearray(1 << self.BITS)
+
+    def add(self, key: str) -> None:
+        value = int(key[:16], 16)
+        rest_bits = 64 - self.BITS
+        index = value >> rest_bits
+        rank = rest_bits - (value & ((1 << rest_bits) - 1)).bit_length() + 1
+        self.registers[index] = max(self.registers[index], rank)
+
+    def count(self) -> int:
+        m = len(self.registers)
+        estimate = 0.7213 / (1 + 1.079 / m) * m * m / sum(2.0**-rank for rank in self.registers)
+        if estimate <= 2.5 * m and (zeros := self.registers.count(0)):
+            # Linear counting is more accurate for small counts
+            estimate = m * math.log(m / zeros)
+        return round(estimate)
+
+
+class Stats:
+    """
+    Counts of a run, reported at the end.
+    """
+
+    __slots__ = ('cache_start', 'distinct', 'lines', 'skipped', 'start')
+
+    def __init__(self) -> None:
+        self.lines = 0
+        self.skipped = 0
+        self.distinct = DistinctCounter()
+        self.start = time.perf_counter()
+        self.cache_start = DDCache['user_agents'].stats()
+
+    def report(self) -> str:
+        elapsed = time.perf_counter() - self.start
+        parsed = self.lines - self.skipped
+        cache = DDCache['user_agents'].stats()
+        hits, shared_hits, misses = (
+            cache[key] - self.cache_start[key] for key in ('hits', 'shared_hits', 'misses')
+        )
+        lookups = hits + shared_hits + misses
+        unique = self.distinct.count() if parsed else 0
+        lines_per_second = self.lines / max(elapsed, 1e-9)
+        return '\n'.join((
+            f'{self.lines:,} lines in {elapsed:.1f}s, {lines_per_second:,.0f} lines/s',
+            f'{parsed:,} user agents, {self.skipped:,} lines without a user agent',
+            f'~{unique:,} unique user agents ({unique / max(parsed, 1):.1%})',
+            f'{(hits + shared_hits) / max(lookups, 1):.1%} cache hit rate of {lookups:,} lookups',
+        ))
+
+
+def field_value(result: ParsedResult, field: str) -> Any:
+    value = getattr(result, field)()
+    # DeviceType and AppType enums
+    return getattr(value, 'value', value)
+
+
+def write_results(
+    rows: Iterator[tuple[Item, ParsedResult]],
+    output: IO[str],
+    output_format: str,
+    fields: list[str],
+    stats: Stats,
+) -> None:
+    accessors = [field for field in fields if field != 'user_agent']
+    writer = None
+    if output_format == 'csv':
+        writer = csv.writer(output)
+        writer.writerow(fields)
+
+    for (user_agent, _), result in rows:
+        stats.distinct.add(result.ua_hash)
+        values = {field: field_value(result, field) for field in accessors}
+        if 'user_agent' in fields:
+            values['user_agent'] = user_agent
+        if writer is not None:
+            writer.writerow([values[field] for field in fields])
+        else:
+            record = {field: values[field] for field in fields}
+            output.write(json.dumps(record, ensure_ascii=False))
+            output.write('\n')
+
+
+def parse_items(items: Iterator[Item], processes: int, batch_size: int) -> Iterator[ParsedResult]:
+    if processes > 1:
+        from .parallel import ParallelParser
+
+        with ParallelParser(processes=processes, chunk_size=batch_size) as parser:
+            yield from parser.iparse_many(items)
+    else:
+        while batch := list(islice(items, batch_size)):
+            yield from DeviceDetector.parse_batch(batch)
+
+
+def argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='python -m device_detector',
+        description='Parse the user agents of access logs.',
+    )
+    parser.add_argument(
+        'paths',
+        nargs='*',
+        default=['-'],
+        metavar='LOG',
+        help='Log files, optionally gzipped, or - for stdin (default)',
+    )
+    parser.add_argument(
+        '-f',
+        '--format',
+        choices=LOG_FORMATS,
+        default='auto',
+        help=(
+            'Log format: combined (Apache, nginx), JSON lines, or a user agent per line. '
+            'auto, the default, detects the format of each line. Uncompressed files are '
+            'memory mapped, which is faster, only with an explicit -f combined'
+        ),
+    )
+    parser.add_argument(
+        '--ua-field',
+        help='Dotted path of the user agent in JSON lines, such as request.headers.user-agent',
+    )
+    parser.add_argument(
+        '--extra-fields',
+        default='',
+        help='Comma separated header names of the quoted fields after the user agent '
+        'in combined log lines, such as sec-ch-ua,sec-ch-ua-platform',
+    )
+    parser.add_argument(
+        '-o',
+        '--output',
+        default='-',
+        help='Output file, or - for stdout (default)',
+    )
+    parser.add_argument('--output-format', choices=OUTPUT_FORMATS, default='jsonl')
+    parser.add_argument(
+        '--fields',
+        default=','.join(DEFAULT_FIELDS),
+        help=f'Comma separated fields to write, of: {", ".join(FIELDS)}',
+    )
+    parser.add_argument('--cache-size', type=int, help='Entries of the user agent cache')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument(
+        '-j',
+        '--processes',
+        type=int,
+        default=1,
+        help='Parse in worker processes, such as one per CPU',
+    )
+    parser.add_argument('-q', '--quiet', action='store_true', help="Don't report stats")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argument_parser()
+    args = parser.parse_args(argv)
+
+    fields = [field.strip() for field in args.fields.split(',') if field.strip()]
+    if unknown := set(fields) - set(FIELDS):
+        parser.error(f'unknown fields: {", ".join(sorted(unknown))}')
+    if args.batch_size < 1 or args.processes < 1:
+        parser.error('--batch-size and --processes must be at least 1')
+    extra_fields = [name.strip() for name in args.extra_fields.split(',') if name.strip()]
+
+    if args.cache_size:
+        DDCache.configure_user_agents(max_entries=args.cache_size)
+
+    stats = Stats()
+
+    def items() -> Iterator[Item]:
+        for item in log_items(args.paths, args.format, args.ua_field, extra_fields):
+            stats.lines += 1
+            if item is None:
+                stats.skipped += 1
+            else:
+                yield item
+
+    # The items are buffered only as far as the results lag behind
+    inputs, outputs = tee(items())
+    results = parse_items(inputs, args.processes, args.batch_size)
+
+    with ExitStack() as stack:
+        output = sys.stdout
+        if args.output != '-':
+            output = stack.enter_context(open(args.output, 'w', encoding='utf-8', newline=''))
+        try:
+            write_results(zip(outputs, results), output, args.output_format, fields, stats)
+            output.flush()
+        except BrokenPipeError:
+            # Such as piped to head. Point stdout at devnull, as Python flushes it on exit.
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        except KeyboardInterrupt:
+            pass
+
+    if not args.quiet:
+        print(stats.report(), file=sys.stderr)
+    return 0
+
+
+__all__ = (
+    'main',
+    'parse_line',
+)
@@ -0,0 +1,138 @@
+"""
+Combined alternations of the rules of a regex_list.
+
+Rather than searching the user agent with each rule regex in turn, chunks of
+rules are joined into a single alternation, with a named group per rule:
+
+    (?P<r0>rule 0 regex)|(?P<r1>rule 1 regex)|...
+
+One search of the alternation finds the leftmost position at which any rule
+of the chunk matches, and the first rule to match at that position. A rule
+listed earlier may still match further right in the user agent, so the
+search is repeated from the next position until no rule matches, keeping
+the earliest listed rule. That rule is then searched on its own, so that
+the match has the same captures as when checking rules one at a time.
+"""
+
+import regex
+
+from .lazy_regex import RegexLazy
+
+# Number of rules joined into each alternation
+CHUNK_SIZE = 250
+
+# Rules that can't be joined into an alternation with other rules, because
+# their group references would change meaning, their group names could clash,
+# or their global inline flags would apply to all rules of the alternation.
+UNCOMBINABLE_REGEX = regex.compile(
+    r"""
+    (?<!\\)(?:\\\\)*\\(?:[1-9]|g<)  # numbered backreferences and \g<> references
+    | \(\?P=                        # named backreferences
+    | \(\?P?<(?![=!])               # named groups, but not lookbehinds
+    | \(\?[a-zA-Z]+\)               # global inline flags
+    """,
+    regex.VERBOSE,
+)
+
+
+class CombinedRegexList:
+    """
+    Find the first rule of a regex_list that matches a user agent.
+    """
+
+    __slots__ = (
+        'chunks',
+        'rules',
+    )
+
+    def __init__(self, rules: list[dict], chunk_size: int = CHUNK_SIZE) -> None:
+        self.rules = rules
+        # Each chunk is either a single rule position that's searched on its
+        # own, or an alternation with a map of group names to rule positions.
+        self.chunks: list[int | tuple[regex.Pattern, dict[str, int], int]] = []
+
+        group_positions: dict[str, int] = {}
+        for position, rule in enumerate(rules):
+            rule_regex: RegexLazy = rule['regex']
+            if UNCOMBINABLE_REGEX.search(rule_regex.pattern):
+                self.add_chunk(group_positions)
+                group_positions = {}
+                self.chunks.append(position)
+                continue
+
+            group_positions[f'r{position}'] = position
+            if len(group_positions) >= chunk_size:
+                self.add_chunk(group_positions)
+                group_positions = {}
+
+        self.add_chunk(group_positions)
+
+    def add_chunk(self, group_positions: dict[str, int]) -> None:
+        """
+        Join the rules at the positions into an alternation.
+        """
+        if not group_positions:
+            return
+
+        rules = self.rules
+        alternation = '|'.join(
+            f'(?P<{group}>{rules[position]["regex"].pattern})'
+            for group, position in group_positions.items()
+        )
+
+        try:
+            combined = regex.compile(alternation, regex.IGNORECASE)
+        except (regex.error, OverflowError, RecursionError):
+            # Too large for the regex engine, so check each rule separately
+            self.chunks.extend(group_positions.values())
+            return
+
+        self.chunks.append((combined, group_positions, min(group_positions.values())))
+
+    def first_match(self, user_agent: str) -> tuple[dict, regex.Match] | None:
+        """
+        Return the earliest listed rule that matches the user
+        agent, and the match of the rule regex, if any.
+        """
+        return self.first_match_searches(user_agent)[0]
+
+    def first_match_searches(
+        self,
+        user_agent: str,
+    ) -> tuple[tuple[dict, regex.Match] | None, int]:
+        """
+        The first_match of the user agent, and the number of
+        regex searches it took, for the parser stats.
+        """
+        rules = self.rules
+        searches = 0
+
+        for chunk in self.chunks:
+            searches += 1
+            if isinstance(chunk, int):
+                rule = rules[chunk]
+                if matched := rule['regex'].search(user_agent):
+                    return (rule, matched), searches
+                continue
+
+            combined, group_positions, chunk_start = chunk
+            first_position = -1
+            search_from = 0
+
+            while matched := combined.search(user_agent, search_from):
+                position = group_positions[matched.lastgroup]
+                if first_position == -1 or position < first_position:
+                    first_position = position
+                if first_position == chunk_start:
+                    break
+                search_from = matched.start() + 1
+                searches += 1
+
+            if first_position != -1:
+                rule = rules[first_position]
+                return (rule, rule['regex'].search(user_agent)), searches + 1
+
+        return None, searches
+
+
+__all__ = ('CombinedRegexList',)
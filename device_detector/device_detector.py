@@ -1,4 +1,6 @@
-from typing import TYPE_CHECKING
+from collections.abc import Iterable, Iterator, Sequence
+from itertools import islice
+from typing import TYPE_CHECKING, Any
 
 try:
     from typing import Self
@@ -12,6 +14,7 @@ from .parser import (
     BaseDeviceParser,
     ClientHints,
     OS,
+    Parser as BaseParser,
     # Device extractors
     Bot,
     Camera,
@@ -42,9 +45,13 @@ from .parser import (
     NameVersionExtractor,
     WholeNameExtractor,
 )
+from .parser.client_hints import client_hint_headers
 from .parser.settings import APPLE_OS_NAMES, TV_CLIENTS
+from .result import ParsedResult
+from .scanner import ParserScanner, UAScan
 from .settings import BOUNDED_REGEX, DDCache, WORTHLESS_UA_TYPES
 from .utils import (
+    canonical_ua,
     clean_ua,
     long_ua_no_punctuation,
     mostly_numerals,
@@ -56,6 +63,23 @@ from .utils import (
 )
 from .yaml_loader import normalized_regex_list
 
+# Number of user agents deduplicated and looked up in the cache at once by parse_many
+BATCH_SIZE = 1000
+
+# Parser classes by class name, per detector class, to restore cached user agents
+PARSER_CLASSES: dict[type, dict[str, type[BaseParser]]] = {}
+
+# Attributes of detectors restored from a cached record, only restored on first access
+RESTORED_ATTRIBUTES = frozenset((
+    'all_details',
+    'client_hints',
+    '_normalized_regex_list',
+    'os',
+    'client',
+    'device',
+    'bot',
+))
+
 DESKTOP_FRAGMENT = RegexLazy(BOUNDED_REGEX.format(r'(?:Windows (?:NT|IoT)|X11; Linux x86_64)'))
 
 
@@ -114,6 +138,8 @@ class DeviceDetector:
         'headers',
         'client_hints',
         '_normalized_regex_list',
+        '_scan',
+        '_result',
     )
 
     def __new__(
@@ -123,10 +149,9 @@ class DeviceDetector:
         skip_device_detection: bool = False,
         headers: dict[str, str] | None = None,
     ) -> 'DeviceDetector':
-        uah = ua_hash(user_agent.lower(), headers)
+        uah = ua_hash(canonical_ua(user_agent), client_hint_headers(headers))
         if cached := DDCache['user_agents'].get(uah, None):
-            cached.parsed = True
-            return cached
+            return cls.from_result(cached)
 
         res = super().__new__(cls)
         res.ua_hash = uah
@@ -151,9 +176,12 @@ class DeviceDetector:
         if getattr(self, 'parsed', False):
             return
 
-        # Holds the useragent that should be parsed
-        self.user_agent_lower = user_agent.lower()
-        self.user_agent = clean_ua(user_agent, self.user_agent_lower)
+        # Holds the useragent that should be parsed. Parsing only depends
+        # on the cleaned user agent, which is the key of cached results.
+        self.user_agent = clean_ua(user_agent, user_agent.lower())
+        self.user_agent_lower = self.user_agent.lower()
+        # Only client hints affect the results, and are part of the cache key
+        headers = client_hint_headers(headers)
         self.ua_hash = ua_hash(self.user_agent_lower, headers)
         self.os: OS | None = None
         self.client: BaseClientParser | None = None
@@ -174,11 +202,99 @@ class DeviceDetector:
         self.headers = headers or {}
         self.client_hints = ClientHints.new(headers) if headers else None
         self._normalized_regex_list = normalized_regex_list(self.fixture_files)
+        self._scan: UAScan | None = None
+        self._result: ParsedResult | None = None
+
+    @classmethod
+    def from_result(cls, result: ParsedResult) -> Self:
+        """
+        Parsed detector restored from the cached record of its user agent.
+
+        The details, client hints and skip flags are those of the record. The
+        os, client, device and bot parsers hold the details they parsed, but
+        not the regex matches of parsing. They are only restored on first
+        access, as most callers of cached user agents only read the record.
+        """
+        detector = object.__new__(cls)
+        detector.user_agent = result.user_agent
+        detector.user_agent_lower = result.user_agent.lower()
+        detector.ua_hash = result.ua_hash
+        detector.skip_bot_detection = result.skip_bot_detection
+        detector.skip_device_detection = result.skip_device_detection
+        detector.headers = dict(result.headers)
+        detector.model = ''
+        detector._scan = None
+        detector._result = result
+        detector.parsed = True
+        return detector
+
+    if not TYPE_CHECKING:
+
+        def __getattr__(self, name: str) -> Any:
+            # Only called for the attributes that aren't set
+            if name not in RESTORED_ATTRIBUTES or (result := self._result) is None:
+                raise AttributeError(
+                    f'{self.__class__.__name__!r} object has no attribute {name!r}'
+                )
+            self.restore(result, name)
+            return getattr(self, name)
+
+    def restore(self, result: ParsedResult, name: str) -> None:
+        """
+        Restore an attribute of a detector restored from a cached record.
+        """
+        if name == 'all_details':
+            self.all_details = result.all_details
+        elif name == 'client_hints':
+            self.client_hints = ClientHints.new(self.headers) if self.headers else None
+        elif name == '_normalized_regex_list':
+            self._normalized_regex_list = normalized_regex_list(self.fixture_files)
+        else:
+            parser_classes = self.parser_classes()
+            details = self.all_details
+            os_details = details.get('os', {})
+            for parser_name, section in zip(result.parsers, ('os', 'client', 'device', 'bot')):
+                parser = None
+                if parser_name:
+                    Parser = parser_classes[parser_name]
+                    parser = Parser(result.user_agent, self.client_hints, os_details)
+                    parser.ua_data = details.setdefault(section, {})
+                    parser.known = bool(parser.ua_data)
+                    parser.secondary_client = parser.ua_data.get('secondary_client', {})
+                setattr(self, section, parser)
+
+    @classmethod
+    def parser_classes(cls) -> dict[str, type[BaseParser]]:
+        """
+        Parser classes of the detector by class name.
+        """
+        if (classes := PARSER_CLASSES.get(cls)) is None:
+            classes = PARSER_CLASSES[cls] = {
+                parser.__name__: parser
+                for parser in (*cls.CLIENT_PARSERS, *cls.DEVICE_PARSERS, Bot, OS)
+            }
+        return classes
 
     @property
     def class_name(self) -> str:
         return self.__class__.__name__
 
+    @classmethod
+    def parser_scanner(cls) -> ParserScanner:
+        """
+        Scanner of the AhoCorasick words and rule literals of all parsers.
+        """
+        return ParserScanner.load((*cls.CLIENT_PARSERS, *cls.DEVICE_PARSERS, Bot, OS))
+
+    def scan(self) -> UAScan:
+        """
+        Scan the user agent once for all parsers, rather than each parser
+        scanning it with its own AhoCorasick automaton.
+        """
+        if self._scan is None:
+            self._scan = self.parser_scanner().scan(self.user_agent)
+        return self._scan
+
     # -----------------------------------------------------------------------------
     # UA parsing methods
     # -----------------------------------------------------------------------------
@@ -270,8 +386,9 @@ class DeviceDetector:
         return self.all_details['normalized'] in WORTHLESS_UA_TYPES
 
     def parse(self) -> Self:
-        if cached := DDCache['user_agents'].get(self.ua_hash):
-            return cached
+        # Parsing is only done once per instance
+        if getattr(self, 'parsed', False):
+            return self
 
         if not self.user_agent and not self.headers:
             return self
@@ -280,6 +397,7 @@ class DeviceDetector:
             self.parse_bot()
 
         if self.is_worthless():
+            DDCache['user_agents'].set_worthless(self.ua_hash, ParsedResult.from_detector(self))
             return self
 
         self.parse_os()
@@ -300,9 +418,116 @@ class DeviceDetector:
                     self.all_details['device'] = device_data
 
         self.parsed = True
-        DDCache['user_agents'][self.ua_hash] = self
+        # Scan results are only needed while parsing
+        self._scan = None
+        DDCache['user_agents'][self.ua_hash] = ParsedResult.from_detector(self)
         return self
 
+    @classmethod
+    def iparse_many(
+        cls,
+        user_agents: Iterable[str | tuple[str, dict[str, str] | None]],
+        skip_bot_detection: bool = False,
+        skip_device_detection: bool = False,
+        batch_size: int = BATCH_SIZE,
+    ) -> Iterator[ParsedResult]:
+        """
+        Parse user agents, or (user agent, headers) pairs, yielding the
+        ParsedResult of each in input order.
+
+        The input is read in batches. Repeated user agents of a batch are only
+        cleaned and hashed once, all keys of a batch are looked up in the cache
+        at once, and each user agent missing from the cache is parsed once.
+        """
+        items = iter(user_agents)
+        while batch := list(islice(items, batch_size)):
+            yield from cls.parse_batch(batch, skip_bot_detection, skip_device_detection)
+
+    @classmethod
+    def parse_many(
+        cls,
+        user_agents: Iterable[str | tuple[str, dict[str, str] | None]],
+        skip_bot_detection: bool = False,
+        skip_device_detection: bool = False,
+        batch_size: int = BATCH_SIZE,
+    ) -> list[ParsedResult]:
+        """
+        List of the ParsedResult of each user agent, in input order.
+        See iparse_many.
+        """
+        return list(
+            cls.iparse_many(user_agents, skip_bot_detection, skip_device_detection, batch_size)
+        )
+
+    @staticmethod
+    def batch_keys(
+        batch: Sequence[str | tuple[str, dict[str, str] | None]],
+    ) -> tuple[list[str], dict[str, tuple[str, dict[str, str] | None]]]:
+        """
+        Cache key of each item of the batch, and the user agent and client
+        hint headers of each distinct key.
+        """
+        keys: list[str] = []
+        # Keys of the user agents without headers, as client hint values
+        # may be lists, which can't be keys themselves
+        user_agent_keys: dict[str, str] = {}
+        inputs: dict[str, tuple[str, dict[str, str] | None]] = {}
+        for item in batch:
+            user_agent, headers = (item, None) if isinstance(item, str) else item
+            if headers:
+                headers = client_hint_headers(headers)
+                key = ua_hash(canonical_ua(user_agent), headers)
+                inputs.setdefault(key, (user_agent, headers))
+            elif user_agent in user_agent_keys:
+                key = user_agent_keys[user_agent]
+            else:
+                user_agent_keys[user_agent] = key = ua_hash(canonical_ua(user_agent))
+                inputs.setdefault(key, (user_agent, {}))
+            keys.append(key)
+
+        return keys, inputs
+
+    @classmethod
+    def parse_inputs(
+        cls,
+        inputs: dict[str, tuple[str, dict[str, str] | None]],
+        skip_bot_detection: bool = False,
+        skip_device_detection: bool = False,
+    ) -> dict[str, ParsedResult]:
+        """
+        ParsedResult of each cache key of the inputs, as returned by batch_keys,
+        parsing the user agents missing from the cache.
+        """
+        results = DDCache['user_agents'].get_many(inputs)
+        for key, (user_agent, headers) in inputs.items():
+            if key in results:
+                continue
+            # Created without __new__, as the cache was already looked up
+            detector = object.__new__(cls)
+            detector.__init__(  # type: ignore[misc]
+                user_agent,
+                skip_bot_detection=skip_bot_detection,
+                skip_device_detection=skip_device_detection,
+                headers=headers,
+            )
+            results[key] = ParsedResult.from_detector(detector.parse())
+
+        return results
+
+    @classmethod
+    def parse_batch(
+        cls,
+        batch: Sequence[str | tuple[str, dict[str, str] | None]],
+        skip_bot_detection: bool = False,
+        skip_device_detection: bool = False,
+    ) -> list[ParsedResult]:
+        """
+        ParsedResult of each item of the batch, in order.
+        """
+        keys, inputs = cls.batch_keys(batch)
+        results = cls.parse_inputs(inputs, skip_bot_detection, skip_device_detection)
+        return [results[key] for key in keys]
+
     def supplement_secondary_client_data(self, app_idx: ApplicationIDExtractor) -> None:
         """
         Add data to secondary_client details
@@ -328,6 +553,7 @@ class DeviceDetector:
                 self.user_agent,
                 self.client_hints,
                 os_details=os_details,
+                scan=self.scan(),
             ).parse()
 
             if parser.ua_data:
@@ -371,6 +597,7 @@ class DeviceDetector:
                 self.user_agent,
                 self.client_hints,
                 os_details=os_details,
+                scan=self.scan(),
             ).parse()
             if parser.ua_data:
                 self.device = parser
@@ -385,7 +612,7 @@ class DeviceDetector:
         Parses the UA for bot information using the Bot parser
         """
         if not self.skip_bot_detection and not self.bot:
-            self.bot = Bot(self.user_agent, self.client_hints).parse()
+            self.bot = Bot(self.user_agent, self.client_hints, scan=self.scan()).parse()
             self.all_details['bot'] = self.bot.ua_data
 
     def parse_os(self) -> None:
@@ -393,7 +620,7 @@ class DeviceDetector:
         Parses the UA for Operating System information using the OS parser
         """
         if not self.os:
-            os = OS(self.user_agent, self.client_hints).parse()
+            os = OS(self.user_agent, self.client_hints, scan=self.scan()).parse()
             if os:
                 self.os = os
                 self.all_details['os'] = os.ua_data
@@ -1,24 +1,38 @@
+from typing import Any
 from urllib.parse import unquote
 import regex
 from regex import IGNORECASE
 
+from .regex_backends import compile_pattern
 
-# When one of these attributes is called, compile the regex
-REGEX_ATTRS = {
-    'match',
+
+# Once the regex is compiled, these methods of the compiled regex
+# are set on the RegexLazy instance itself. Later calls find them
+# in the instance dict, and call the compiled regex directly.
+REGEX_ATTRS = (
+    'findall',
     'fullmatch',
+    'match',
     'search',
     'sub',
-    'subf',
-    'subfn',
-    'split',
-    'splititer',
-    'findall',
-    'finditer',
-    'purge',
-    'escape',
-    'compiled',
-}
+)
+
+
+class LazyRegexAttribute:
+    """
+    Descriptor that compiles the regex when the attribute is first accessed.
+
+    This is a non-data descriptor, so once the bound method of the compiled
+    regex is set in the instance dict, the descriptor is no longer called.
+    """
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def __get__(self, instance: 'RegexLazy | None', owner: type | None = None) -> Any:
+        if instance is None:
+            return self
+        return getattr(instance.compiled, self.name)
 
 
 class RegexLazy:
@@ -26,27 +40,45 @@ class RegexLazy:
     Defer compilation of regex until it's actually called.
     Some regexes, especially on device models will almost
     never be called, so save the compilation time.
+
+    Compiling sets the methods of the compiled regex on the
+    instance, so there's no overhead on subsequent calls.
     """
 
+    findall = LazyRegexAttribute()
+    finditer = LazyRegexAttribute()
+    fullmatch = LazyRegexAttribute()
+    groupindex = LazyRegexAttribute()
+    groups = LazyRegexAttribute()
+    match = LazyRegexAttribute()
+    scanner = LazyRegexAttribute()
+    search = LazyRegexAttribute()
+    split = LazyRegexAttribute()
+    splititer = LazyRegexAttribute()
+    sub = LazyRegexAttribute()
+    subf = LazyRegexAttribute()
+    subfn = LazyRegexAttribute()
+    subn = LazyRegexAttribute()
+
     def __init__(self, pattern: str, flags: int = 0) -> None:
         # Decode UA regexes because UA strings are also decoded
         # Pic%20Collage/(\d+[\.\d]+) CFNetwork
         self.pattern = unquote(pattern)
         self.flags = flags
-        self.compiled = None
-
-    def __getattribute__(self, attribute: str) -> regex.Regex:
-        compiled_regex = super().__getattribute__('compiled')
-        if compiled_regex is None and attribute in REGEX_ATTRS:
-            pattern = super().__getattribute__('pattern')
-            flags = super().__getattribute__('flags')
-            compiled_regex = regex.compile(pattern, flags)
-            self.compiled = compiled_regex
+        self._compiled: regex.Pattern | None = None
 
-        if attribute == 'compiled':
-            return compiled_regex
+    @property
+    def compiled(self) -> regex.Pattern:
+        if self._compiled is None:
+            return self.compile()
+        return self._compiled
 
-        return getattr(compiled_regex, attribute)
+    def compile(self) -> regex.Pattern:
+        compiled_regex = compile_pattern(self.pattern, self.flags)
+        self._compiled = compiled_regex
+        for attribute in REGEX_ATTRS:
+            setattr(self, attribute, getattr(compiled_regex, attribute))
+        return compiled_regex
 
     def __repr__(self) -> str:
         return repr(self.compiled)
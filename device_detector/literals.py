@@ -0,0 +1,245 @@
+r"""
+Literal prefilters for regex rules.
+
+A rule regex can only match a user agent that contains at least one of the
+rule's "required literals". For example, any match of `Chrome/(\d+[.\d]+)`
+must contain `chrome/`. Indexing rules by those literals lets the parsers
+check only the rules that can possibly match, rather than every rule.
+"""
+
+from collections import defaultdict
+from collections.abc import Iterable
+from typing import Any
+
+import ahocorasick_rs
+
+try:
+    from re import _constants as sre_constants  # type: ignore[attr-defined]
+    from re import _parser as sre_parse  # type: ignore[attr-defined]
+except ImportError:
+    import sre_constants
+    import sre_parse
+
+# Literals shorter than this match too many user agents to be useful
+MIN_LITERAL_LENGTH = 2
+
+# Patterns using syntax the regex module interprets differently than the re
+# module parser. Such patterns are never indexed. POSIX classes like
+# [[:alpha:]] are parsed by the re module as a set followed by a literal ']'.
+UNSUPPORTED_SYNTAX = ('[[:',)
+
+# Brands with fewer models search every model regex, as scanning the user
+# agent for the literals of the models costs more than the regex searches.
+MIN_INDEXED_MODELS = 16
+
+LITERAL = sre_constants.LITERAL
+IN = sre_constants.IN
+BRANCH = sre_constants.BRANCH
+SUBPATTERN = sre_constants.SUBPATTERN
+ATOMIC_GROUP = getattr(sre_constants, 'ATOMIC_GROUP', None)
+REPEATS = {
+    sre_constants.MAX_REPEAT,
+    sre_constants.MIN_REPEAT,
+    getattr(sre_constants, 'POSSESSIVE_REPEAT', None),
+}
+
+
+def literal_character(op: Any, av: Any) -> str:
+    """
+    Return the lowercase character matched by a parsed regex item if it only
+    matches a single ASCII character, ignoring case. `[Ss]` matches "s".
+    """
+    if op is LITERAL:
+        codes = [av]
+    elif op is IN and all(item_op is LITERAL for item_op, _ in av):
+        codes = [code for _, code in av]
+    else:
+        return ''
+
+    characters = {chr(code).lower() for code in codes}
+    if len(characters) != 1:
+        return ''
+
+    character = characters.pop()
+    return character if character.isascii() else ''
+
+
+def best_factor(factors: list[set[str]]) -> set[str] | None:
+    """
+    Choose the most selective set of literals. Longer literals
+    are more selective, as are fewer alternatives.
+    """
+    factors = [f for f in factors if min(map(len, f)) >= MIN_LITERAL_LENGTH]
+    if not factors:
+        return None
+    return max(factors, key=lambda f: (min(map(len, f)), -len(f)))
+
+
+def sequence_literals(items: Any) -> set[str] | None:
+    """
+    Required literals of a sequence of parsed regex items.
+
+    Every item of a sequence must match, so the literals
+    required by any one item are required by the sequence.
+    """
+    factors = []
+    run: list[str] = []
+
+    def end_run() -> None:
+        if run:
+            factors.append({''.join(run)})
+            run.clear()
+
+    for op, av in items:
+        if character := literal_character(op, av):
+            run.append(character)
+            continue
+
+        end_run()
+
+        if op is SUBPATTERN:
+            literals = sequence_literals(av[-1])
+        elif op is ATOMIC_GROUP:
+            literals = sequence_literals(av)
+        elif op in REPEATS and av[0] >= 1:
+            literals = sequence_literals(av[2])
+        elif op is BRANCH:
+            literals = branch_literals(av[1])
+        else:
+            literals = None
+
+        if literals:
+            factors.append(literals)
+
+    end_run()
+
+    return best_factor(factors)
+
+
+def branch_literals(branches: Any) -> set[str] | None:
+    """
+    Required literals of an alternation.
+
+    Any one branch may match, so every branch must have required
+    literals, and a match contains a literal of one of the branches.
+    """
+    literals: set[str] = set()
+    for branch in branches:
+        if not (branch_required := sequence_literals(branch)):
+            return None
+        literals |= branch_required
+    return literals
+
+
+def required_literals(pattern: str) -> set[str] | None:
+    r"""
+    Return lowercase literals, such that the lowercased text of any
+    case-insensitive match of the pattern contains at least one of them.
+
+    Return None if no such literals can be determined.
+
+    >>> sorted(required_literals(r'(?:Chrome|Firefox)/(\d+[\.\d]+)'))
+    ['chrome', 'firefox']
+    """
+    if any(syntax in pattern for syntax in UNSUPPORTED_SYNTAX):
+        return None
+
+    try:
+        parsed = sre_parse.parse(pattern)
+    except (sre_constants.error, OverflowError, RecursionError):
+        return None
+
+    return sequence_literals(parsed)
+
+
+class LiteralIndex:
+    """
+    Map the required literals of a list of regexes to the
+    positions of the regexes in the list.
+
+    A single AhoCorasick scan of the user agent finds all literals
+    it contains, so the regexes that can possibly match are known
+    without evaluating them.
+    """
+
+    __slots__ = (
+        'automaton',
+        'literal_positions',
+        'literals',
+        'unindexed',
+    )
+
+    def __init__(self, patterns: list[str]) -> None:
+        positions: dict[str, list[int]] = defaultdict(list)
+        self.unindexed: list[int] = []
+
+        for position, pattern in enumerate(patterns):
+            if literals := required_literals(pattern):
+                for literal in literals:
+                    positions[literal].append(position)
+            else:
+                self.unindexed.append(position)
+
+        self.literals: list[str] = list(positions)
+        self.literal_positions: list[list[int]] = list(positions.values())
+        self.automaton = ahocorasick_rs.AhoCorasick(self.literals) if positions else None
+
+    def candidates(self, text_lower: str) -> list[int]:
+        """
+        Positions of all regexes that could match the text, in ascending order.
+
+        The text must be lowercase ASCII.
+        """
+        if not self.automaton:
+            return self.unindexed
+
+        matched = self.automaton.find_matches_as_indexes(text_lower, overlapping=True)
+        if not matched:
+            return self.unindexed
+
+        literal_positions = self.literal_positions
+        positions = set(self.unindexed)
+        for literal, _, _ in matched:
+            positions.update(literal_positions[literal])
+
+        return sorted(positions)
+
+
+class ModelList(list):  # noqa: FURB189
+    """
+    Model rules of a brand, in fixture order.
+
+    Brands with many models also index the model regexes by their required
+    literals, so that only the models that could match a user agent are
+    searched. The index is built the first time the models are searched.
+    """
+
+    __slots__ = ('literal_index',)
+
+    def __init__(self, models: Iterable[dict] = ()) -> None:
+        super().__init__(models)
+        self.literal_index: LiteralIndex | None = None
+
+    def load_index(self) -> LiteralIndex | None:
+        """
+        Index of the model regexes, or None if the brand has too few models.
+        """
+        if (index := self.literal_index) is None and len(self) >= MIN_INDEXED_MODELS:
+            index = self.literal_index = LiteralIndex([model['regex'].pattern for model in self])
+        return index
+
+    def candidates(self, user_agent_lower: str) -> list[dict]:
+        """
+        Models that could match the lowercased user agent, in fixture order.
+        """
+        if not user_agent_lower.isascii() or (index := self.load_index()) is None:
+            return self
+
+        return [self[position] for position in index.candidates(user_agent_lower)]
+
+
+__all__ = (
+    'LiteralIndex',
+    'ModelList',
+    'required_literals',
+)
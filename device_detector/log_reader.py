@@ -0,0 +1,98 @@
+"""
+Read the user agents of access logs in combined log format from memory
+mapped files.
+
+Reading a log line by line decodes every line to str, only to match the user
+agent field out of it. map_user_agents() instead maps the file into memory and
+locates the quote delimiters of the fields in bytes, with a single regex scan
+over the whole file. Only the user agent field is decoded, once per distinct
+user agent, which repeat on most lines of a log.
+"""
+
+import mmap
+import os
+import re
+from collections.abc import Iterable, Iterator
+
+# Value logged for missing fields
+MISSING = '-'
+# Escapes of double quotes and control characters: \" by Apache, \x22 by nginx
+ESCAPE = re.compile(r'\\(x[0-9a-fA-F]{2}|.)')
+
+# Remote host, identity, user, [time], "request", status, bytes, "referer", "user agent",
+# followed by the quoted fields that the log format appends, such as client hints.
+# Quoted fields are matched as runs of unescaped characters, which is several
+# times faster than matching (?:[^"\\]|\\.)* a character at a time.
+QUOTED_RUN = rb'[^"\\\n]*(?:\\.[^"\\\n]*)*'
+QUOTED_FIELDS = re.compile(rb'"(' + QUOTED_RUN + rb')"')
+# Every line matches, with the user agent group empty if the line isn't in combined format,
+# so each match starts at the start of a line without anchoring it, which is slower.
+COMBINED_LINE = re.compile(
+    rb'(?:\S+ \S+ \S+ \[[^\]\n]*\] "' + QUOTED_RUN + rb'" \S+ \S+ "' + QUOTED_RUN + rb'" '
+    rb'"(' + QUOTED_RUN + rb')")?([^\n]*)\n?'
+)
+
+# Decoded user agents and fields kept to decode each distinct value once
+MAX_DECODED = 100_000
+
+
+def unescape(value: str) -> str:
+    if '\\' not in value:
+        return value
+    return ESCAPE.sub(
+        lambda match: chr(int(escape[1:], 16)) if (escape := match[1])[0] == 'x' else escape,
+        value,
+    )
+
+
+def decode(value: bytes) -> str:
+    return unescape(value.decode('utf-8', 'replace'))
+
+
+def map_user_agents(
+    path: str | os.PathLike,
+    extra_fields: Iterable[str] = (),
+) -> Iterator[tuple[str, dict[str, str] | None] | None]:
+    """
+    User agent of each line of a log in combined log format, and the quoted
+    fields following it, named by extra_fields, or None for lines that
+    aren't in combined log format.
+    """
+    extra_fields = list(extra_fields)
+    decoded: dict[bytes, str] = {}
+
+    def decode_once(value: bytes) -> str:
+        if (text := decoded.get(value)) is None:
+            if len(decoded) >= MAX_DECODED:
+                decoded.clear()
+            text = decoded[value] = decode(value)
+        return text
+
+    with open(path, 'rb') as log:
+        if os.fstat(log.fileno()).st_size == 0:
+            return
+        with mmap.mmap(log.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, 'madvise'):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+
+            for match in COMBINED_LINE.finditer(mapped):
+                if (user_agent := match[1]) is None:
+                    # The empty match at the end of a file ending with a newline
+                    if match.start() == match.end() == len(mapped):
+                        break
+                    yield None
+                    continue
+
+                text = decode_once(user_agent)
+
+                headers = None
+                if extra_fields:
+                    headers = {}
+                    for name, value in zip(extra_fields, QUOTED_FIELDS.findall(match[2])):
+                        if (field := decode_once(value)) and field != MISSING:
+                            headers[name] = field
+
+                yield ('' if text == MISSING else text), headers
+
+
+__all__ = ('map_user_agents',)
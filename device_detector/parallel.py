@@ -0,0 +1,239 @@
+"""
+Parse user agents in a pool of worker processes.
+
+Parsing is CPU bound, and the GIL keeps a process to a single core. A
+ParallelParser starts worker processes with all rules loaded, reads the user
+agents in chunks, and sends the distinct user agents of each chunk that
+aren't cached in this process to the workers. Results are returned in input
+order, as compact ParsedResult records, and cached in this process too.
+
+Only a bounded number of chunks are in flight, so that long or endless inputs,
+such as the lines of a log being followed, are read as the workers keep up.
+
+    with ParallelParser(processes=8) as parser:
+        for result in parser.iparse_many(user_agents):
+            ...
+"""
+
+import multiprocessing
+import os
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from multiprocessing.context import BaseContext
+from typing import NamedTuple
+
+try:
+    from typing import Self
+except ImportError:
+    from typing_extensions import Self
+
+from .device_detector import BATCH_SIZE, DeviceDetector
+from .result import ParsedResult
+from .settings import DDCache
+from .warmup import preload
+
+Inputs = dict[str, tuple[str, dict[str, str] | None]]
+
+
+def init_worker() -> None:
+    """
+    Load all rules once when the worker starts, unless inherited from the
+    parent process already.
+    """
+    preload(freeze_gc=False)
+
+
+def parse_chunk(
+    inputs: Inputs,
+    skip_bot_detection: bool = False,
+    skip_device_detection: bool = False,
+) -> dict[str, ParsedResult]:
+    """
+    Parse the distinct user agents of a chunk in a worker process.
+    """
+    return DeviceDetector.parse_inputs(inputs, skip_bot_detection, skip_device_detection)
+
+
+class Chunk(NamedTuple):
+    # Cache key of each item of the chunk, in order
+    keys: list[str]
+    # Results of the keys cached in the parent process
+    found: dict[str, ParsedResult]
+    # Worker task parsing each key that wasn't cached
+    tasks: dict[str, Future]
+    # Task parsing the keys that were first seen in this chunk
+    task: Future | None
+
+
+class ParallelParser:
+    """
+    Pool of worker processes parsing user agents.
+
+    Args:
+        processes: Number of worker processes, by default the number of CPUs
+        chunk_size: Number of user agents sent to the workers at once
+        max_pending: Maximum number of chunks in flight, by default two per process
+        skip_bot_detection: Skip checking if clients are bots
+        skip_device_detection: Skip device brand and model lookup
+        mp_context: Multiprocessing context to start the workers with
+    """
+
+    __slots__ = (
+        'chunk_size',
+        'executor',
+        'max_pending',
+        'processes',
+        'skip_bot_detection',
+        'skip_device_detection',
+    )
+
+    def __init__(
+        self,
+        processes: int | None = None,
+        chunk_size: int = BATCH_SIZE,
+        max_pending: int | None = None,
+        skip_bot_detection: bool = False,
+        skip_device_detection: bool = False,
+        mp_context: BaseContext | None = None,
+    ):
+        if processes is None:
+            processes = os.cpu_count() or 1
+        if processes < 1 or chunk_size < 1:
+            raise ValueError('processes and chunk_size must be at least 1')
+
+        self.processes = processes
+        self.chunk_size = chunk_size
+        self.max_pending = max(max_pending or 2 * processes, 1)
+        self.skip_bot_detection = skip_bot_detection
+        self.skip_device_detection = skip_device_detection
+
+        context = mp_context or multiprocessing.get_context()
+        if context.get_start_method() == 'fork':
+            # Forked workers share the rules loaded by this process. The heap
+            # of the calling application isn't ours to freeze.
+            preload(freeze_gc=False)
+        self.executor = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=context,
+            initializer=init_worker,
+        )
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.executor.shutdown(cancel_futures=True)
+
+    def iparse_many(
+        self,
+        user_agents: Iterable[str | tuple[str, dict[str, str] | None]],
+    ) -> Iterator[ParsedResult]:
+        """
+        Parse user agents, or (user agent, headers) pairs, yielding the
+        ParsedResult of each in input order.
+        """
+        items = iter(user_agents)
+        pending: deque[Chunk] = deque()
+        # Task parsing each key of the chunks in flight
+        in_flight: dict[str, Future] = {}
+
+        while chunk := list(islice(items, self.chunk_size)):
+            pending.append(self.submit(chunk, in_flight))
+            if len(pending) >= self.max_pending:
+                yield from self.results(pending.popleft(), in_flight)
+
+        while pending:
+            yield from self.results(pending.popleft(), in_flight)
+
+    def parse_many(
+        self,
+        user_agents: Iterable[str | tuple[str, dict[str, str] | None]],
+    ) -> list[ParsedResult]:
+        """
+        List of the ParsedResult of each user agent, in input order.
+        """
+        return list(self.iparse_many(user_agents))
+
+    def submit(
+        self,
+        chunk: list[str | tuple[str, dict[str, str] | None]],
+        in_flight: dict[str, Future],
+    ) -> Chunk:
+        """
+        Send the distinct user agents of the chunk that are neither cached
+        nor being parsed for an earlier chunk to the workers.
+        """
+        keys, inputs = DeviceDetector.batch_keys(chunk)
+        found = DDCache['user_agents'].get_many(inputs)
+
+        tasks = {}
+        send: Inputs = {}
+        for key, item in inputs.items():
+            if key in found:
+                continue
+            if (task := in_flight.get(key)) is not None:
+                tasks[key] = task
+            else:
+                send[key] = item
+
+        task = None
+        if send:
+            task = self.executor.submit(
+                parse_chunk,
+                send,
+                self.skip_bot_detection,
+                self.skip_device_detection,
+            )
+            for key in send:
+                in_flight[key] = tasks[key] = task
+
+        return Chunk(keys, found, tasks, task)
+
+    @staticmethod
+    def results(chunk: Chunk, in_flight: dict[str, Future]) -> list[ParsedResult]:
+        """
+        Wait for the results of the chunk, in input order.
+        """
+        found = chunk.found
+        for key, task in chunk.tasks.items():
+            found[key] = task.result()[key]
+
+        if chunk.task is not None:
+            parsed = chunk.task.result()
+            DDCache['user_agents'].set_many(parsed)
+            for key in parsed:
+                if in_flight.get(key) is chunk.task:
+                    del in_flight[key]
+
+        return [found[key] for key in chunk.keys]
+
+
+def parse_parallel(
+    user_agents: Iterable[str | tuple[str, dict[str, str] | None]],
+    processes: int | None = None,
+    chunk_size: int = BATCH_SIZE,
+    skip_bot_detection: bool = False,
+    skip_device_detection: bool = False,
+) -> Iterator[ParsedResult]:
+    """
+    Parse user agents in a pool of worker processes started for this input,
+    yielding the ParsedResult of each in input order.
+    """
+    with ParallelParser(
+        processes=processes,
+        chunk_size=chunk_size,
+        skip_bot_detection=skip_bot_detection,
+        skip_device_detection=skip_device_detection,
+    ) as parser:
+        yield from parser.iparse_many(user_agents)
+
+
+__all__ = (
+    'ParallelParser',
+    'parse_parallel',
+)
@@ -7,3 +7,4 @@ from .parser import *
 from .operating_system import *
 from .os_fragment import *
 from .settings import *
+from .stats import parser_stats, reset_parser_stats
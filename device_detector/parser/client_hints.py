@@ -2,6 +2,7 @@ import regex
 from typing import cast, TypedDict
 from device_detector.enums import DeviceType, AppType
 from ..lazy_regex import RegexLazyIgnore
+from ..settings import CLIENT_HINT_HEADERS
 from ..yaml_loader import app_pretty_names_types_data
 from .settings import CLIENT_HINT_TO_APP_MAP, FAMILY_FROM_OS, BROWSER_TO_ABBREV
 
@@ -142,70 +143,35 @@ class ClientHints:
             app='',
         )
 
-        # fmt: off
         for header_key, value in headers.items():
-            key = header_key.lower().replace('_', '-')
+            name = CLIENT_HINT_HEADERS.get(header_key.lower().replace('_', '-'))
             value = value or ''
-            match key:
-                case (
-                    'sec-ch-ua-arch'
-                    | 'http-sec-ch-ua-arch'
-                    | 'architecture'
-                ):
+            match name:
+                case 'sec-ch-ua-arch':
                     params['architecture'] = value.strip('"')
 
-                case (
-                    'sec-ch-ua-bitness'
-                    | 'http-sec-ch-ua-bitness'
-                    | 'bitness'
-                ):
+                case 'sec-ch-ua-bitness':
                     params['bitness'] = value.strip('"')
 
-                case (
-                    'sec-ch-ua-mobile'
-                    | 'http-sec-ch-ua-mobile'
-                    | 'mobile'
-                ):
+                case 'sec-ch-ua-mobile':
                     params['mobile'] = value.strip('"')
 
-                case (
-                    'sec-ch-ua-model'
-                    | 'http-sec-ch-ua-model'
-                    | 'model'
-                ):
+                case 'sec-ch-ua-model':
                     params['model'] = value.strip('"')
 
                 # "Brave";v="139"
-                case (
-                    'sec-ch-ua-full-version'
-                    | 'http-sec-ch-ua-full-version'
-                    | 'uafullversion'
-                    | 'full_version'
-                ):
+                case 'sec-ch-ua-full-version':
                     params['full_version'] = value.strip('"')
 
-                case (
-                    'sec-ch-ua-platform'
-                    | 'http-sec-ch-ua-platform'
-                    | 'platform'
-                ):
+                case 'sec-ch-ua-platform':
                     platform = value.strip('"')
                     params['platform'] = FAMILY_FROM_OS.get(platform, platform)
 
-                case (
-                    'sec-ch-ua-platform-version'
-                    | 'http-sec-ch-ua-platform-version'
-                    | 'platformversion'
-                    | 'full_version'
-                ):
+                case 'sec-ch-ua-platform-version':
                     params['platform_version'] = value.strip('"')
 
                 # Not A;Brand";v="99", "Chromium";v="98", "Google Chrome";v="98"
-                case (
-                    'sec-ch-ua-full-version-list'
-                    | 'http-sec-ch-ua-full-version-list'
-                    | 'full_version_list'
-                ):
+                case 'sec-ch-ua-full-version-list':
                     params['full_version_list'] = value
 
                 case 'brands':
@@ -217,32 +183,22 @@ class ClientHints:
                     if not params['full_version_list'] or 'brands' in headers:
                         params['full_version_list'] = from_ch_list(value)
 
-                case (
-                    'sec-ch-ua'
-                    | 'http-sec-ch-ua'
-                ):
+                case 'sec-ch-ua':
                     # Don't overwrite full version details truncated version!
                     # " Not A;Brand";v="99.0.0.0", "Chromium";v="98.0.4758.82", "Opera";v="98.0.4758.82"
                     # Not A;Brand";v="99", "Chromium";v="98", "Google Chrome";v="98"
                     if not params['full_version_list']:
                         params['full_version_list'] = value.strip()
 
-                case (
-                    'x-requested-with'
-                    | 'http-x-requested-with'
-                ):
-                    if not value.lower().startswith(('xmlhttprequest', 'fetch')):
+                case 'x-requested-with':
+                    if not is_ajax_request(value):
                         params['app'] = value.strip('"')
 
-                case (
-                    'http-sec-ch-ua-form-factors'
-                    | 'sec-ch-ua-form-factors' | 'form_factors'
-                ):
+                case 'sec-ch-ua-form-factors':
                     if isinstance(value, (list, set, tuple)):
                         params['form_factors'] = set(value)
                     else:
                         params['form_factors'] = {ff.strip(' "') for ff in value.split(',')}
-        # fmt: on
 
         ch = ClientHints(**params)
         ch.headers = headers
@@ -381,6 +337,28 @@ class ClientHints:
         return ch_data
 
 
+def is_ajax_request(requested_with: str) -> bool:
+    """
+    X-Requested-With header set by javascript libraries, rather than by an app.
+    """
+    return requested_with.lower().startswith(('xmlhttprequest', 'fetch'))
+
+
+def client_hint_headers(headers: dict | None) -> dict:
+    """
+    Only the headers that ClientHints.new reads, from all headers of the request,
+    such as cookies and tracing headers, that would make every cache key unique.
+    """
+    if not headers:
+        return {}
+    return {
+        key: value
+        for key, value in headers.items()
+        if (name := CLIENT_HINT_HEADERS.get(key.lower().replace('_', '-')))
+        and not (name == 'x-requested-with' and is_ajax_request(value or ''))
+    }
+
+
 def from_ch_ua(ua: str | dict) -> dict:
     """
     Extract values from Client Hint User Agent.
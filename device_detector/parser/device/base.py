@@ -1,6 +1,7 @@
 import regex
 
 from ..parser import Parser, perform_substitutions
+from ...literals import ModelList
 from device_detector.enums import DeviceType
 
 MOBILE_DEVICE_TYPES = {
@@ -2148,7 +2149,9 @@ class BaseDeviceParser(Parser):
         Brand has list of model regexes to parse
         """
         user_agent = self.user_agent
-        for model in self.ua_data.pop('models', []):
+        models: ModelList = self.ua_data.pop('models', None) or ModelList()
+        for model in models.candidates(self.user_agent_lower):
+            self.regexes_checked += 1
             if model_matched := model['regex'].search(user_agent):
                 self.ua_data |= {k: v.strip() for k, v in model.items() if k != 'regex'}
                 self.ua_data['model'] = perform_model_substitutions(
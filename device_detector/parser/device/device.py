@@ -1,9 +1,12 @@
+from collections.abc import Iterable
+
 from .base import BaseDeviceParser
 from device_detector.enums import DeviceType
 from ..parser import ENDSWITH_DARWIN, IPHONE_ONLY_UA
 from ...lazy_regex import RegexLazy, RegexLazyIgnore
+from ...literals import LiteralIndex
 from .vendor_fragment import VendorFragment
-from ...settings import BOUNDED_REGEX
+from ...settings import BOUNDED_REGEX, DDCache
 from ..settings import ALWAYS_DESKTOP_OS, DESKTOP_OS
 
 CHROME_FRAGMENT = RegexLazy(BOUNDED_REGEX.format(r'Chrome/[.0-9]*'))
@@ -49,6 +52,57 @@ UA_CLIENT_HINTS_FRAGMENT = RegexLazyIgnore(
 TELEGRAM_ANDROID = RegexLazy('Telegram-Android/')
 
 
+class ClientHintModelIndex:
+    """
+    Index the model regexes of all rules, and the regexes of rules without
+    models, by their required literals. A client hint model is then only
+    checked against the regexes that could match it, rather than every
+    model regex of every brand.
+    """
+
+    __slots__ = (
+        'entries',
+        'index',
+    )
+
+    def __init__(self, regex_list: list[dict]) -> None:
+        # Position of the rule, and of the model, or -1 for the rule regex
+        self.entries: list[tuple[int, int]] = []
+        patterns = []
+
+        for position, rule in enumerate(regex_list):
+            if models := rule.get('models', []):
+                for model_position, model in enumerate(models):
+                    self.entries.append((position, model_position))
+                    patterns.append(model['regex'].pattern)
+            else:
+                self.entries.append((position, -1))
+                patterns.append(rule['regex'].pattern)
+
+        self.index = LiteralIndex(patterns)
+
+    def candidates(self, ch_model: str) -> dict[int, list[int]]:
+        """
+        Map positions of the rules to the positions of their models that could
+        match the client hint model, in ascending order. Position -1 is the rule
+        regex of rules without models.
+        """
+        ch_model_lower = ch_model.lower()
+        positions: Iterable[int]
+        if ch_model_lower.isascii():
+            positions = self.index.candidates(ch_model_lower)
+        else:
+            positions = range(len(self.entries))
+
+        rule_models: dict[int, list[int]] = {}
+        entries = self.entries
+        for position in positions:
+            rule_position, model_position = entries[position]
+            rule_models.setdefault(rule_position, []).append(model_position)
+
+        return rule_models
+
+
 class Device(BaseDeviceParser):
     """
     This class should be the final device-type class checked.
@@ -64,6 +118,16 @@ class Device(BaseDeviceParser):
         'upstream/device/mobiles.yml',
     ]
 
+    def load_client_hint_model_index(self) -> ClientHintModelIndex:
+        """
+        Index of the model regexes to check client hint models against.
+        """
+        return DDCache.load(
+            'client_hint_models',
+            self.cache_name,
+            lambda: ClientHintModelIndex(self.regex_list),
+        )
+
     def check_all_regexes(self) -> bool | list:
         # Match relatively generic UAs like:
         # UCWEB/2.0 (MIDP-2.0; U; zh-CN; IQ4406) U2/1.0.0 UCBrowser/3.4.3.532 U2/1.0.0 Mobile
@@ -102,48 +166,63 @@ class Device(BaseDeviceParser):
         Loop through all brands of all device types trying to find
         a model. Returns the first device with model info.
         """
-        if not (ac_matched := self.check_all_regexes()):  # noqa
+        if not self.check_all_regexes():
             return
 
         ch = self.client_hints
         ch_model = ch.model if ch else None
 
-        # ------------------------------------------------
-        # Complete copy of the superclass _parse method
-        for ua_data in self.regex_list:
-            if self.known:
-                break
-            if matched := ua_data['regex'].search(self.user_agent):
-                self.matched_regex = matched
+        if not ch_model:
+            if rule_match := self.first_matching_rule():
+                ua_data, self.matched_regex = rule_match
                 self.ua_data |= {k: v for k, v in ua_data.items() if k != 'regex'}
                 self.known = True
-            elif ch_model:
+        else:
+            # Check each rule that could match the user agent, or whose models
+            # could match the client hint model, in regex_list order.
+            regex_list = self.regex_list
+            ua_positions = set(self.candidate_positions())
+            ch_rule_models = self.load_client_hint_model_index().candidates(ch_model)
+
+            for position in sorted(ua_positions.union(ch_rule_models)):
+                if self.known:
+                    break
+                ua_data = regex_list[position]
+                if position in ua_positions:
+                    self.regexes_checked += 1
+                    if matched := ua_data['regex'].search(self.user_agent):
+                        self.matched_regex = matched
+                        self.ua_data |= {k: v for k, v in ua_data.items() if k != 'regex'}
+                        self.known = True
+                        break
+
                 main_fixture_dtype = ua_data.get('device')
-                if ua_models := ua_data.get('models', []):
-                    for model_data in ua_models:
-                        if self.known:
-                            break
-                        model_fixture_dtype = model_data.get('device', main_fixture_dtype)
-                        if not compatible_device_type(model_fixture_dtype, self.DEVICE_TYPE):
-                            continue
-                        matched = model_data['regex'].search(ch_model)
-                        if matched:
+                for model_position in ch_rule_models.get(position, ()):
+                    self.regexes_checked += 1
+                    if model_position == -1:
+                        # Rule without models
+                        if main_fixture_dtype == self.DEVICE_TYPE and (
+                            matched := ua_data['regex'].search(ch_model)
+                        ):
                             self.matched_regex = matched
+                            self.ua_data |= {k: v for k, v in ua_data.items() if k != 'regex'}
                             self.known = True
-                            ua_data = {
-                                k: v for k, v in ua_data.items() if k != 'regex' and k != 'models'
-                            }
-                            ua_data['model'] = model_data['model']
-                            ua_data['device'] = model_fixture_dtype
-                            self.ua_data = ua_data
-
-                elif main_fixture_dtype == self.DEVICE_TYPE and (
-                    matched := ua_data['regex'].search(ch_model)
-                ):
-                    self.matched_regex = matched
-                    self.ua_data |= {k: v for k, v in ua_data.items() if k != 'regex'}
-                    self.known = True
-        # ------------------------------------------------
+                        break
+
+                    model_data = ua_data['models'][model_position]
+                    model_fixture_dtype = model_data.get('device', main_fixture_dtype)
+                    if not compatible_device_type(model_fixture_dtype, self.DEVICE_TYPE):
+                        continue
+                    if matched := model_data['regex'].search(ch_model):
+                        self.matched_regex = matched
+                        self.known = True
+                        ua_data = {
+                            k: v for k, v in ua_data.items() if k != 'regex' and k != 'models'
+                        }
+                        ua_data['model'] = model_data['model']
+                        ua_data['device'] = model_fixture_dtype
+                        self.ua_data = ua_data
+                        break
 
         if not self.ua_data and ch:
             self.ua_data |= {
@@ -161,10 +240,6 @@ class Device(BaseDeviceParser):
         if device_type := self.dtype():
             self.ua_data['type'] = device_type
 
-        # Uncomment lines for debugging.
-        # if ac_matched and not isinstance(ac_matched, bool):
-        #     print(f'{self.cache_name}: Unwanted AC Match is {ac_matched}')
-
     def is_tablet(self) -> bool:
         """
         Check for various tablet fragments.
@@ -1,7 +1,8 @@
 from .base import BaseDeviceParser
 from device_detector.enums import DeviceType
 from ...lazy_regex import RegexLazyIgnore
-from ...settings import BOUNDED_REGEX, DDCache
+from ...literals import ModelList
+from ...settings import BOUNDED_REGEX
 
 HBBTV_FRAGMENT = RegexLazyIgnore(r'(?:HbbTV|SmartTvA)/([1-9]{1}(?:\.[0-9]{1}){1,2})')
 SHELL_TV_FRAGMENT = RegexLazyIgnore(r'[ _]Shell[ _]\w{6}|tclwebkit(\d+[.\d]*)')
@@ -51,12 +52,7 @@ class BaseTvParser(BaseDeviceParser):
 class HbbTv(BaseTvParser):
     __slots__ = ()
 
-    @property
-    def regex_list(self) -> list:
-        cache_key = 'tv_regexes'
-        if regexes := DDCache.get(cache_key, []):
-            return regexes
-
+    def load_regex_list(self) -> list[dict]:
         regexes = self.load_from_yaml('regexes/upstream/device/televisions.yml')
         if not regexes:
             return []
@@ -71,13 +67,11 @@ class HbbTv(BaseTvParser):
             if 'models' in stats:
                 for model in stats['models']:
                     model['regex'] = RegexLazyIgnore(BOUNDED_REGEX.format(model['regex']))
-                brand_data['models'] = stats['models']
+                brand_data['models'] = ModelList(stats['models'])
             if 'model' in stats:
                 brand_data['model'] = stats['model']
             reg_list.append(brand_data)
 
-        DDCache[cache_key] = reg_list
-
         return reg_list
 
     def _parse(self) -> None:
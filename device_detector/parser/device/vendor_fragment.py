@@ -32,6 +32,7 @@ class VendorFragment(BaseDeviceParser):
         user_agent = self.user_agent
         for ua_data in self.regex_list:
             for vendor in ua_data['regexes']:
+                self.regexes_checked += 1
                 if matched := vendor.search(user_agent):
                     self.matched_regex = matched
                     self.ua_data = {k: v for k, v in ua_data.items() if k != 'regexes'}
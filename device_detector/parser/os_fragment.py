@@ -28,6 +28,7 @@ class OSFragment(BaseDeviceParser):
     def _parse(self) -> None:
         for ua_data in self.regex_list:
             for regex in ua_data['regexes']:
+                self.regexes_checked += 1
                 matched = regex.search(self.user_agent)
 
                 if matched:
@@ -1,3 +1,6 @@
+from time import perf_counter
+from typing import TYPE_CHECKING
+
 import regex
 
 try:
@@ -5,10 +8,14 @@ try:
 except ImportError:
     from typing_extensions import Self
 
-from regex._regex_core import error as RegexError
 from ..lazy_regex import RegexLazyIgnore
-from .client_hints import ClientHints
+from ..regex_backends import REGEX_ERRORS
 from ..yaml_loader import RegexLoader, app_pretty_names_types_data
+from .client_hints import ClientHints
+from .stats import ParserStats, thread_stats
+
+if TYPE_CHECKING:
+    from ..scanner import UAScan
 
 # Match regexes that ONLY values like:
 # iPhone12mini
@@ -50,6 +57,10 @@ class Parser(RegexLoader):
     UNKNOWN = 'UNK'
     UNKNOWN_NAME = 'Unknown'
 
+    # Find the first matching rule with combined alternations of all rules,
+    # rather than searching the candidate rules one at a time.
+    COMBINED_REGEXES = False
+
     __slots__ = (
         'user_agent',
         'user_agent_lower',
@@ -66,6 +77,9 @@ class Parser(RegexLoader):
         'os_details',
         'appdetails_data',
         'corasick',
+        'scan',
+        'ac_matched',
+        'regexes_checked',
         '_is_ios_fragment',
     )
 
@@ -74,6 +88,7 @@ class Parser(RegexLoader):
         ua: str,
         client_hints: ClientHints | None,
         os_details: dict | None = None,
+        scan: 'UAScan | None' = None,
     ) -> None:
         super().__init__()
 
@@ -90,6 +105,12 @@ class Parser(RegexLoader):
         self.ch_client_data = client_hints.client_data() if client_hints else {}
         self.os_details = os_details or {}
         self.appdetails_data = app_pretty_names_types_data()
+        # Shared AhoCorasick scan of the user agent, if parsed by DeviceDetector
+        self.scan = scan
+        # AhoCorasick words found in the user agent, True if the parser
+        # has no words, or None if the words weren't checked.
+        self.ac_matched: bool | list | None = None
+        self.regexes_checked = 0
         self._is_ios_fragment: bool | None = None
 
     def is_ios_fragment(self) -> bool:
@@ -101,36 +122,104 @@ class Parser(RegexLoader):
         return self._is_ios_fragment
 
     def check_all_regexes(self) -> bool | list:
-        if not (corasick := self.load_ahocorasick_patterns()):
-            return True
-        return corasick.find_matches_as_strings(self.user_agent_lower)
+        if self.scan is not None and (
+            (ac_matched := self.scan.ahocorasick_matches(self.cache_name)) is not None
+        ):
+            self.ac_matched = ac_matched
+        elif not (corasick := self.load_ahocorasick_patterns()):
+            self.ac_matched = True
+        else:
+            self.ac_matched = corasick.find_matches_as_strings(self.user_agent_lower)
+        return self.ac_matched
+
+    def candidate_positions(self) -> list[int] | range:
+        """
+        Positions of the regex_list rules that could match the user agent, in ascending order.
+
+        Rules are indexed by the lowercase ASCII literals their regex requires,
+        so all rules are candidates for user agents with non-ASCII characters,
+        which may match case-insensitively without containing the literal.
+        """
+        if (
+            self.scan is not None
+            and (positions := self.scan.candidates(self.cache_name)) is not None
+        ):
+            return positions
+
+        if not self.user_agent_lower.isascii():
+            return range(len(self.regex_list))
+
+        return self.load_candidate_index().candidates(self.user_agent_lower)
+
+    def candidate_regexes(self) -> list[dict]:
+        """
+        Rules of the regex_list that could match the user agent, in regex_list order.
+        """
+        regex_list = self.regex_list
+        if isinstance(positions := self.candidate_positions(), range):
+            return regex_list
+        return [regex_list[position] for position in positions]
+
+    def first_matching_rule(self) -> tuple[dict, regex.Match] | None:
+        """
+        Return the first rule of the regex_list matching the user agent,
+        and the match of the rule regex.
+        """
+        user_agent = self.user_agent
+        if self.COMBINED_REGEXES:
+            rule_match, searches = self.load_combined_regexes().first_match_searches(user_agent)
+            self.regexes_checked += searches
+            return rule_match
+
+        candidates = self.candidate_regexes()
+        for checked, ua_data in enumerate(candidates, 1):
+            if matched := ua_data['regex'].search(user_agent):
+                self.regexes_checked += checked
+                return ua_data, matched
+
+        self.regexes_checked += len(candidates)
+        return None
 
     def _parse(self) -> None:
         """Override on subclasses if custom parsing is required"""
-        user_agent = self.user_agent
-        if ac_matched := self.check_all_regexes():  # noqa
-            for ua_data in self.regex_list:
-                if matched := ua_data['regex'].search(user_agent):
-                    self.matched_regex = matched
-                    self.ua_data |= {k: v for k, v in ua_data.items() if k != 'regex'}
-                    self.known = True
-                    return
-
-            # Uncomment lines for debugging.
-            # If too many ACs are matching when the full regex list failed,
-            # to match then the AC pattern matching isn't optimizing anything.
-            # if ac_matched and not isinstance(ac_matched, bool):
-            #     print(f'{self.cache_name}: Unwanted AC Match: {ac_matched}. {self.user_agent}')
+        if self.check_all_regexes() and (rule_match := self.first_matching_rule()):
+            ua_data, self.matched_regex = rule_match
+            self.ua_data |= {k: v for k, v in ua_data.items() if k != 'regex'}
+            self.known = True
 
     def parse(self) -> Self:
         """
         Return parsed details of UA String
         """
+        start = perf_counter()
         self._parse()
         self.extract_version()
         self.set_details()
+        self.update_stats(perf_counter() - start)
         return self
 
+    def update_stats(self, seconds: float) -> None:
+        """
+        Add the outcome of parsing the user agent to the parser's stats.
+        """
+        counters = thread_stats()
+        try:
+            stats = counters[self.cache_name]
+        except KeyError:
+            stats = counters[self.cache_name] = ParserStats()
+
+        stats.parses += 1
+        stats.regexes += self.regexes_checked
+        stats.seconds += seconds
+
+        # Only count parsers that checked their words
+        if isinstance(self.ac_matched, list):
+            stats.ac_checks += 1
+            if self.ac_matched:
+                stats.ac_hits += 1
+                if self.matched_regex is None:
+                    stats.ac_false_positives += 1
+
     def extract_version(self) -> None:
         """
         Extract the version if UA Yaml files specify version regexes.
@@ -212,13 +301,13 @@ def perform_substitutions(substring: str, regex_match: regex.Match, separator: s
     Substitute the captured value from the regex for the regex placeholder.
     """
     regex_pattern = regex_match.re
-    capture = regex_match.captures()[0]
+    capture = regex_match.group(0)
     try:
         value = regex_pattern.sub(substring, capture)
         if value.endswith(('\\g<1>', '\\g<2>')):
             value = value[: value.rfind('\\g<')]
         return value.replace('_', separator).strip(' .')
-    except RegexError:
+    except REGEX_ERRORS:
         return substring
 
 
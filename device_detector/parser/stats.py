@@ -0,0 +1,118 @@
+"""
+Counters of how effective the AhoCorasick pre-check is for each parser.
+
+A parser whose words are too general passes the pre-check on user agents
+that then match none of its rules. Compare ac_false_positives to ac_hits
+under real traffic to find such parsers:
+
+>>> from device_detector import parser_stats
+>>> parser_stats()['Browser']
+{'parses': 1000, 'ac_checks': 980, 'ac_hits': 610, 'ac_false_positives': 12, ...}
+
+Each thread updates counters of its own, without taking a lock, so that
+parsing threads don't contend on them. parser_stats() adds up the counters
+of all threads.
+"""
+
+import threading
+
+from ..settings import DDCache
+
+# Held to register the counters of a thread, and to read or reset them all
+STATS_LOCK = threading.Lock()
+
+# Counters of the calling thread, and the registry they are part of
+THREAD_STATS = threading.local()
+
+
+class ParserStats:
+    """
+    Counters of a single parser in a single thread, keyed by cache_name.
+    """
+
+    # In the order of the counters of as_dict()
+    __slots__ = (  # noqa: RUF023
+        # Number of user agents parsed
+        'parses',
+        # User agents checked against the parser's AhoCorasick words
+        'ac_checks',
+        # User agents containing at least one of the words
+        'ac_hits',
+        # User agents containing a word, but matching no rule
+        'ac_false_positives',
+        # Rule regexes searched
+        'regexes',
+        # Time spent parsing, in seconds
+        'seconds',
+    )
+
+    def __init__(self) -> None:
+        self.parses = 0
+        self.ac_checks = 0
+        self.ac_hits = 0
+        self.ac_false_positives = 0
+        self.regexes = 0
+        self.seconds = 0.0
+
+    def as_dict(self) -> dict[str, int | float]:
+        return {counter: getattr(self, counter) for counter in self.__slots__}
+
+    def add(self, other: 'ParserStats') -> None:
+        for counter in self.__slots__:
+            setattr(self, counter, getattr(self, counter) + getattr(other, counter))
+
+
+def merge_stats(
+    merged: dict[str, ParserStats], counters: dict[str, ParserStats]
+) -> dict[str, ParserStats]:
+    # Copy the items first, as the thread of the counters may add parsers meanwhile
+    for cache_name, stats in list(counters.items()):
+        merged.setdefault(cache_name, ParserStats()).add(stats)
+    return merged
+
+
+def thread_stats() -> dict[str, ParserStats]:
+    """
+    Counters of the calling thread by cache_name, registered in
+    DDCache['parser_stats'] on first use and after each reset.
+    """
+    registry = DDCache['parser_stats']
+    if getattr(THREAD_STATS, 'registry', None) is registry:
+        return THREAD_STATS.counters
+
+    with STATS_LOCK:
+        registry = DDCache['parser_stats']
+        # Fold the counters of finished threads together, so that the
+        # registry doesn't grow with each short-lived thread
+        for thread in [thread for thread in registry if thread and not thread.is_alive()]:
+            merge_stats(registry.setdefault(None, {}), registry.pop(thread))
+        counters: dict[str, ParserStats] = {}
+        registry[threading.current_thread()] = counters
+    THREAD_STATS.registry = registry
+    THREAD_STATS.counters = counters
+    return counters
+
+
+def parser_stats() -> dict[str, dict[str, int | float]]:
+    """
+    Counters of each parser that parsed any user agents since the last reset.
+    """
+    merged: dict[str, ParserStats] = {}
+    with STATS_LOCK:
+        for counters in DDCache['parser_stats'].values():
+            merge_stats(merged, counters)
+    return {cache_name: stats.as_dict() for cache_name, stats in merged.items()}
+
+
+def reset_parser_stats() -> None:
+    with STATS_LOCK:
+        DDCache['parser_stats'] = {}
+
+
+__all__ = (
+    'STATS_LOCK',
+    'ParserStats',
+    'parser_stats',
+    'reset_parser_stats',
+    'thread_stats',
+)
@@ -0,0 +1,267 @@
+"""
+Cache of parsed user agents shared by a fleet of hosts, in Redis or any server
+speaking the Redis protocol (RESP), such as Valkey, KeyDB or DragonflyDB.
+
+The client only needs the GET, MGET, SET and SCAN/DEL commands, and is
+implemented here over a plain socket, rather than requiring redis-py.
+Use it as the second level of the in-process cache:
+
+    from device_detector import DDCache
+    from device_detector.redis_cache import RedisCache
+
+    DDCache.configure_user_agents(shared=RedisCache('redis://cache.internal:6379/2', ttl=86400))
+
+Keys are namespaced by the rules version, so that hosts running different
+releases never serve each other's results. The cache is best effort: a
+connection or protocol error, or result that can't be decoded, is treated
+as a miss, and the connection is opened again on the next request. Threads
+take turns on the connection, each sending its pipeline and reading all of
+its replies before the next.
+"""
+
+import os
+import socket
+import threading
+from collections.abc import Iterable, Mapping
+from typing import Any
+from urllib.parse import unquote, urlsplit
+
+from .bundle import rules_version
+from .cache import CacheBackend
+from .result import ParsedResult
+
+DEFAULT_URL = 'redis://localhost:6379/0'
+# Seconds to wait for connecting and for each reply
+DEFAULT_TIMEOUT = 0.25
+# Maximum number of commands sent before reading their replies
+MAX_PIPELINE = 1000
+
+
+class RedisError(Exception):
+    """
+    Error reply of the server.
+    """
+
+
+def encode_command(*args: str | bytes | int) -> bytes:
+    """
+    Encode the command as RESP array of bulk strings.
+    """
+    parts = [b'*%d\r\n' % len(args)]
+    for arg in args:
+        if isinstance(arg, int):
+            arg = str(arg)
+        if isinstance(arg, str):
+            arg = arg.encode('utf-8')
+        parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+    return b''.join(parts)
+
+
+class RedisCache(CacheBackend):
+    """
+    Parsed results of user agents in a Redis-compatible server, keyed by ua_hash.
+    """
+
+    __slots__ = (
+        '_lock',
+        '_pid',
+        '_reader',
+        '_socket',
+        'db',
+        'host',
+        'namespace',
+        'password',
+        'port',
+        'prefix',
+        'timeout',
+        'ttl',
+        'username',
+    )
+
+    def __init__(
+        self,
+        url: str = DEFAULT_URL,
+        ttl: float | None = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        namespace: str = 'device_detector',
+    ) -> None:
+        """
+        Args:
+            url: redis://[[username]:password@]host[:port][/db] of the server
+            ttl: Seconds after which results expire, or None to never expire
+            timeout: Seconds to wait for connecting and for each reply
+            namespace: Prefix of all keys, followed by the rules version
+        """
+        parts = urlsplit(url)
+        if parts.scheme != 'redis':
+            raise ValueError(f'Unsupported Redis URL scheme {parts.scheme!r}')
+
+        self.host = parts.hostname or 'localhost'
+        self.port = parts.port or 6379
+        self.db = int(parts.path.lstrip('/') or 0)
+        self.username = unquote(parts.username) if parts.username else None
+        self.password = unquote(parts.password) if parts.password else None
+        self.ttl = ttl
+        self.timeout = timeout
+        self.namespace = namespace
+        self.prefix = f'{namespace}:{rules_version()}:'
+        self._socket: socket.socket | None = None
+        self._reader: Any = None
+        self._pid = 0
+        self._lock = threading.RLock()
+
+    # -----------------------------------------------------------------------------
+    # Protocol
+    # -----------------------------------------------------------------------------
+    def connect(self) -> socket.socket:
+        """
+        Open the connection of the current process. Connections can't be
+        shared with forked processes, so each opens its own.
+        """
+        self.close()
+        connection = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._socket = connection
+        self._reader = connection.makefile('rb')
+        self._pid = os.getpid()
+
+        commands: list[tuple] = []
+        if self.password is not None:
+            if self.username is not None:
+                commands.append(('AUTH', self.username, self.password))
+            else:
+                commands.append(('AUTH', self.password))
+        if self.db:
+            commands.append(('SELECT', self.db))
+        if commands:
+            self.pipeline(connection, commands)
+
+        return connection
+
+    def close(self) -> None:
+        with self._lock:
+            # The connection of the parent process is left open for the parent
+            if self._socket is not None and self._pid == os.getpid():
+                self._reader.close()
+                self._socket.close()
+            self._socket = None
+            self._reader = None
+
+    def read_reply(self) -> Any:
+        line = self._reader.readline()
+        if not line.endswith(b'\r\n'):
+            raise ConnectionError('Connection closed by server')
+
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload.decode('utf-8')
+        if kind == b'-':
+            raise RedisError(payload.decode('utf-8', 'replace'))
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            if (length := int(payload)) < 0:
+                return None
+            data = self._reader.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError('Connection closed by server')
+            return data[:-2]
+        if kind == b'*':
+            if (length := int(payload)) < 0:
+                return None
+            return [self.read_reply() for _ in range(length)]
+        raise RedisError(f'Unexpected reply {line!r}')
+
+    def execute(self, commands: list[tuple]) -> list[Any]:
+        """
+        Send the commands in a single pipeline, and return their replies.
+        """
+        with self._lock:
+            connection = self._socket
+            if connection is None or self._pid != os.getpid():
+                connection = self.connect()
+            return self.pipeline(connection, commands)
+
+    def pipeline(self, connection: socket.socket, commands: list[tuple]) -> list[Any]:
+        connection.sendall(b''.join(encode_command(*command) for command in commands))
+
+        replies = []
+        error = None
+        for _ in commands:
+            try:
+                replies.append(self.read_reply())
+            except RedisError as e:
+                # Read the replies of the remaining commands regardless
+                error = error or e
+                replies.append(None)
+        if error is not None:
+            raise error
+        return replies
+
+    def request(self, commands: list[tuple]) -> list[Any] | None:
+        """
+        Execute the commands, or return None if the server can't be reached.
+        """
+        with self._lock:
+            try:
+                return self.execute(commands)
+            except (OSError, RedisError, ValueError):
+                self.close()
+                return None
+
+    # -----------------------------------------------------------------------------
+    # CacheBackend
+    # -----------------------------------------------------------------------------
+    def get_many(self, keys: Iterable[str]) -> dict[str, ParsedResult]:
+        keys = list(keys)
+        if not keys:
+            return {}
+
+        found: dict[str, ParsedResult] = {}
+        for start in range(0, len(keys), MAX_PIPELINE):
+            chunk = keys[start : start + MAX_PIPELINE]
+            replies = self.request([('MGET', *(self.prefix + key for key in chunk))])
+            if replies is None:
+                break
+            for key, data in zip(chunk, replies[0]):
+                if data is None:
+                    continue
+                try:
+                    found[key] = ParsedResult.from_json(data)
+                except (ValueError, TypeError):
+                    continue
+        return found
+
+    def set_many(self, items: Mapping[str, ParsedResult]) -> None:
+        expiry: tuple = ('PX', int(self.ttl * 1000)) if self.ttl is not None else ()
+        commands = []
+        for key, result in items.items():
+            try:
+                commands.append(('SET', self.prefix + key, result.to_json(), *expiry))
+            except (ValueError, TypeError):
+                # Results that can't be serialized are only cached in process
+                continue
+        for start in range(0, len(commands), MAX_PIPELINE):
+            if self.request(commands[start : start + MAX_PIPELINE]) is None:
+                return
+
+    def clear(self) -> None:
+        """
+        Delete the results of the current rules version.
+        """
+        cursor = b'0'
+        while True:
+            replies = self.request([('SCAN', cursor, 'MATCH', f'{self.prefix}*', 'COUNT', 1000)])
+            if replies is None:
+                return
+            cursor, keys = replies[0]
+            if keys:
+                self.request([('DEL', *keys)])
+            if cursor == b'0':
+                return
+
+
+__all__ = (
+    'RedisCache',
+    'RedisError',
+)
@@ -0,0 +1,140 @@
+r"""
+Regex engines to compile the rule regexes with.
+
+All regexes are compiled with the `regex` module by default. The stdlib `re`
+module and RE2 (the google-re2 package) support a subset of its syntax.
+Selecting another backend compiles each pattern with that engine when the
+pattern is supported, and falls back to the `regex` module otherwise:
+
+    from device_detector.regex_backends import set_regex_backend
+    set_regex_backend('re2')
+
+Select the backend before parsing any user agents, as regexes that are
+already compiled keep their engine.
+
+RE2 matches in linear time, but treats \d, \w, \s and \b as ASCII only,
+so may miss matches on user agents with non-ASCII digits or letters.
+"""
+
+import re
+import warnings
+from collections import Counter
+from collections.abc import Callable
+from typing import Any
+
+import regex
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+# Flags with the same value and meaning in the regex, re and re2 modules
+SHARED_FLAGS = regex.IGNORECASE | regex.MULTILINE | regex.DOTALL | regex.VERBOSE
+
+
+def compile_re(pattern: str, flags: int) -> re.Pattern | None:
+    """
+    Compile the pattern with the re module, or return None if not supported.
+    """
+    if flags & ~SHARED_FLAGS:
+        return None
+
+    with warnings.catch_warnings():
+        # Syntax like [[:alpha:]] compiles with a FutureWarning, but
+        # the regex module parses it differently than the re module.
+        warnings.simplefilter('error', FutureWarning)
+        try:
+            return re.compile(pattern, flags)
+        except (re.error, FutureWarning, OverflowError, RecursionError):
+            return None
+
+
+def compile_re2(pattern: str, flags: int) -> Any:
+    """
+    Compile the pattern with RE2, or return None if not supported.
+    """
+    if re2 is None or flags & ~regex.IGNORECASE:
+        return None
+
+    options = re2.Options()
+    options.case_sensitive = not flags & regex.IGNORECASE
+    options.log_errors = False
+    try:
+        return re2.compile(pattern, options)
+    except re2.error:
+        return None
+
+
+ENGINES: dict[str, Callable[[str, int], Any]] = {
+    're': compile_re,
+    're2': compile_re2,
+}
+
+# Engines each backend tries before falling back to the regex module
+BACKENDS: dict[str, tuple[str, ...]] = {
+    'regex': (),
+    're': ('re',),
+    're2': ('re2',),
+}
+
+# Errors raised by any engine, such as invalid substitution templates
+REGEX_ERRORS: tuple[type[Exception], ...] = (regex.error, re.error)
+if re2 is not None:
+    REGEX_ERRORS += (re2.error,)
+
+selected_backend = 'regex'
+
+# Number of patterns compiled by each engine
+compiled_patterns: Counter[str] = Counter()
+
+
+def set_regex_backend(backend: str) -> None:
+    """
+    Compile regexes with the engines of the backend from now on.
+    """
+    global selected_backend
+
+    if backend not in BACKENDS:
+        raise ValueError(f'Unknown regex backend {backend!r}, expected one of {tuple(BACKENDS)}')
+    if backend == 're2' and re2 is None:
+        raise ValueError('The re2 regex backend requires the google-re2 package')
+
+    selected_backend = backend
+
+
+def regex_backend() -> str:
+    return selected_backend
+
+
+def compile_pattern(pattern: str, flags: int = 0) -> Any:
+    """
+    Compile the pattern with the engine of the selected backend,
+    or with the regex module if the engine doesn't support it.
+    """
+    for engine in BACKENDS[selected_backend]:
+        if (compiled := ENGINES[engine](pattern, flags)) is not None:
+            compiled_patterns[engine] += 1
+            return compiled
+
+    compiled_patterns['regex'] += 1
+    return regex.compile(pattern, flags)
+
+
+def regex_backend_stats() -> dict[str, int]:
+    """
+    Number of patterns compiled by each engine.
+    """
+    return dict(compiled_patterns)
+
+
+def reset_regex_backend_stats() -> None:
+    compiled_patterns.clear()
+
+
+__all__ = (
+    'regex_backend',
+    'regex_backend_stats',
+    'reset_regex_backend_stats',
+    'set_regex_backend',
+)
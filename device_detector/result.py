@@ -0,0 +1,364 @@
+"""
+Compact, immutable record of a parsed user agent, as held by the user agent cache.
+
+Caching the DeviceDetector itself would keep alive its parsers, with their
+rule data, regex matches and client hints. The record only holds the details
+of the user agent, in the all_details layout, the client hint headers and the
+names of the parsers that detected it, with the strings shared between records
+interned. DeviceDetector restores cached user agents from their record, and
+the record itself serves the accessor methods of DeviceDetector from its details.
+"""
+
+import json
+import sys
+from collections.abc import Iterable, Sequence
+from typing import TYPE_CHECKING, Any
+
+from .enums import AppType, DeviceType
+from .parser.settings import APPLE_OS_NAMES
+from .settings import WORTHLESS_UA_TYPES
+
+if TYPE_CHECKING:
+    from .device_detector import DeviceDetector
+
+# Bits of ParsedResult.flags
+KNOWN = 1
+BOT = 2
+TELEVISION = 4
+MOBILE_BROWSER = 8
+MOBILE = 16
+DESKTOP = 32
+WORTHLESS = 64
+SKIP_BOT_DETECTION = 128
+SKIP_DEVICE_DETECTION = 256
+
+
+def intern(value: Any) -> Any:
+    """
+    Intern plain strings, such as names and versions, that many records share.
+    """
+    if type(value) is str:
+        return sys.intern(value)
+    return value
+
+
+def intern_details(details: dict) -> dict:
+    """
+    Copy of the all_details layout, with its keys and plain strings interned.
+    """
+    return {
+        sys.intern(key): intern_details(value) if type(value) is dict else intern(value)
+        for key, value in details.items()
+    }
+
+
+def parser_name(parser: object) -> str:
+    return type(parser).__name__ if parser is not None else ''
+
+
+def copy_details(details: dict) -> dict:
+    copied = details.copy()
+    for key, value in details.items():
+        if type(value) is dict:
+            copied[key] = copy_details(value)
+    return copied
+
+
+def to_enum(enum: type[AppType] | type[DeviceType], value: str) -> str:
+    """
+    Restore the enum member of a deserialized value, if any.
+    """
+    try:
+        return enum(value)
+    except ValueError:
+        return value
+
+
+def details_to_enums(details: dict) -> dict:
+    """
+    Restore the enum members of the types of deserialized details.
+    """
+    for section, enum in (('client', AppType), ('device', DeviceType), ('bot', DeviceType)):
+        if 'type' in (section_details := details.get(section) or {}):
+            section_details['type'] = to_enum(enum, section_details['type'])
+    secondary_client = (details.get('client') or {}).get('secondary_client') or {}
+    if 'type' in secondary_client:
+        secondary_client['type'] = to_enum(AppType, secondary_client['type'])
+    return details
+
+
+def details_size(details: dict) -> int:
+    """
+    Approximate number of bytes held by the dicts of the details, not
+    counting the interned strings shared with other records.
+    """
+    return sys.getsizeof(details) + sum(
+        details_size(value) for value in details.values() if type(value) is dict
+    )
+
+
+class ParsedResult:
+    """
+    Details of a parsed user agent, with the accessor methods of DeviceDetector.
+    """
+
+    # In the order of fields(), and so of the JSON layout
+    __slots__ = (  # noqa: RUF023
+        'user_agent',
+        'ua_hash',
+        'flags',
+        # all_details of the DeviceDetector
+        'details',
+        # Sorted (name, value) pairs of the client hint headers
+        'headers',
+        # Class names of the (os, client, device, bot) parsers, or ''
+        'parsers',
+    )
+
+    if TYPE_CHECKING:
+        user_agent: str
+        ua_hash: str
+        flags: int
+        details: dict
+        # Values are strings, or lists of brands and form factors
+        headers: tuple[tuple[str, Any], ...]
+        parsers: tuple[str, str, str, str]
+
+    def __init__(
+        self,
+        user_agent: str,
+        ua_hash: str,
+        flags: int,
+        details: dict,
+        headers: Iterable[Sequence],
+        parsers: Iterable[str],
+    ) -> None:
+        setattr_ = object.__setattr__
+        setattr_(self, 'user_agent', user_agent)
+        setattr_(self, 'ua_hash', ua_hash)
+        setattr_(self, 'flags', flags)
+        setattr_(self, 'details', intern_details(details))
+        setattr_(self, 'headers', tuple((name, value) for name, value in headers))
+        setattr_(self, 'parsers', tuple(map(intern, parsers)))
+
+    @classmethod
+    def from_detector(cls, detector: 'DeviceDetector') -> 'ParsedResult':
+        # Detectors restored from a record hold it already
+        if (result := detector._result) is not None:
+            return result
+
+        normalized = detector.all_details.get('normalized') or ''
+        flags = (
+            KNOWN * detector.is_known()
+            | BOT * detector.is_bot()
+            | TELEVISION * detector.is_television()
+            | MOBILE_BROWSER * detector.uses_mobile_browser()
+            | MOBILE * detector.is_mobile()
+            | DESKTOP * detector.is_desktop()
+            | WORTHLESS * (not detector.headers and normalized in WORTHLESS_UA_TYPES)
+            | SKIP_BOT_DETECTION * detector.skip_bot_detection
+            | SKIP_DEVICE_DETECTION * detector.skip_device_detection
+        )
+        return cls(
+            user_agent=detector.user_agent,
+            ua_hash=detector.ua_hash,
+            flags=flags,
+            details=detector.all_details,
+            headers=sorted(detector.headers.items()),
+            parsers=(
+                parser_name(detector.os),
+                parser_name(detector.client),
+                parser_name(detector.device),
+                parser_name(detector.bot),
+            ),
+        )
+
+    def fields(self) -> tuple:
+        return tuple(getattr(self, field) for field in self.__slots__)
+
+    def to_json(self) -> str:
+        """
+        Serialize the record, for caches shared between processes.
+        """
+        return json.dumps(self.fields(), ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def from_json(cls, data: str | bytes) -> 'ParsedResult':
+        """
+        Deserialize a record serialized by to_json. Raises ValueError or
+        TypeError if the data isn't a serialized record.
+        """
+        user_agent, ua_hash, flags, details, headers, parsers = json.loads(data)
+        return cls(user_agent, ua_hash, flags, details_to_enums(details), headers, parsers)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f'{self.__class__.__name__} is immutable')
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f'{self.__class__.__name__} is immutable')
+
+    def __reduce__(self) -> tuple:
+        return self.__class__, self.fields()
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ParsedResult):
+            return NotImplemented
+        return self.fields() == other.fields()
+
+    def __hash__(self) -> int:
+        return hash(self.ua_hash)
+
+    def approximate_size(self) -> int:
+        """
+        Approximate number of bytes held by the record, not counting
+        interned strings shared with other records.
+        """
+        return (
+            sys.getsizeof(self)
+            + sys.getsizeof(self.user_agent)
+            + sys.getsizeof(self.ua_hash)
+            + details_size(self.details)
+            + sys.getsizeof(self.headers)
+            + sum(sys.getsizeof(header) + sys.getsizeof(header[1]) for header in self.headers)
+        )
+
+    @property
+    def all_details(self) -> dict:
+        """
+        Copy of the details of the record, as in DeviceDetector.all_details.
+        """
+        return copy_details(self.details)
+
+    @property
+    def skip_bot_detection(self) -> bool:
+        return bool(self.flags & SKIP_BOT_DETECTION)
+
+    @property
+    def skip_device_detection(self) -> bool:
+        return bool(self.flags & SKIP_DEVICE_DETECTION)
+
+    # -----------------------------------------------------------------------------
+    # Accessor methods of DeviceDetector
+    # -----------------------------------------------------------------------------
+    def parse(self) -> 'ParsedResult':
+        return self
+
+    def is_worthless(self) -> bool:
+        return bool(self.flags & WORTHLESS)
+
+    def is_known(self) -> bool:
+        return bool(self.flags & KNOWN)
+
+    def is_bot(self) -> bool:
+        return bool(self.flags & BOT)
+
+    def is_television(self) -> bool:
+        return bool(self.flags & TELEVISION)
+
+    def uses_mobile_browser(self) -> bool:
+        return bool(self.flags & MOBILE_BROWSER)
+
+    def engine(self) -> str:
+        if 'browser' not in self.client_type():
+            return ''
+        return self.details.get('client', {}).get('engine', '')
+
+    def is_mobile(self) -> bool:
+        return bool(self.flags & MOBILE)
+
+    def is_desktop(self) -> bool:
+        return bool(self.flags & DESKTOP)
+
+    def is_feature_phone(self) -> bool:
+        return self.device_type() == DeviceType.FeaturePhone
+
+    def client_name(self) -> str:
+        return self.details.get('client', {}).get('name', '')
+
+    def client_version(self) -> str:
+        return self.details.get('client', {}).get('version', '')
+
+    def client_application_id(self) -> str:
+        client = self.details.get('client', {})
+        return client.get('app_id', '') or client.get('secondary_client', {}).get('app_id', '')
+
+    def client_type(self) -> str:
+        return self.details.get('client', {}).get('type', '')
+
+    def secondary_client_name(self) -> str:
+        return self.details.get('client', {}).get('secondary_client', {}).get('name', '')
+
+    def secondary_client_version(self) -> str:
+        return self.details.get('client', {}).get('secondary_client', {}).get('version', '')
+
+    def secondary_client_type(self) -> str:
+        return self.details.get('client', {}).get('secondary_client', {}).get('type', '')
+
+    def preferred_client_name(self) -> str:
+        return self.secondary_client_name() or self.client_name() or self.client_application_id()
+
+    def preferred_client_version(self) -> str:
+        return self.secondary_client_version() or self.client_version()
+
+    def preferred_client_type(self) -> str:
+        return self.secondary_client_type() or self.client_type()
+
+    def device_type(self) -> DeviceType:
+        return self.details.get('device', {}).get('type', DeviceType.Unknown)
+
+    def device_brand(self) -> str:
+        if self.skip_device_detection:
+            return ''
+        if brand := self.details.get('device', {}).get('brand', ''):
+            return brand
+        # Assume all devices running iOS / macOS are from Apple
+        if self.os_name() in APPLE_OS_NAMES:
+            return 'Apple'
+        return ''
+
+    def device_model(self) -> str:
+        device = self.details.get('device', {})
+        if not self.skip_device_detection and 'model' in device:
+            return device['model']
+        return self.client_hints_model()
+
+    def client_hints_model(self) -> str:
+        """
+        Model of the client hint headers, which DeviceDetector falls back to.
+        """
+        if not self.headers:
+            return ''
+        from .parser.client_hints import ClientHints
+
+        client_hints = ClientHints.new(dict(self.headers))
+        return client_hints and client_hints.model or ''
+
+    def os_name(self) -> str:
+        return self.details.get('os', {}).get('name') or ''
+
+    def os_version(self) -> str:
+        return self.details.get('os', {}).get('version') or ''
+
+    def pretty_name(self) -> str:
+        return self.details.get('normalized') or self.user_agent or ''
+
+    def pretty_print(self) -> str:
+        if not self.is_known():
+            return self.user_agent
+        os = client = device = 'N/A'
+        if self.os_name():
+            os = f'{self.os_name()} {self.os_version()}'
+        if self.client_name():
+            client = f'{self.client_name()} {self.client_version()} ({self.client_type().title()})'
+        if self.device_model():
+            device = f'{self.device_model()} ({self.device_type().title()})'
+        return f'Client: {client} Device: {device} OS: {os}'.strip()
+
+    def __str__(self) -> str:
+        return self.user_agent
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({self.user_agent!r})'
+
+
+__all__ = ('ParsedResult',)
@@ -0,0 +1,152 @@
+"""
+Shared AhoCorasick scan of a user agent for a set of parsers.
+
+Each parser checks its own AhoCorasick words, and looks up its candidate
+rules with its own LiteralIndex. Parsing a user agent with every parser
+would scan the same string with dozens of automatons. The ParserScanner
+combines the words and literals of all parsers into a single automaton,
+so the user agent is scanned once, and the matches split per parser.
+"""
+
+from collections.abc import Iterable
+
+import ahocorasick_rs
+
+from .literals import LiteralIndex
+from .settings import DDCache
+from .yaml_loader import RegexLoader
+
+
+class ParserScanner:
+    """
+    AhoCorasick automaton of the words and candidate literals of
+    a set of parsers. Parsers are identified by their cache_name.
+    """
+
+    __slots__ = (
+        'automaton',
+        'gated',
+        'indexes',
+        'literal_owners',
+        'patterns',
+        'word_owners',
+    )
+
+    def __init__(self, parsers: Iterable[type[RegexLoader]]) -> None:
+        # Parsers that check AhoCorasick words before checking any rules
+        self.gated: set[str] = set()
+        self.indexes: dict[str, LiteralIndex] = {}
+
+        pattern_ids: dict[str, int] = {}
+        # Parsers having each pattern as AhoCorasick word
+        self.word_owners: list[list[str]] = []
+        # Parsers, and positions of their candidate rules, having each pattern as literal
+        self.literal_owners: list[list[tuple[str, list[int]]]] = []
+
+        def pattern_id(pattern: str) -> int:
+            if (pid := pattern_ids.get(pattern)) is None:
+                pid = pattern_ids[pattern] = len(pattern_ids)
+                self.word_owners.append([])
+                self.literal_owners.append([])
+            return pid
+
+        for Parser in parsers:
+            parser = Parser('', None)  # type: ignore[call-arg]
+            cache_name = parser.cache_name
+
+            if words := parser.load_ahocorasick_words():
+                self.gated.add(cache_name)
+                for word in words:
+                    self.word_owners[pattern_id(word)].append(cache_name)
+
+            index = parser.load_candidate_index()
+            self.indexes[cache_name] = index
+            for literal, positions in zip(index.literals, index.literal_positions):
+                self.literal_owners[pattern_id(literal)].append((cache_name, positions))
+
+        self.patterns = list(pattern_ids)
+        self.automaton = ahocorasick_rs.AhoCorasick(self.patterns) if self.patterns else None
+
+    @classmethod
+    def load(cls, parsers: Iterable[type[RegexLoader]]) -> 'ParserScanner':
+        """
+        Load the scanner of the parsers from DDCache, or build it.
+        """
+        parsers = tuple(parsers)
+        cache_key = tuple(Parser.__name__ for Parser in parsers)
+
+        return DDCache.load('scanners', cache_key, lambda: cls(parsers))
+
+    def scan(self, user_agent: str) -> 'UAScan':
+        """
+        Scan the user agent once for the words and literals of all parsers.
+        """
+        return UAScan(self, user_agent.lower())
+
+
+class UAScan:
+    """
+    Words and candidate rules of each parser found in a single user agent.
+    """
+
+    __slots__ = (
+        'is_ascii',
+        'positions',
+        'scanner',
+        'words',
+    )
+
+    def __init__(self, scanner: ParserScanner, user_agent_lower: str) -> None:
+        self.scanner = scanner
+        self.is_ascii = user_agent_lower.isascii()
+        self.words: dict[str, list[str]] = {}
+        self.positions: dict[str, list[int]] = {}
+
+        if not scanner.automaton:
+            return
+
+        patterns = scanner.patterns
+        word_owners = scanner.word_owners
+        literal_owners = scanner.literal_owners
+        words = self.words
+        positions = self.positions
+
+        matches = scanner.automaton.find_matches_as_indexes(user_agent_lower, overlapping=True)
+        for pid in {pid for pid, _, _ in matches}:
+            for cache_name in word_owners[pid]:
+                words.setdefault(cache_name, []).append(patterns[pid])
+            for cache_name, rule_positions in literal_owners[pid]:
+                positions.setdefault(cache_name, []).extend(rule_positions)
+
+    def ahocorasick_matches(self, cache_name: str) -> bool | list | None:
+        """
+        AhoCorasick words of the parser found in the user agent,
+        or True if the parser has no words, so all rules should be checked.
+
+        None if the parser wasn't scanned for.
+        """
+        if cache_name not in self.scanner.indexes:
+            return None
+        if cache_name not in self.scanner.gated:
+            return True
+        return self.words.get(cache_name, [])
+
+    def candidates(self, cache_name: str) -> list[int] | None:
+        """
+        Positions of the parser's rules that could match the user agent, in ascending order.
+
+        None if the parser wasn't scanned for, or the user agent isn't ASCII.
+        """
+        if not self.is_ascii or (index := self.scanner.indexes.get(cache_name)) is None:
+            return None
+
+        if not (positions := self.positions.get(cache_name)):
+            return index.unindexed
+
+        return sorted(set(positions).union(index.unindexed))
+
+
+__all__ = (
+    'ParserScanner',
+    'UAScan',
+)
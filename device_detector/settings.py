@@ -1,11 +1,14 @@
 from collections import OrderedDict
+from collections.abc import Callable, Hashable
 from copy import deepcopy
 import os
+import threading
 from typing import Any
 
+from .cache import MAX_CACHE_SIZE, ShardedUACache, UACache
+
 # Only match if useragent begins with given regex or there is no letter before it
 BOUNDED_REGEX = r'(?:^|[^A-Z0-9_-]|[^A-Z0-9-]_|sprd-|MZ-)(?:{})'
-MAX_CACHE_SIZE = 1024
 
 
 class LRUDict(OrderedDict):
@@ -16,7 +19,7 @@ class LRUDict(OrderedDict):
     not via iterating over the whole collection with items(), for example.
 
     Expired entries only get purged after insertions or changes, or by
-    manually calling purge().
+    manually calling purge(). Access via [] and insertions are thread-safe.
     """
 
     def __init__(self, *args: Any, maxkeys: int = MAX_CACHE_SIZE, **kwargs: dict[Any, Any]) -> None:
@@ -25,6 +28,7 @@ class LRUDict(OrderedDict):
 
         maxkeys: maximum number of keys being kept.
         """
+        self.lock = threading.RLock()
         super().__init__(*args, **kwargs)
         self.maxkeys = maxkeys
         self.purge()
@@ -33,21 +37,21 @@ class LRUDict(OrderedDict):
         """
         Pop least used keys until maximum keys is reached.
         """
-        overflowing = max(0, len(self) - self.maxkeys)
-        for _ in range(overflowing):
-            self.popitem(last=False)
+        with self.lock:
+            overflowing = max(0, len(self) - self.maxkeys)
+            for _ in range(overflowing):
+                self.popitem(last=False)
 
     def __getitem__(self, key: Any) -> Any:
-        value = super().__getitem__(key)
-        try:
+        with self.lock:
+            value = super().__getitem__(key)
             self.move_to_end(key)
-        except KeyError:
-            pass
-        return value
+            return value
 
     def __setitem__(self, key: Any, value: Any) -> None:
-        super().__setitem__(key, value)
-        self.purge()
+        with self.lock:
+            super().__setitem__(key, value)
+            self.purge()
 
 
 class Cache(dict):
@@ -55,19 +59,100 @@ class Cache(dict):
         'app_details': {},
         'regexes': {},
         'corasick': {},
+        'candidates': {},
+        'scanners': {},
+        'combined': {},
+        'client_hint_models': {},
+        'parser_stats': {},
         'normalize_regexes': [],
         'appids_ignored': set(),
         'appids_secondary': set(),
         'appids_normalized': {},
-        'user_agents': LRUDict(),
+        'bundle': None,
+        'rules_version': '',
     }
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         kwargs.update(deepcopy(self.base))
+        # Created apart, as its locks can't be copied
+        kwargs['user_agents'] = UACache()
         super().__init__(*args, **kwargs)
+        self.locks: dict[Hashable, threading.RLock] = {}
+
+    def lock(self, *key: Hashable) -> threading.RLock:
+        """
+        Lock held while loading the value of the key, created on first use.
+        """
+        try:
+            return self.locks[key]
+        except KeyError:
+            # setdefault is atomic, so racing threads all get the same lock
+            return self.locks.setdefault(key, threading.RLock())
+
+    def load(self, section: str, key: Hashable, build: Callable[[], Any]) -> Any:
+        """
+        Value of the key in the section of the cache, built on first use.
+
+        Threads racing to load the same value wait for the first one to
+        build it, rather than each building and using a copy of their own.
+        """
+        try:
+            return self[section][key]
+        except KeyError:
+            pass
+
+        with self.lock(section, key):
+            values = self[section]
+            try:
+                return values[key]
+            except KeyError:
+                value = values[key] = build()
+                return value
 
     def clear_user_agents(self) -> None:
-        self['user_agents'] = LRUDict()
+        self['user_agents'].clear()
+
+    def configure_user_agents(
+        self,
+        max_entries: int = MAX_CACHE_SIZE,
+        max_bytes: int | None = None,
+        ttl: float | None = None,
+        admission: bool = False,
+        shards: int = 1,
+        **kwargs: Any,
+    ) -> UACache | ShardedUACache:
+        """
+        Replace the cache of parsed user agents with one of the given limits,
+        keeping the most recently used entries that fit.
+
+        With more than one shard, the cache is a ShardedUACache, for
+        servers with many threads. See UACache for the other arguments.
+        """
+        cache: UACache | ShardedUACache
+        if shards > 1:
+            cache = ShardedUACache(
+                shards=shards,
+                max_entries=max_entries,
+                max_bytes=max_bytes,
+                ttl=ttl,
+                admission=admission,
+                **kwargs,
+            )
+        else:
+            cache = UACache(
+                max_entries=max_entries,
+                max_bytes=max_bytes,
+                ttl=ttl,
+                admission=admission,
+                **kwargs,
+            )
+        previous = self['user_agents']
+        for key, value in reversed(previous.hottest(max_entries)):
+            cache.store(key, value)
+        for key, value in previous.worthless_entries():
+            cache.set_worthless(key, value)
+        self['user_agents'] = cache
+        return cache
 
 
 ROOT = os.path.dirname(os.path.abspath(__file__))
@@ -80,8 +165,32 @@ WORTHLESS_UA_TYPES = {
     'Gibberish',
 }
 
+# Spellings of the client hint headers read by ClientHints.new, by header name.
+# Header names are lowercase, with underscores replaced by dashes.
+CLIENT_HINT_HEADERS = {
+    spelling: name
+    for name, spellings in (
+        ('sec-ch-ua', ('http-sec-ch-ua',)),
+        ('sec-ch-ua-arch', ('http-sec-ch-ua-arch', 'architecture')),
+        ('sec-ch-ua-bitness', ('http-sec-ch-ua-bitness', 'bitness')),
+        ('sec-ch-ua-form-factors', ('http-sec-ch-ua-form-factors',)),
+        ('sec-ch-ua-full-version', ('http-sec-ch-ua-full-version', 'uafullversion')),
+        ('sec-ch-ua-full-version-list', ('http-sec-ch-ua-full-version-list',)),
+        ('sec-ch-ua-mobile', ('http-sec-ch-ua-mobile', 'mobile')),
+        ('sec-ch-ua-model', ('http-sec-ch-ua-model', 'model')),
+        ('sec-ch-ua-platform', ('http-sec-ch-ua-platform', 'platform')),
+        ('sec-ch-ua-platform-version', ('http-sec-ch-ua-platform-version', 'platformversion')),
+        ('x-requested-with', ('http-x-requested-with',)),
+        # Keys of the User-Agent Client Hints javascript API
+        ('brands', ()),
+        ('fullversionlist', ()),
+    )
+    for spelling in (name, *spellings)
+}
+
 __all__ = (
     'BOUNDED_REGEX',
+    'CLIENT_HINT_HEADERS',
     'DDCache',
     'LRUDict',
     'ROOT',
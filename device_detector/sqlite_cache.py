@@ -0,0 +1,245 @@
+"""
+Cache of parsed user agents shared by all processes on a host.
+
+Each worker process has its own in-process cache, so without a shared cache
+every worker parses the same user agents. The SQLiteCache stores the parsed
+result of each user agent in a local SQLite database in WAL mode, where
+readers never block, so a parse done by any process serves all of them.
+Use it as the second level of the in-process cache:
+
+    from device_detector import DDCache
+    from device_detector.sqlite_cache import SQLiteCache
+
+    DDCache.configure_user_agents(max_entries=50_000, shared=SQLiteCache('/var/tmp/dd.sqlite3'))
+
+Results are stamped with the rules version, so results parsed by other rules,
+such as by workers still running a previous release, are never served. As
+workers of both releases share the database during a rolling deploy, the
+results of other rules versions are only purged once they are older than the
+ttl, or than VERSION_GRACE if results never expire, or by purge(other_versions=True).
+The cache is best effort: any database error, or result that can't be
+decoded, is treated as a miss. Each thread of each process opens its own
+connection, so concurrent transactions never share a connection.
+"""
+
+import os
+import sqlite3
+import threading
+from collections.abc import Iterable, Mapping
+from time import time
+
+from .bundle import rules_version
+from .cache import CacheBackend
+from .result import ParsedResult
+
+# Purge expired and surplus rows after this many writes
+PURGE_INTERVAL = 1000
+# Seconds after which the rows of other rules versions are purged, if results never expire
+VERSION_GRACE = 24 * 3600
+# Seconds to wait for the write lock before giving up on a write
+BUSY_TIMEOUT = 0.05
+# Maximum number of keys looked up by a single query
+MAX_QUERY_KEYS = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_agents (
+    ua_hash TEXT NOT NULL,
+    rules_version TEXT NOT NULL,
+    stored REAL NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (ua_hash, rules_version)
+) WITHOUT ROWID
+"""
+
+
+class SQLiteCache(CacheBackend):
+    """
+    Parsed results of user agents in a SQLite database, keyed by ua_hash.
+    """
+
+    __slots__ = (
+        '_connections',
+        '_local',
+        '_lock',
+        '_pid',
+        'max_entries',
+        'path',
+        'ttl',
+        'version',
+        'writes',
+    )
+
+    def __init__(self, path: str, ttl: float | None = None, max_entries: int | None = None) -> None:
+        """
+        Args:
+            path: Path of the database file, created if it doesn't exist
+            ttl: Seconds after which results expire, or None to never expire
+            max_entries: Maximum number of stored results, or None for no limit
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.version = rules_version()
+        self.writes = 0
+        self._local = threading.local()
+        # Connections opened by all threads of the current process
+        self._connections: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def connection(self) -> sqlite3.Connection:
+        """
+        Connection of the current thread. A transaction begun on a shared
+        connection would include the statements of other threads, and
+        connections can't be shared with forked processes, so each thread
+        of each process opens its own.
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+
+        connection = sqlite3.connect(
+            self.path,
+            timeout=BUSY_TIMEOUT,
+            isolation_level=None,
+            # Only so that close() can close the connections of all threads
+            check_same_thread=False,
+        )
+        try:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(SCHEMA)
+        except sqlite3.Error:
+            connection.close()
+            raise
+
+        with self._lock:
+            if self._pid != os.getpid():
+                # Connections inherited from the parent process are its own
+                self._connections = []
+                self._pid = os.getpid()
+            self._connections.append(connection)
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        self.purge()
+        return connection
+
+    def get(self, key: str) -> ParsedResult | None:
+        return self.get_many((key,)).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, ParsedResult]:
+        keys = list(keys)
+        min_stored = time() - self.ttl if self.ttl is not None else 0
+        found: dict[str, ParsedResult] = {}
+
+        try:
+            connection = self.connection()
+            for start in range(0, len(keys), MAX_QUERY_KEYS):
+                chunk = keys[start : start + MAX_QUERY_KEYS]
+                rows = connection.execute(
+                    'SELECT ua_hash, result FROM user_agents '
+                    f'WHERE ua_hash IN ({",".join("?" * len(chunk))}) '
+                    'AND rules_version = ? AND stored > ?',
+                    (*chunk, self.version, min_stored),
+                )
+                for key, result in rows:
+                    try:
+                        found[key] = ParsedResult.from_json(result)
+                    except (ValueError, TypeError):
+                        continue
+        except sqlite3.Error:
+            pass
+
+        return found
+
+    def set(self, key: str, result: ParsedResult) -> None:
+        self.set_many({key: result})
+
+    def set_many(self, items: Mapping[str, ParsedResult]) -> None:
+        stored = time()
+        rows = []
+        for key, result in items.items():
+            try:
+                rows.append((key, self.version, stored, result.to_json()))
+            except (ValueError, TypeError):
+                # Results that can't be serialized are only cached in process
+                continue
+        if not rows:
+            return
+
+        try:
+            connection = self.connection()
+        except sqlite3.Error:
+            return
+
+        # Write all rows in a single transaction
+        try:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.executemany('INSERT OR REPLACE INTO user_agents VALUES (?, ?, ?, ?)', rows)
+            connection.execute('COMMIT')
+        except sqlite3.Error:
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            return
+
+        with self._lock:
+            previous_writes = self.writes
+            self.writes += len(items)
+            purge = self.writes // PURGE_INTERVAL != previous_writes // PURGE_INTERVAL
+        if purge:
+            self.purge()
+
+    def purge(self, other_versions: bool = False) -> None:
+        """
+        Delete expired results, the results of other rules versions older
+        than the ttl or VERSION_GRACE, and the oldest results beyond max_entries.
+
+        Args:
+            other_versions: Delete all results of other rules versions, such
+                as once all workers run the current release
+        """
+        now = time()
+        min_stored = now - self.ttl if self.ttl is not None else 0
+        min_other_stored = now if other_versions else now - (self.ttl or VERSION_GRACE)
+        try:
+            connection = self.connection()
+            connection.execute(
+                'DELETE FROM user_agents WHERE stored <= ? OR (rules_version != ? AND stored <= ?)',
+                (min_stored, self.version, min_other_stored),
+            )
+            if self.max_entries is not None:
+                connection.execute(
+                    'DELETE FROM user_agents WHERE (ua_hash, rules_version) IN ('
+                    'SELECT ua_hash, rules_version FROM user_agents '
+                    'ORDER BY stored DESC LIMIT -1 OFFSET ?)',
+                    (self.max_entries,),
+                )
+        except sqlite3.Error:
+            pass
+
+    def clear(self) -> None:
+        try:
+            self.connection().execute('DELETE FROM user_agents')
+        except sqlite3.Error:
+            pass
+
+    def __len__(self) -> int:
+        try:
+            return self.connection().execute('SELECT COUNT(*) FROM user_agents').fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def close(self) -> None:
+        """
+        Close the connections of all threads of the current process.
+        """
+        with self._lock:
+            connections = self._connections if self._pid == os.getpid() else []
+            self._connections = []
+            self._pid = os.getpid()
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
+
+
+__all__ = ('SQLiteCache',)
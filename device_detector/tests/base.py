@@ -12,6 +12,8 @@ try:
 except ImportError:
     from backports.strenum import StrEnum
 from urllib.parse import unquote
+import sys
+import threading
 import unittest
 import yaml
 try:
@@ -20,7 +22,8 @@ except ImportError:
     from yaml import SafeLoader
 
 from device_detector.parser import ClientHints
-from ..settings import ROOT
+from ..result import ParsedResult
+from ..settings import DDCache, ROOT
 from .. import DeviceDetector
 
 
@@ -33,6 +36,50 @@ APPID_TO_NAME = {
     'WAP Browser': '',
 }
 
+# User agents of the tests of the caches and the bulk parsing paths
+CHROME = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/80.0.3987.162 Safari/537.36'
+ANDROID = 'Mozilla/5.0 (Linux; Android 11; SM-A515F) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0 Mobile Safari/537.36'
+BOT = 'Googlebot/2.1 (+http://www.google.com/bot.html)'
+UUID = '0b7e2c8a-6f0d-4d2b-9f3e-7a1c5d9e8b20'
+
+THREADS = 8
+
+
+def parse_result(user_agent: str, headers: dict | None = None) -> ParsedResult:
+    """
+    Record of the user agent, parsed rather than served from the cache.
+    """
+    DDCache.clear_user_agents()
+    return ParsedResult.from_detector(DeviceDetector(user_agent, headers=headers).parse())
+
+
+def run_threads(target, threads: int = THREADS) -> list[BaseException]:
+    """
+    Run the target in the threads at once, and return the exceptions raised.
+    """
+    barrier = threading.Barrier(threads)
+    errors: list[BaseException] = []
+
+    def run(number: int) -> None:
+        barrier.wait()
+        try:
+            target(number)
+        except BaseException as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=run, args=(number,)) for number in range(threads)]
+    # Switch threads as often as possible, to interleave the operations
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    finally:
+        sys.setswitchinterval(interval)
+    return errors
+
 
 class TestInvalidUserAgents(unittest.TestCase):
 
@@ -84,6 +131,9 @@ class Base(unittest.TestCase):
                 fixtures.extend(yaml.load(r, SafeLoader))
         return fixtures
 
+    def fixture_user_agents(self, count):
+        return [fixture['user_agent'] for fixture in self.load_fixtures()[:count]]
+
 
 class DetectorBaseTest(Base):
     Parser = DeviceDetector
@@ -0,0 +1,53 @@
+from unittest import TestCase
+
+from ...cache import FrequencySketch, UACache
+
+
+class TestAdmission(TestCase):
+
+    def test_frequency_sketch(self):
+        sketch = FrequencySketch(1024)
+        for _ in range(3):
+            sketch.increment('a')
+        sketch.increment('b')
+        self.assertEqual(sketch.frequency('a'), 3)
+        self.assertEqual(sketch.frequency('b'), 1)
+        self.assertEqual(sketch.frequency('c'), 0)
+
+        # Counters are halved after sample_size increments
+        for _ in range(sketch.sample_size - sketch.increments):
+            sketch.increment('d')
+        self.assertEqual(sketch.frequency('a'), 1)
+        self.assertEqual(sketch.frequency('d'), 7)
+
+    def test_admission(self):
+        cache = UACache(max_entries=2, admission=True)
+        for key in ('a', 'a', 'b', 'b'):
+            if cache.get(key) is None:
+                cache[key] = key
+
+        # Seen once, so not more often than the least recently used entry
+        self.assertIsNone(cache.get('c'))
+        cache['c'] = 'c'
+        self.assertEqual(list(cache), ['a', 'b'])
+        self.assertEqual(cache.rejections, 1)
+
+        # Admitted once seen more often
+        for _ in range(4):
+            cache.get('c')
+        cache['c'] = 'c'
+        self.assertEqual(list(cache), ['b', 'c'])
+
+    def test_hottest_by_frequency(self):
+        cache = UACache(max_entries=3, admission=True)
+        for key in ('a', 'b', 'c'):
+            cache[key] = key
+        for key in ('b', 'b', 'b', 'c', 'c', 'a'):
+            cache.get(key)
+        self.assertEqual([key for key, _ in cache.hottest()], ['b', 'c', 'a'])
+        self.assertEqual([key for key, _ in UACache().hottest()], [])
+
+
+__all__ = [
+    'TestAdmission',
+]
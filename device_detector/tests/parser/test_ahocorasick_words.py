@@ -0,0 +1,82 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from ...ahocorasick_words import fixture_user_agents, generate, rule_literals, validate
+from ...lazy_regex import RegexLazyIgnore
+from ...parser import (
+    Camera,
+    CarBrowser,
+    Console,
+    DesktopApp,
+    FeedReader,
+    Library,
+    Notebook,
+    OSFragment,
+    PIM,
+    ShellTv,
+)
+
+
+class TestAhoCorasickWords(TestCase):
+
+    def test_rule_literals(self):
+        rule = {'regexes': [RegexLazyIgnore('iPhone'), RegexLazyIgnore('iPad')]}
+        self.assertEqual(rule_literals(rule), {'iphone', 'ipad'})
+        rule = {'regexes': [RegexLazyIgnore('iPhone'), RegexLazyIgnore(r'\d+')]}
+        self.assertIsNone(rule_literals(rule))
+
+    def test_generate(self):
+        fixture_words = generate((Camera, Console, OSFragment))
+        self.assertEqual(
+            [(entry.parser, entry.fixture) for entry in fixture_words],
+            [
+                ('Camera', 'upstream/device/cameras.yml'),
+                ('Console', 'upstream/device/consoles.yml'),
+            ],
+        )
+        camera = fixture_words[0]
+        self.assertFalse(camera.uncovered)
+        self.assertTrue(camera.path.endswith('regexes/ahocorasick/upstream/device/cameras.yml'))
+        for rule in Camera('', None).regex_list:
+            self.assertTrue(rule_literals(rule) <= camera.words)
+
+    def test_validate(self):
+        parsers = (
+            Camera,
+            CarBrowser,
+            Console,
+            DesktopApp,
+            FeedReader,
+            Library,
+            Notebook,
+            PIM,
+            ShellTv,
+        )
+        # User agents of these parsers, among desktop and TV user agents matching few of them
+        user_agents = fixture_user_agents((
+            'tests/fixtures/upstream/camera.yml',
+            'tests/fixtures/upstream/car_browser.yml',
+            'tests/fixtures/upstream/console.yml',
+            'tests/fixtures/upstream/desktop.yml',
+            'tests/fixtures/upstream/feed_reader.yml',
+            'tests/fixtures/upstream/tv.yml',
+            'tests/parser/fixtures/upstream/client/library.yml',
+            'tests/parser/fixtures/upstream/client/pim.yml',
+            'tests/parser/fixtures/upstream/device/notebook.yml',
+        ))
+        self.assertGreater(len(user_agents), 1000)
+        false_negatives, wasted = validate(parsers, user_agents)
+        self.assertEqual(false_negatives, [])
+        self.assertEqual(set(wasted), {Parser.__name__ for Parser in parsers})
+
+    def test_validate_false_negative(self):
+        # A pre-check missing the words of a user agent matching a Camera rule
+        user_agent = 'Mozilla/5.0 (Linux; U; Android 4.0; xx-xx; EK-GC100 Build/IMM76D)'
+        with patch.object(Camera, 'check_all_regexes', return_value=[]):
+            false_negatives, wasted = validate((Camera,), [user_agent])
+        self.assertEqual([negative.user_agent for negative in false_negatives], [user_agent])
+
+
+__all__ = [
+    'TestAhoCorasickWords',
+]
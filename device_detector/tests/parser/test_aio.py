@@ -0,0 +1,88 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from ..base import ANDROID, parse_result
+from ... import aio
+from ...aio import aparse, set_parse_executor
+from ...device_detector import DeviceDetector
+from ...settings import DDCache
+
+
+
+class TestAsyncParse(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.expected = parse_result(ANDROID)
+        DDCache.clear_user_agents()
+        self.release = threading.Event()
+
+    def tearDown(self):
+        DDCache.clear_user_agents()
+        set_parse_executor(None)
+
+    def slow_parse(self):
+        """
+        Hold the parses in the executor until released.
+        """
+        parse = DeviceDetector.parse
+
+        def slow_parse(detector):
+            self.release.wait()
+            return parse(detector)
+
+        return patch.object(DeviceDetector, 'parse', autospec=True, side_effect=slow_parse)
+
+    async def test_parse(self):
+        result = await aparse(ANDROID, {'Cookie': 'a=1'})
+        self.assertEqual(result, self.expected)
+        self.assertEqual(result.device_model(), 'Galaxy A51')
+        self.assertEqual(aio._in_flight, {})
+
+    async def test_cache_hit(self):
+        await aparse(ANDROID)
+        # Cached user agents are returned without running in the executor
+        with patch.object(aio, 'parse_executor') as parse_executor:
+            self.assertEqual(await aparse(ANDROID.upper()), self.expected)
+        parse_executor.assert_not_called()
+
+    async def test_single_flight(self):
+        with self.slow_parse() as parsed:
+            requests = [asyncio.ensure_future(aparse(ANDROID)) for _ in range(50)]
+            await asyncio.sleep(0.01)
+            self.assertEqual(len(aio._in_flight), 1)
+            self.release.set()
+            results = await asyncio.gather(*requests)
+
+        # Concurrent requests of the same user agent share a single parse
+        self.assertEqual(parsed.call_count, 1)
+        self.assertEqual(results, [self.expected] * 50)
+        self.assertEqual(aio._in_flight, {})
+
+    async def test_cancel(self):
+        with self.slow_parse():
+            first = asyncio.ensure_future(aparse(ANDROID))
+            second = asyncio.ensure_future(aparse(ANDROID))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            self.release.set()
+            # Cancelling a request doesn't cancel the parse of the others
+            self.assertEqual(await second, self.expected)
+        self.assertTrue(first.cancelled())
+
+    async def test_executor(self):
+        executor = ThreadPoolExecutor(max_workers=1)
+        set_parse_executor(executor)
+        self.assertIs(aio.parse_executor(), executor)
+        await aparse(ANDROID)
+        executor.shutdown()
+
+        set_parse_executor(None)
+        self.assertEqual(aio.parse_executor()._max_workers, aio.MAX_PARSE_THREADS)
+
+
+__all__ = [
+    'TestAsyncParse',
+]
@@ -0,0 +1,70 @@
+import os
+import pickle
+import tempfile
+from unittest import TestCase
+import yaml
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+from device_detector.bundle import (
+    BUNDLE_FORMAT,
+    build_bundle,
+    fixture_paths,
+    load_bundle,
+    rules_version,
+)
+from device_detector.settings import ROOT
+
+
+class TestRuleBundle(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.bundle_path = build_bundle(os.path.join(cls.tmpdir.name, 'rules.bundle'))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+
+    def test_all_fixtures_bundled(self):
+        fixtures = load_bundle(self.bundle_path)
+        self.assertEqual(set(fixtures), set(fixture_paths()))
+        for yfile in (
+            'appdetails/browser.yml',
+            'regexes/upstream/device/mobiles.yml',
+            'regexes/ahocorasick/upstream/bots.yml',
+            'regexes/ahocorasick/classes/Device.yml',
+        ):
+            self.assertIn(yfile, fixtures)
+
+    def test_bundled_data_matches_yaml(self):
+        fixtures = load_bundle(self.bundle_path)
+        for yfile in (
+            'appdetails/mobile_app.yml',
+            'regexes/upstream/bots.yml',
+            'regexes/upstream/device/televisions.yml',
+            'regexes/ahocorasick/upstream/bots.yml',
+        ):
+            with open(f'{ROOT}/{yfile}', 'r', encoding='utf-8') as yf:
+                yaml_data = yaml.load(yf, SafeLoader)
+            self.assertEqual(pickle.loads(fixtures[yfile]), yaml_data, msg=yfile)
+
+    def test_stale_bundle_rejected(self):
+        stale_path = os.path.join(self.tmpdir.name, 'stale.bundle')
+        with open(stale_path, 'wb') as bf:
+            pickle.dump(
+                {'format': BUNDLE_FORMAT, 'version': f'{rules_version()}-stale', 'fixtures': {}},
+                bf,
+            )
+        self.assertIsNone(load_bundle(stale_path))
+
+    def test_missing_bundle(self):
+        self.assertIsNone(load_bundle(os.path.join(self.tmpdir.name, 'missing.bundle')))
+
+
+__all__ = [
+    'TestRuleBundle',
+]
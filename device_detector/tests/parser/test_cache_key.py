@@ -0,0 +1,119 @@
+from urllib.parse import quote, unquote
+from unittest import TestCase
+
+from ..base import UUID, ParserBaseTest, parse_result
+from ...device_detector import DeviceDetector
+from ...parser.client_hints import client_hint_headers
+from ...settings import DDCache
+from ...utils import canonical_ua, ua_hash
+
+
+class TestCacheKey(TestCase):
+
+    ua = 'Mozilla/5.0 (Linux; Android 10; K) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Mobile Safari/537.36'
+
+    def test_other_headers_ignored(self):
+        hints = {'Sec-CH-UA-Platform': '"Android"', 'Sec-CH-UA-Model': '"SM-A515F"'}
+        request_headers = {
+            'Cookie': 'session=1f2e3d',
+            'X-Request-Id': UUID,
+            **hints,
+            'Accept-Language': 'en-US,en;q=0.9',
+        }
+        self.assertEqual(ua_hash(self.ua, request_headers), ua_hash(self.ua, hints))
+        self.assertEqual(ua_hash(self.ua, {'Cookie': 'session=1f2e3d'}), ua_hash(self.ua))
+        self.assertNotEqual(ua_hash(self.ua, hints), ua_hash(self.ua))
+        self.assertNotEqual(
+            ua_hash(self.ua, hints),
+            ua_hash(self.ua, hints | {'Sec-CH-UA-Model': '"SM-A525F"'}),
+        )
+
+    def test_header_order(self):
+        hints = {'Sec-CH-UA-Platform': '"Android"', 'Sec-CH-UA-Model': '"SM-A515F"'}
+        self.assertEqual(ua_hash(self.ua, hints), ua_hash(self.ua, dict(reversed(hints.items()))))
+
+    def test_header_spellings(self):
+        self.assertEqual(
+            ua_hash(self.ua, {'Sec-CH-UA-Platform': 'Android', 'X-Requested-With': 'com.example'}),
+            ua_hash(
+                self.ua,
+                {'HTTP_SEC_CH_UA_PLATFORM': 'Android', 'http-x-requested-with': 'com.example'},
+            ),
+        )
+        self.assertEqual(
+            ua_hash(self.ua, {'Sec-CH-UA-Platform-Version': '13'}),
+            ua_hash(self.ua, {'platformVersion': '13'}),
+        )
+
+    def test_client_hint_headers(self):
+        headers = {
+            'Cookie': 'session=1f2e3d',
+            'Sec-CH-UA-Mobile': '?1',
+            'X-Requested-With': 'XMLHttpRequest',
+            'brands': [{'brand': 'Chromium', 'version': '120'}],
+        }
+        self.assertEqual(
+            client_hint_headers(headers),
+            {'Sec-CH-UA-Mobile': '?1', 'brands': [{'brand': 'Chromium', 'version': '120'}]},
+        )
+        app = {'X-Requested-With': 'com.example.app'}
+        self.assertEqual(client_hint_headers(app), app)
+        self.assertEqual(client_hint_headers(None), {})
+
+    def test_canonical_user_agent(self):
+        variants = (
+            self.ua,
+            f'{self.ua} (5836419392)',
+            self.ua.replace(' ', '%20'),
+            f'sprd-{self.ua}',
+            f'(null) {self.ua}',
+        )
+        self.assertEqual({canonical_ua(variant) for variant in variants}, {self.ua.lower()})
+
+        DDCache.clear_user_agents()
+        parsed = DeviceDetector(variants[-1]).parse()
+        self.assertEqual(parsed.user_agent, self.ua)
+        for variant in variants:
+            cached = DeviceDetector(variant)
+            self.assertTrue(cached.parsed)
+            self.assertEqual(cached.user_agent, self.ua)
+            self.assertEqual(cached.os_version(), parsed.os_version())
+
+    def test_cache_hit(self):
+        DDCache.clear_user_agents()
+        headers = {'Sec-CH-UA-Platform': '"Android"', 'X-Request-Id': '1'}
+        first = DeviceDetector(self.ua, headers=headers).parse()
+        self.assertEqual(first.headers, {'Sec-CH-UA-Platform': '"Android"'})
+
+        second = DeviceDetector(self.ua, headers=headers | {'X-Request-Id': '2'})
+        self.assertTrue(second.parsed)
+        self.assertEqual(second.os_name(), first.os_name())
+
+        # A worthless user agent with only other headers is still worthless
+        self.assertTrue(DeviceDetector(UUID, headers={'Cookie': 'a=1'}).parse().is_worthless())
+
+
+class TestCanonicalUserAgent(ParserBaseTest):
+    """
+    Variants of a user agent that share its cache key should parse the same.
+    """
+
+    fixture_files = [
+        'tests/fixtures/upstream/clienthints-app.yml',
+        'tests/fixtures/upstream/mobile_apps.yml',
+        'tests/fixtures/upstream/unknown.yml',
+    ]
+
+    def test_variants(self):
+        for fixture in self.load_fixtures():
+            ua = unquote(fixture['user_agent'])
+            headers = fixture.get('headers')
+            parsed = parse_result(ua, headers)
+            for variant in (f'{ua} (5836419392)', quote(ua, safe='/;:() '), f'(null) {ua}'):
+                self.assertEqual(parse_result(variant, headers), parsed, msg=variant)
+
+
+__all__ = [
+    'TestCacheKey',
+    'TestCanonicalUserAgent',
+]
@@ -0,0 +1,157 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+from contextlib import redirect_stderr
+from hashlib import blake2s
+from unittest import TestCase
+
+from ..base import ANDROID, BOT
+from ...cli import DistinctCounter, main, parse_line
+from ...settings import DDCache
+
+COMBINED = '203.0.113.9 - - [10/Oct/2025:13:55:36 +0000] "GET /a HTTP/1.1" 200 2326 "https://example.com/" "{}"'
+
+
+class TestParseLine(TestCase):
+
+    def test_combined(self):
+        self.assertEqual(parse_line(COMBINED.format(ANDROID), 'combined'), (ANDROID, None))
+        self.assertEqual(parse_line(COMBINED.format(ANDROID), 'auto'), (ANDROID, None))
+        self.assertEqual(parse_line(COMBINED.format('-'), 'combined'), ('', None))
+        self.assertIsNone(parse_line(ANDROID, 'combined'))
+
+    def test_combined_escapes(self):
+        # Quotes are escaped as \" by Apache, and as \x22 by nginx
+        for escaped in (r'Agent \"quoted\"', r'Agent \x22quoted\x22'):
+            self.assertEqual(parse_line(COMBINED.format(escaped), 'auto')[0], 'Agent "quoted"')
+
+    def test_combined_extra_fields(self):
+        line = COMBINED.format(ANDROID) + r' "\x22Android\x22" "-" "0.123"'
+        self.assertEqual(
+            parse_line(line, 'combined', extra_fields=['sec-ch-ua-platform', 'sec-ch-ua-model']),
+            (ANDROID, {'sec-ch-ua-platform': '"Android"'}),
+        )
+
+    def test_json(self):
+        line = json.dumps({
+            'time': '2025-10-10T13:55:36Z',
+            'status': 200,
+            'http_user_agent': ANDROID,
+            'http_sec_ch_ua_platform': '"Android"',
+            'http_sec_ch_ua_model': '-',
+        })
+        user_agent, headers = parse_line(line, 'auto')
+        self.assertEqual(user_agent, ANDROID)
+        self.assertEqual(headers['http_sec_ch_ua_platform'], '"Android"')
+        self.assertNotIn('http_sec_ch_ua_model', headers)
+        self.assertIsNone(parse_line('{"status": 200}', 'json'))
+        self.assertIsNone(parse_line('{not json', 'json'))
+
+    def test_json_nested(self):
+        line = json.dumps({
+            'request': {'headers': {'user-agent': ANDROID}},
+            'headers': {'Sec-CH-ANDROID-Mobile': '?1'},
+        })
+        self.assertEqual(
+            parse_line(line, 'json', ua_field='request.headers.user-agent'),
+            (ANDROID, {'Sec-CH-ANDROID-Mobile': '?1'}),
+        )
+
+    def test_raw(self):
+        self.assertEqual(parse_line(ANDROID, 'ua'), (ANDROID, None))
+        self.assertEqual(parse_line(BOT, 'auto'), (BOT, None))
+        self.assertIsNone(parse_line('', 'auto'))
+
+
+class TestDistinctCounter(TestCase):
+
+    def test_count(self):
+        for distinct in (10, 1000, 100_000):
+            counter = DistinctCounter()
+            for number in range(distinct):
+                key = blake2s(str(number).encode()).hexdigest()
+                counter.add(key)
+                counter.add(key)
+            self.assertAlmostEqual(counter.count() / distinct, 1, delta=0.05)
+
+
+class TestCommandLine(TestCase):
+
+    def setUp(self):
+        DDCache.clear_user_agents()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.tmp.name, 'out')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        DDCache.clear_user_agents()
+
+    def write_log(self, name: str, lines: list[str]) -> str:
+        path = os.path.join(self.tmp.name, name)
+        opener = gzip.open if name.endswith('.gz') else open
+        with opener(path, 'wt', encoding='utf-8') as log:
+            log.write(''.join(f'{line}\n' for line in lines))
+        return path
+
+    def run_main(self, *args: str) -> str:
+        stderr = io.StringIO()
+        with redirect_stderr(stderr):
+            self.assertEqual(main([*args, '-o', self.output]), 0)
+        return stderr.getvalue()
+
+    def test_jsonl(self):
+        log = self.write_log('access.log', [
+            COMBINED.format(ANDROID),
+            COMBINED.format(BOT),
+            json.dumps({'user_agent': ANDROID}),
+            '',
+            COMBINED.format(ANDROID),
+        ])
+        stats = self.run_main(log, '--fields', 'user_agent,device_model,is_bot,device_type')
+        with open(self.output, encoding='utf-8') as output:
+            records = [json.loads(line) for line in output]
+
+        self.assertEqual([record['user_agent'] for record in records], [ANDROID, BOT, ANDROID, ANDROID])
+        self.assertEqual(records[0], {
+            'user_agent': ANDROID,
+            'device_model': 'Galaxy A51',
+            'is_bot': False,
+            'device_type': 'smartphone',
+        })
+        self.assertTrue(records[1]['is_bot'])
+        self.assertIn('5 lines in', stats)
+        self.assertIn('4 user agents, 1 lines without a user agent', stats)
+        self.assertIn('~2 unique user agents (50.0%)', stats)
+
+    def test_csv(self):
+        first = self.write_log('first.log.gz', [COMBINED.format(ANDROID)])
+        second = self.write_log('second.log', [BOT])
+        self.run_main(first, second, '--output-format', 'csv', '--fields', 'os_name,client_name')
+        with open(self.output, encoding='utf-8', newline='') as output:
+            rows = list(csv.reader(output))
+        self.assertEqual(rows, [
+            ['os_name', 'client_name'],
+            ['Android', 'Chrome Mobile'],
+            ['', 'Googlebot'],
+        ])
+
+    def test_cache_hit_rate(self):
+        log = self.write_log('access.log', [ANDROID] * 10 + [BOT] * 10)
+        stats = self.run_main(log, '--batch-size', '5', '--format', 'ua')
+        # Each batch looks up its distinct user agent once, which is parsed by the first
+        # batch of each, and cached for the second.
+        self.assertIn('50.0% cache hit rate of 4 lookups', stats)
+
+    def test_unknown_field(self):
+        with redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            main(['--fields', 'user_agent,color'])
+
+
+__all__ = [
+    'TestCommandLine',
+    'TestDistinctCounter',
+    'TestParseLine',
+]
@@ -0,0 +1,73 @@
+from urllib.parse import unquote
+
+from ..base import ParserBaseTest
+from ...combined import CombinedRegexList
+from ...lazy_regex import RegexLazyIgnore
+from ...parser import OS, MobileApp
+
+
+class CombinedOS(OS):
+    COMBINED_REGEXES = True
+
+
+class TestCombinedRegexList(ParserBaseTest):
+    """
+    The combined alternations should find the same first
+    rule as searching each rule of the regex_list in turn.
+    """
+
+    def test_first_match(self):
+        for Parser, fixture_file in (
+            (OS, 'tests/parser/fixtures/upstream/oss.yml'),
+            (MobileApp, 'tests/parser/fixtures/upstream/client/mobile_app.yml'),
+        ):
+            self.fixture_files = [fixture_file]
+            regex_list = Parser('', None).regex_list
+            combined = CombinedRegexList(regex_list, chunk_size=100)
+
+            for fixture in self.load_fixtures():
+                ua = unquote(fixture['user_agent'])
+                expected = next((rule for rule in regex_list if rule['regex'].search(ua)), None)
+                rule_match = combined.first_match(ua)
+                if expected is None:
+                    self.assertIsNone(rule_match, msg=ua)
+                    continue
+
+                rule, matched = rule_match
+                self.assertIs(rule, expected, msg=ua)
+                self.assertEqual(matched.captures(), expected['regex'].search(ua).captures())
+
+    def test_uncombinable_rules_checked_separately(self):
+        rules = [
+            {'regex': RegexLazyIgnore(pattern)}
+            for pattern in (r'Foo/\d', r'(\w)\1', r'(?P<name>Bar)', r'(?i)Baz', r'Qux')
+        ]
+        combined = CombinedRegexList(rules)
+        self.assertEqual(combined.chunks[1:4], [1, 2, 3])
+        self.assertEqual(len(combined.chunks), 5)
+        self.assertIs(combined.first_match('qux xx')[0], rules[1])
+        self.assertIs(combined.first_match('qux bar')[0], rules[2])
+        self.assertIs(combined.first_match('qux foo/1')[0], rules[0])
+
+    def test_first_match_searches(self):
+        rules = [
+            {'regex': RegexLazyIgnore(pattern)}
+            for pattern in (r'Foo/\d', r'(\w)\1', r'(?P<name>Bar)', r'(?i)Baz', r'Qux')
+        ]
+        combined = CombinedRegexList(rules)
+        # The alternation of rule 0, then rule 1 on its own
+        rule_match, searches = combined.first_match_searches('qux xx')
+        self.assertIs(rule_match[0], rules[1])
+        self.assertEqual(searches, 2)
+        # The alternation of rule 0, and rule 0 again for its captures
+        self.assertEqual(combined.first_match_searches('foo/1')[1], 2)
+        self.assertEqual(combined.first_match_searches('none'), (None, 5))
+
+    def test_parse_with_combined_regexes(self):
+        ua = 'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:74.0) Gecko/20100101 Firefox/74.0'
+        self.assertEqual(CombinedOS(ua, None).parse().ua_data, OS(ua, None).parse().ua_data)
+
+
+__all__ = [
+    'TestCombinedRegexList',
+]
@@ -0,0 +1,154 @@
+from unittest import TestCase
+
+from ...device_detector import DeviceDetector
+from ...lazy_regex import RegexLazyIgnore
+from ...literals import MIN_INDEXED_MODELS, LiteralIndex, ModelList, required_literals
+from ...parser import Bot, Browser, Device, Library
+from ...parser.client_hints import ClientHints
+from ...scanner import ParserScanner
+from ...settings import BOUNDED_REGEX, DDCache
+
+
+class TestRequiredLiterals(TestCase):
+
+    def test_literals(self):
+        for pattern, literals in (
+            (r'Chrome/(\d+[\.\d]+)', {'chrome/'}),
+            (r'(?:Chrome|Firefox)/(\d+[\.\d]+)', {'chrome', 'firefox'}),
+            (r'[Ss]amsung[ _-]?(?:SM-)?G9', {'samsung'}),
+            (r'(?:Opera )?Mini(?:/| )', {'mini'}),
+            (r'Nexus(?: \d+)+', {'nexus'}),
+            (BOUNDED_REGEX.format(r'Googlebot(?:-Mobile)?'), {'googlebot'}),
+        ):
+            self.assertEqual(required_literals(pattern), literals, msg=pattern)
+
+    def test_no_literals(self):
+        for pattern in (
+            r'\d+[a-z]?',
+            r'(?:Nexus|\d+)/',
+            r'(?:Kindle)?\d',
+            r'[[:alpha:]]+Phone',
+            r'(?P<broken',
+        ):
+            self.assertIsNone(required_literals(pattern), msg=pattern)
+
+
+class TestLiteralIndex(TestCase):
+
+    def test_candidates_in_order(self):
+        index = LiteralIndex([r'Chrome/', r'\d+', r'CriOS|Chrome', r'Firefox/'])
+        self.assertEqual(index.unindexed, [1])
+        self.assertEqual(index.candidates('mozilla/5.0 chrome/80.0'), [0, 1, 2])
+        self.assertEqual(index.candidates('mozilla/5.0 firefox/74.0'), [1, 3])
+        self.assertEqual(index.candidates('curl/7.64.1'), [1])
+
+    def test_parser_candidates(self):
+        ua = 'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)'
+        bot = Bot(ua, None)
+        candidates = bot.candidate_regexes()
+        self.assertLess(len(candidates), len(bot.regex_list))
+        self.assertEqual(
+            next(r for r in candidates if r['regex'].search(ua)),
+            next(r for r in bot.regex_list if r['regex'].search(ua)),
+        )
+
+    def test_non_ascii_checks_all_rules(self):
+        browser = Browser('Mozilla/5.0 Chrome/80.0 Ünïcödé', None)
+        self.assertIs(browser.candidate_regexes(), browser.regex_list)
+
+
+class TestModelList(TestCase):
+
+    def models(self, *patterns: str) -> ModelList:
+        return ModelList({'regex': RegexLazyIgnore(pattern), 'model': pattern} for pattern in patterns)
+
+    def test_candidates_in_order(self):
+        fillers = [f'Filler{n}' for n in range(MIN_INDEXED_MODELS)]
+        models = self.models(r'SM-G(\d+)', r'\d+[a-z]', r'SM-A(\d+)', *fillers, r'Galaxy')
+        self.assertEqual(
+            [model['model'] for model in models.candidates('mozilla/5.0 (sm-a515f) galaxy')],
+            [r'\d+[a-z]', r'SM-A(\d+)', 'Galaxy'],
+        )
+
+    def test_few_models_not_indexed(self):
+        models = self.models(r'SM-G(\d+)', r'SM-A(\d+)')
+        self.assertIs(models.candidates('sm-a515f'), models)
+        self.assertIsNone(models.literal_index)
+
+    def test_non_ascii_checks_all_models(self):
+        models = self.models(*(f'Model{n}' for n in range(MIN_INDEXED_MODELS)))
+        self.assertIs(models.candidates('model1 ünïcödé'), models)
+
+    def test_brand_models(self):
+        ua = 'Mozilla/5.0 (Linux; Android 11; SM-A515F) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0 Mobile Safari/537.36'
+        device = Device(ua, None)
+        rule, _ = device.first_matching_rule()
+        self.assertIsInstance(rule['models'], ModelList)
+        self.assertLess(len(rule['models'].candidates(device.user_agent_lower)), len(rule['models']))
+        ua_data = device.parse().ua_data
+        self.assertEqual(ua_data['brand'], 'Samsung')
+        self.assertEqual(ua_data['model'], 'Galaxy A51')
+
+
+class TestParserScanner(TestCase):
+
+    def test_shared_scan_matches_parser_scans(self):
+        ua = 'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html) curl/7.64.1'
+        scan = ParserScanner.load((Bot, Library)).scan(ua)
+        for Parser in (Bot, Library):
+            parser = Parser(ua, None)
+            self.assertEqual(
+                bool(scan.ahocorasick_matches(parser.cache_name)),
+                bool(parser.check_all_regexes()),
+            )
+            self.assertEqual(
+                scan.candidates(parser.cache_name),
+                parser.load_candidate_index().candidates(parser.user_agent_lower),
+            )
+
+    def test_parser_not_scanned(self):
+        scan = ParserScanner.load((Bot,)).scan('Googlebot/2.1')
+        self.assertIsNone(scan.ahocorasick_matches('Browser'))
+        self.assertIsNone(scan.candidates('Browser'))
+
+    def test_detector_parsers_use_scan(self):
+        ua = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/80.0.3987.162 Safari/537.36'
+        DDCache.clear_user_agents()
+        detector = DeviceDetector(ua).parse()
+        self.assertEqual(detector.client_name(), 'Chrome')
+        self.assertIsNone(detector._scan)
+        self.assertIs(detector.client.scan.scanner, DeviceDetector.parser_scanner())
+
+
+class TestClientHintModelIndex(TestCase):
+
+    def test_candidates_include_matching_models(self):
+        device = Device('', None)
+        index = device.load_client_hint_model_index()
+        for ch_model in ('SM-G991B', 'Pixel 7', 'Redmi Note 8 Pro', 'moto g(60)', 'Ünïcödé 5'):
+            candidates = index.candidates(ch_model)
+            if ch_model.isascii():
+                self.assertLess(len(candidates), len(device.regex_list) // 2, msg=ch_model)
+            for position, rule in enumerate(device.regex_list):
+                models = rule.get('models', [])
+                if not models and rule['regex'].search(ch_model):
+                    self.assertIn(-1, candidates[position], msg=ch_model)
+                for model_position, model in enumerate(models):
+                    if model['regex'].search(ch_model):
+                        self.assertIn(model_position, candidates[position], msg=ch_model)
+
+    def test_parse_client_hint_model(self):
+        ua = 'Mozilla/5.0 (Linux; Android 10; K) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Mobile Safari/537.36'
+        client_hints = ClientHints.new({'Sec-CH-UA-Model': 'SM-G991B'})
+        ua_data = Device(ua, client_hints).parse().ua_data
+        self.assertEqual(ua_data['brand'], 'Samsung')
+        self.assertEqual(ua_data['model'], 'Galaxy S21 5G')
+
+
+__all__ = [
+    'TestClientHintModelIndex',
+    'TestLiteralIndex',
+    'TestModelList',
+    'TestParserScanner',
+    'TestRequiredLiterals',
+]
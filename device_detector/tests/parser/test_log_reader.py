@@ -0,0 +1,86 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from ..base import ANDROID
+from ...cli import parse_line
+from ...log_reader import map_user_agents
+
+COMBINED = '203.0.113.9 - - [10/Oct/2025:13:55:36 +0000] "GET /a HTTP/1.1" 200 2326 "-" "{}"{}'
+
+
+class TestMapUserAgents(TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'access.log')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_log(self, data: bytes) -> None:
+        with open(self.path, 'wb') as log:
+            log.write(data)
+
+    def test_lines(self):
+        lines = [
+            COMBINED.format(ANDROID, ''),
+            COMBINED.format(r'Agent \"quoted\" \x22nginx\x22', ''),
+            COMBINED.format('-', ''),
+            '',
+            'not a log line',
+            COMBINED.format('Agent', ' "extra" "fields"'),
+            COMBINED.format('Ünïcode Agent', '\r'),
+        ]
+        self.write_log('\n'.join(lines).encode('utf-8'))
+        expected = [parse_line(line.rstrip('\r'), 'combined') for line in lines]
+        self.assertEqual(list(map_user_agents(self.path)), expected)
+        self.assertEqual(expected[1], ('Agent "quoted" "nginx"', None))
+        self.assertIsNone(expected[3])
+
+        # A newline at the end of the file doesn't add an empty line
+        self.write_log('\n'.join(lines).encode('utf-8') + b'\n')
+        self.assertEqual(list(map_user_agents(self.path)), expected)
+
+    def test_extra_fields(self):
+        extra_fields = ['sec-ch-ua-platform', 'sec-ch-ua-model']
+        lines = [
+            COMBINED.format(ANDROID, r' "\x22Android\x22" "-" "0.123"'),
+            COMBINED.format(ANDROID, ' "-" "\\"SM-A515F\\""'),
+            COMBINED.format(ANDROID, ''),
+        ]
+        self.write_log('\n'.join(lines).encode('utf-8'))
+        self.assertEqual(
+            list(map_user_agents(self.path, extra_fields)),
+            [parse_line(line, 'combined', extra_fields=extra_fields) for line in lines],
+        )
+
+    def test_invalid_utf8(self):
+        self.write_log(COMBINED.format('Agent \udcff', '').encode('utf-8', 'surrogateescape'))
+        self.assertEqual(list(map_user_agents(self.path)), [('Agent �', None)])
+
+    def test_empty_file(self):
+        self.write_log(b'')
+        self.assertEqual(list(map_user_agents(self.path)), [])
+
+    def test_decode_once(self):
+        self.write_log('\n'.join([COMBINED.format(ANDROID, '')] * 100).encode('utf-8'))
+        with patch('device_detector.log_reader.decode', side_effect=bytes.decode) as decode:
+            self.assertEqual(len(list(map_user_agents(self.path))), 100)
+        self.assertEqual(decode.call_count, 1)
+
+    def test_decoded_limit(self):
+        extra_fields = ['sec-ch-ua-platform']
+        lines = [COMBINED.format(f'Agent {number}', f' "Platform {number}"') for number in range(10)]
+        self.write_log('\n'.join(lines).encode('utf-8'))
+        with patch('device_detector.log_reader.MAX_DECODED', 3):
+            self.assertEqual(
+                list(map_user_agents(self.path, extra_fields)),
+                [parse_line(line, 'combined', extra_fields=extra_fields) for line in lines],
+            )
+
+
+__all__ = [
+    'TestMapUserAgents',
+]
@@ -0,0 +1,97 @@
+import multiprocessing
+from unittest.mock import patch
+
+from ..base import ParserBaseTest
+from ...device_detector import DeviceDetector
+from ...parallel import ParallelParser, parse_chunk, parse_parallel
+from ...settings import DDCache
+
+
+class TestParallelParser(ParserBaseTest):
+
+    fixture_files = [
+        'tests/fixtures/upstream/smartphone-1.yml',
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.parser = ParallelParser(processes=2, chunk_size=50)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.parser.close()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        DDCache.clear_user_agents()
+        self.user_agents = self.fixture_user_agents(100)
+
+    def tearDown(self):
+        DDCache.clear_user_agents()
+        super().tearDown()
+
+    def test_input_order(self):
+        headers = {'Sec-CH-UA-Platform': '"Android"', 'Sec-CH-UA-Platform-Version': '"13.0.0"'}
+        items = [*self.user_agents, (self.user_agents[0], headers), *reversed(self.user_agents)]
+        expected = DeviceDetector.parse_many(items)
+        DDCache.clear_user_agents()
+        self.assertEqual(self.parser.parse_many(items), expected)
+
+    def test_distinct_user_agents(self):
+        submit = self.parser.executor.submit
+        with patch.object(self.parser.executor, 'submit', side_effect=submit) as submitted:
+            results = self.parser.parse_many(self.user_agents[:10] * 20)
+        self.assertEqual(len(results), 200)
+        # The user agents repeated in later chunks are only sent once
+        self.assertEqual(submitted.call_count, 1)
+        self.assertEqual(len(submitted.call_args.args[1]), 10)
+        # and are cached in this process
+        with patch.object(self.parser.executor, 'submit') as submitted:
+            self.assertEqual(self.parser.parse_many(self.user_agents[:10]), results[:10])
+        submitted.assert_not_called()
+
+    def test_backpressure(self):
+        read = 0
+
+        def user_agents():
+            nonlocal read
+            while True:
+                read += 1
+                yield self.user_agents[read % len(self.user_agents)]
+
+        results = self.parser.iparse_many(user_agents())
+        next(results)
+        # Two chunks per process are in flight before the first result
+        self.assertEqual(read, 4 * 50)
+        for _ in range(99):
+            next(results)
+        self.assertEqual(read, 5 * 50)
+        results.close()
+
+    def test_parse_parallel(self):
+        expected = DeviceDetector.parse_many(self.user_agents[:20])
+        DDCache.clear_user_agents()
+        self.assertEqual(list(parse_parallel(self.user_agents[:20], processes=1)), expected)
+
+    def test_parse_chunk(self):
+        keys, inputs = DeviceDetector.batch_keys(self.user_agents[:5])
+        parsed = parse_chunk(inputs, skip_device_detection=True)
+        self.assertEqual(list(parsed), keys)
+        self.assertEqual([result.ua_hash for result in parsed.values()], keys)
+
+    def test_gc_not_frozen(self):
+        with patch('device_detector.warmup.gc.freeze') as freeze:
+            parser = ParallelParser(processes=1, mp_context=multiprocessing.get_context('fork'))
+            parser.close()
+        freeze.assert_not_called()
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            ParallelParser(processes=0)
+
+
+__all__ = [
+    'TestParallelParser',
+]
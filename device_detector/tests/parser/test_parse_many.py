@@ -0,0 +1,85 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from ..base import ANDROID, BOT, CHROME, UUID, parse_result
+from ...cache import UACache
+from ...device_detector import DeviceDetector
+from ...settings import DDCache
+
+
+class TestParseMany(TestCase):
+
+    def setUp(self):
+        DDCache.clear_user_agents()
+
+    def tearDown(self):
+        DDCache.clear_user_agents()
+
+    def test_input_order(self):
+        headers = {'Sec-CH-UA-Platform': '"Android"', 'Sec-CH-UA-Platform-Version': '"13.0.0"'}
+        items = [
+            CHROME,
+            (ANDROID, headers),
+            BOT,
+            CHROME,
+            UUID,
+            (ANDROID, None),
+            '',
+            f'{CHROME} (5836419392)',
+        ]
+        expected = [
+            parse_result(item) if isinstance(item, str) else parse_result(*item) for item in items
+        ]
+        DDCache.clear_user_agents()
+        self.assertEqual(DeviceDetector.parse_many(items, batch_size=3), expected)
+        # Parsed results are served from the cache
+        self.assertEqual(DeviceDetector.parse_many(items), expected)
+
+    def test_list_client_hints(self):
+        headers = {
+            'brands': [{'brand': 'Google Chrome', 'version': '120'}],
+            'fullVersionList': [{'brand': 'Google Chrome', 'version': '120.0.6099.43'}],
+            'formFactors': ['Mobile'],
+            'platform': 'Android',
+            'model': 'SM-A515F',
+        }
+        expected = parse_result(ANDROID, headers)
+        DDCache.clear_user_agents()
+        results = DeviceDetector.parse_many([(ANDROID, headers), (ANDROID, headers)])
+        self.assertEqual(results, [expected, expected])
+
+    def test_parse_once(self):
+        items = [
+            CHROME,
+            BOT,
+            CHROME.upper(),
+            BOT,
+            (CHROME, {'Cookie': 'a=1'}),
+        ]
+        parse = DeviceDetector.parse
+        with patch.object(DeviceDetector, 'parse', autospec=True, side_effect=parse) as parsed:
+            results = DeviceDetector.parse_many(items * 10)
+        # Case and headers that aren't client hints don't change the cache key
+        self.assertEqual(parsed.call_count, 2)
+        self.assertEqual(len(results), 50)
+        self.assertEqual(
+            {result.ua_hash for result in results},
+            {results[0].ua_hash, results[1].ua_hash},
+        )
+
+    def test_batches(self):
+        get_many = UACache.get_many
+        with patch.object(UACache, 'get_many', autospec=True, side_effect=get_many) as get_many:
+            results = DeviceDetector.iparse_many(iter([CHROME, BOT] * 5), batch_size=4)
+            self.assertEqual(get_many.call_count, 0)
+            self.assertEqual(next(results).client_name(), 'Chrome')
+            self.assertEqual(get_many.call_count, 1)
+            self.assertEqual(len(list(results)), 9)
+        # Each batch looks up its distinct keys at once
+        self.assertEqual(get_many.call_count, 3)
+        self.assertEqual(len(get_many.call_args_list[0].args[1]), 2)
+
+
+__all__ = [
+    'TestParseMany',
+]
@@ -0,0 +1,148 @@
+import pickle
+from urllib.parse import unquote
+
+from ..base import ANDROID, BOT, CHROME, UUID, ParserBaseTest, parse_result
+from ...device_detector import DeviceDetector, SoftwareDetector
+from ...result import ParsedResult
+from ...settings import DDCache
+
+
+class TestParsedResult(ParserBaseTest):
+
+    ACCESSORS = (
+        'is_known',
+        'is_bot',
+        'is_mobile',
+        'is_desktop',
+        'engine',
+        'client_name',
+        'client_version',
+        'client_type',
+        'preferred_client_name',
+        'device_type',
+        'device_brand',
+        'device_model',
+        'os_name',
+        'os_version',
+        'pretty_print',
+    )
+
+    DETECTOR_ACCESSORS = (
+        *ACCESSORS,
+        'is_worthless',
+        'is_television',
+        'is_feature_phone',
+        'uses_mobile_browser',
+        'client_application_id',
+        'secondary_client_name',
+        'secondary_client_version',
+        'secondary_client_type',
+        'preferred_client_version',
+        'preferred_client_type',
+        'pretty_name',
+    )
+
+    def test_cached_result(self):
+        detector = DeviceDetector(ANDROID).parse()
+        result = DDCache['user_agents'][detector.ua_hash]
+
+        self.assertIsInstance(result, ParsedResult)
+        for accessor in self.DETECTOR_ACCESSORS:
+            self.assertEqual(getattr(result, accessor)(), getattr(detector, accessor)(), msg=accessor)
+        self.assertEqual(result.all_details, detector.all_details)
+        self.assertEqual(ParsedResult.from_json(result.to_json()), result)
+        self.assertLess(result.approximate_size(), 4096)
+
+    def test_first_and_cached_parse(self):
+        """
+        A cached user agent is restored as the DeviceDetector of its first parse.
+        """
+        fixtures = []
+        for fixture_file in (
+            'tests/fixtures/upstream/bots.yml',
+            'tests/fixtures/upstream/clienthints.yml',
+            'tests/fixtures/upstream/desktop.yml',
+            'tests/fixtures/upstream/smartphone-1.yml',
+            'tests/fixtures/upstream/tv.yml',
+        ):
+            self.fixture_files = [fixture_file]
+            fixtures.extend(self.load_fixtures()[::5])
+        fixtures.append({'user_agent': UUID})
+
+        DDCache.clear_user_agents()
+        for fixture in fixtures:
+            ua = unquote(fixture['user_agent'])
+            headers = fixture.get('headers')
+            first = DeviceDetector(ua, headers=headers).parse()
+            cached = DeviceDetector(ua, headers=headers).parse()
+
+            self.assertIsNot(cached, first)
+            self.assertIs(type(cached), DeviceDetector, msg=ua)
+            self.assertEqual(cached.all_details, first.all_details, msg=ua)
+            for accessor in self.DETECTOR_ACCESSORS:
+                self.assertEqual(
+                    getattr(cached, accessor)(), getattr(first, accessor)(), msg=(ua, accessor)
+                )
+            for parser in ('os', 'client', 'device', 'bot'):
+                self.assertIs(
+                    type(getattr(cached, parser)), type(getattr(first, parser)), msg=(ua, parser)
+                )
+            for name in ('user_agent', 'ua_hash', 'headers', 'skip_bot_detection'):
+                self.assertEqual(getattr(cached, name), getattr(first, name), msg=(ua, name))
+            self.assertEqual(cached.client_hints is None, first.client_hints is None)
+
+    def test_cached_details_copied(self):
+        DeviceDetector(CHROME).parse()
+        DeviceDetector(CHROME).parse().all_details['os']['name'] = 'Changed'
+        self.assertEqual(DeviceDetector(CHROME).parse().os_name(), 'GNU/Linux')
+
+    def test_skip_flags(self):
+        first = SoftwareDetector(ANDROID).parse()
+        cached = SoftwareDetector(ANDROID).parse()
+        self.assertIs(type(cached), SoftwareDetector)
+        self.assertTrue(cached.skip_device_detection)
+        self.assertIsNone(cached.device)
+        self.assertEqual(cached.all_details, first.all_details)
+
+    def test_restored_lazily(self):
+        DDCache.clear_user_agents()
+        DeviceDetector(CHROME).parse()
+        result = DDCache['user_agents'][DeviceDetector(CHROME).ua_hash]
+        cached = DeviceDetector(CHROME).parse()
+
+        self.assertIs(ParsedResult.from_detector(cached), result)
+        with self.assertRaises(AttributeError):
+            DeviceDetector.os.__get__(cached)
+        self.assertEqual(cached.os.ua_data['name'], 'GNU/Linux')
+        self.assertIs(cached.os.ua_data, cached.all_details['os'])
+        with self.assertRaises(AttributeError):
+            cached.unknown_attribute
+
+    def test_list_client_hints(self):
+        ua = 'Mozilla/5.0 (Linux; Android 10; K) AppleWebKit/537.36 Chrome/120.0 Mobile Safari/537.36'
+        headers = {
+            'brands': [{'brand': 'Google Chrome', 'version': '120'}],
+            'formFactors': ['Mobile'],
+            'platform': 'Android',
+            'model': 'SM-A515F',
+        }
+        detector = DeviceDetector(ua, headers=headers).parse()
+        result = ParsedResult.from_detector(detector)
+        restored = ParsedResult.from_json(result.to_json())
+
+        self.assertEqual(restored, result)
+        self.assertEqual(restored.headers, result.headers)
+        self.assertEqual(dict(restored.headers)['brands'], headers['brands'])
+        self.assertEqual(restored.device_model(), detector.device_model())
+
+    def test_immutable(self):
+        result = parse_result(BOT)
+        with self.assertRaises(AttributeError):
+            result.os = ('Linux', '')
+        self.assertEqual(pickle.loads(pickle.dumps(result)), result)
+        self.assertEqual(result.all_details['bot']['name'], 'Googlebot')
+
+
+__all__ = [
+    'TestParsedResult',
+]
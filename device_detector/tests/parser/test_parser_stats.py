@@ -0,0 +1,80 @@
+import threading
+from unittest import TestCase
+
+from ...parser import OS, Bot, Device, parser_stats, reset_parser_stats
+from ...settings import DDCache
+
+
+class CombinedOS(OS):
+    COMBINED_REGEXES = True
+
+
+class TestParserStats(TestCase):
+
+    def setUp(self):
+        reset_parser_stats()
+
+    def tearDown(self):
+        reset_parser_stats()
+
+    def test_bot_counters(self):
+        Bot('Googlebot/2.1 (+http://www.google.com/bot.html)', None).parse()
+        Bot('Mozilla/5.0 (Windows NT 10.0; Win64; x64) Gecko/20100101 Firefox/120.0', None).parse()
+
+        stats = parser_stats()['Bot']
+        self.assertEqual(stats['parses'], 2)
+        self.assertEqual(stats['ac_checks'], 2)
+        self.assertEqual(stats['ac_hits'], 1)
+        self.assertEqual(stats['ac_false_positives'], 0)
+        self.assertGreater(stats['regexes'], 0)
+        self.assertGreater(stats['seconds'], 0)
+
+    def test_false_positive(self):
+        # "bot" is a Bot word, but no Bot rule matches
+        Bot('Mozilla/5.0 (Linux; Android 11; Robotron X1) Chrome/90.0', None).parse()
+
+        stats = parser_stats()['Bot']
+        self.assertEqual(stats['ac_hits'], 1)
+        self.assertEqual(stats['ac_false_positives'], 1)
+
+    def test_combined_regexes(self):
+        ua = 'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:74.0) Gecko/20100101 Firefox/74.0'
+        CombinedOS(ua, None).parse()
+        self.assertGreater(parser_stats()['CombinedOS']['regexes'], 0)
+
+    def test_model_regexes(self):
+        ua = 'Mozilla/5.0 (Linux; Android 11; SM-A515F) AppleWebKit/537.36 Chrome/90.0 Mobile'
+        device = Device(ua, None)
+        device._parse()
+        rule_regexes = device.regexes_checked
+        device.set_details()
+        self.assertEqual(device.ua_data['model'], 'Galaxy A51')
+        self.assertGreater(device.regexes_checked, rule_regexes)
+
+    def test_threads(self):
+        def parse():
+            for _ in range(50):
+                Bot('Googlebot/2.1 (+http://www.google.com/bot.html)', None).parse()
+
+        threads = [threading.Thread(target=parse) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(parser_stats()['Bot']['parses'], 400)
+
+        # The counters of the finished threads are folded together
+        Bot('Googlebot/2.1 (+http://www.google.com/bot.html)', None).parse()
+        self.assertEqual(len(DDCache['parser_stats']), 2)
+        self.assertEqual(parser_stats()['Bot']['parses'], 401)
+
+    def test_reset(self):
+        Bot('Googlebot/2.1 (+http://www.google.com/bot.html)', None).parse()
+        self.assertIn('Bot', parser_stats())
+        reset_parser_stats()
+        self.assertEqual(parser_stats(), {})
+
+
+__all__ = [
+    'TestParserStats',
+]
@@ -0,0 +1,66 @@
+import re
+from unittest import TestCase, skipIf
+
+import regex
+
+from ...lazy_regex import RegexLazyIgnore
+from ...parser.parser import perform_substitutions
+from ...regex_backends import (
+    compile_pattern,
+    re2,
+    regex_backend,
+    regex_backend_stats,
+    reset_regex_backend_stats,
+    set_regex_backend,
+)
+
+
+class TestRegexBackends(TestCase):
+
+    def setUp(self):
+        reset_regex_backend_stats()
+
+    def tearDown(self):
+        set_regex_backend('regex')
+
+    def test_default_backend(self):
+        self.assertEqual(regex_backend(), 'regex')
+        self.assertIsInstance(compile_pattern(r'Chrome/(\d+)'), regex.Pattern)
+        self.assertEqual(regex_backend_stats(), {'regex': 1})
+
+    def test_re_backend(self):
+        set_regex_backend('re')
+        self.assertIsInstance(compile_pattern(r'Chrome/(\d+)', regex.IGNORECASE), re.Pattern)
+        for pattern in (r'[[:alpha:]]+Phone', r'\p{L}+', r'(?<=a|bc)d'):
+            self.assertIsInstance(compile_pattern(pattern), regex.Pattern, msg=pattern)
+        self.assertEqual(regex_backend_stats(), {'re': 1, 'regex': 3})
+
+    @skipIf(re2 is None, 'google-re2 is not installed')
+    def test_re2_backend(self):
+        set_regex_backend('re2')
+        self.assertIsInstance(compile_pattern(r'Chrome/(\d+)', regex.IGNORECASE), re2._Regexp)
+        for pattern in (r'(?<=Android )\d', r'(\w)\1', r'Chrome(?!/)'):
+            self.assertIsInstance(compile_pattern(pattern), regex.Pattern, msg=pattern)
+        self.assertEqual(regex_backend_stats(), {'re2': 1, 'regex': 3})
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            set_regex_backend('pcre')
+        self.assertEqual(regex_backend(), 'regex')
+
+    def test_substitutions(self):
+        backends = ['regex', 're', 're2'] if re2 is not None else ['regex', 're']
+        for backend in backends:
+            set_regex_backend(backend)
+            model_regex = RegexLazyIgnore(r'(?:^|[^A-Z0-9_-])(?:SM-(A\d+)F)')
+            matched = model_regex.search('Mozilla/5.0 (Linux; Android 11; SM-A515F)')
+            self.assertEqual(
+                perform_substitutions(r'Galaxy \g<1>', matched, ' '),
+                'Galaxy A515',
+                msg=backend,
+            )
+
+
+__all__ = [
+    'TestRegexBackends',
+]
@@ -0,0 +1,179 @@
+import os
+import sqlite3
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from ..base import ANDROID, THREADS, ParserBaseTest, parse_result, run_threads
+from ...cache import UACache
+from ...device_detector import DeviceDetector
+from ...result import ParsedResult
+from ...settings import DDCache
+from ...sqlite_cache import SQLiteCache
+
+
+class TestSQLiteCache(ParserBaseTest):
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'user_agents.sqlite3')
+        self.result = parse_result(ANDROID)
+
+    def tearDown(self):
+        self.directory.cleanup()
+        super().tearDown()
+
+    def test_get_set(self):
+        cache = SQLiteCache(self.path)
+        self.assertIsNone(cache.get(self.result.ua_hash))
+        cache.set(self.result.ua_hash, self.result)
+        self.assertEqual(cache.get(self.result.ua_hash), self.result)
+        self.assertEqual(cache.connection().execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        cache.close()
+
+    def test_rules_version(self):
+        cache = SQLiteCache(self.path)
+        cache.set(self.result.ua_hash, self.result)
+        cache.close()
+
+        with patch('device_detector.sqlite_cache.rules_version', return_value='other'):
+            other_rules = SQLiteCache(self.path)
+        self.assertIsNone(other_rules.get(self.result.ua_hash))
+        # Workers of both rules versions share the database during a deploy
+        other_rules.set(self.result.ua_hash, self.result)
+        self.assertEqual(len(other_rules), 2)
+        self.assertEqual(cache.get(self.result.ua_hash), self.result)
+        other_rules.purge(other_versions=True)
+        self.assertEqual(len(other_rules), 1)
+        self.assertIsNone(cache.get(self.result.ua_hash))
+        cache.close()
+        other_rules.close()
+
+    def test_purge_other_versions(self):
+        """
+        Results of other rules versions are purged once older than the ttl.
+        """
+        cache = SQLiteCache(self.path, ttl=60)
+        with patch('device_detector.sqlite_cache.time', return_value=100.0):
+            cache.set(self.result.ua_hash, self.result)
+        with patch('device_detector.sqlite_cache.rules_version', return_value='other'):
+            other_rules = SQLiteCache(self.path, ttl=60)
+        with patch('device_detector.sqlite_cache.time', return_value=159.0):
+            other_rules.purge()
+            self.assertEqual(len(other_rules), 1)
+        with patch('device_detector.sqlite_cache.time', return_value=160.0):
+            other_rules.purge()
+            self.assertEqual(len(other_rules), 0)
+        cache.close()
+        other_rules.close()
+
+    def test_ttl(self):
+        cache = SQLiteCache(self.path, ttl=60)
+        with patch('device_detector.sqlite_cache.time', return_value=100.0):
+            cache.set(self.result.ua_hash, self.result)
+        with patch('device_detector.sqlite_cache.time', return_value=159.0):
+            self.assertIsNotNone(cache.get(self.result.ua_hash))
+        with patch('device_detector.sqlite_cache.time', return_value=160.0):
+            self.assertIsNone(cache.get(self.result.ua_hash))
+        cache.close()
+
+    def test_threads(self):
+        """
+        Each thread writes on its own connection, so no write is lost
+        when the transactions of the threads overlap.
+        """
+        cache = SQLiteCache(self.path)
+        connections = [None] * THREADS
+
+        def write(number: int) -> None:
+            connections[number] = cache.connection()
+            for key in range(300):
+                cache.set(f'{number}-{key}', self.result)
+
+        # Wait for the write lock rather than drop writes
+        with patch('device_detector.sqlite_cache.BUSY_TIMEOUT', 10):
+            self.assertEqual(run_threads(write), [])
+        self.assertEqual(len(set(map(id, connections))), THREADS)
+        self.assertEqual(len(cache), THREADS * 300)
+        self.assertEqual(cache.get('7-299'), self.result)
+        self.assertEqual(cache.writes, THREADS * 300)
+        cache.close()
+
+    def test_undecodable_result(self):
+        """
+        Results that can't be decoded are misses, the other results are served.
+        """
+        cache = SQLiteCache(self.path)
+        cache.set_many({'good': self.result, 'bad': self.result, 'worse': self.result})
+        connection = cache.connection()
+        connection.execute("UPDATE user_agents SET result = 'not json' WHERE ua_hash = 'bad'")
+        connection.execute("UPDATE user_agents SET result = '[1, 2]' WHERE ua_hash = 'worse'")
+        self.assertEqual(cache.get_many(['good', 'bad', 'worse']), {'good': self.result})
+        self.assertIsNone(cache.get('bad'))
+        cache.close()
+
+    def test_max_entries(self):
+        cache = SQLiteCache(self.path, max_entries=1)
+        with patch('device_detector.sqlite_cache.time', return_value=100.0):
+            cache.set('older', self.result)
+        cache.set('newer', self.result)
+        cache.purge()
+        self.assertEqual(cache.get_many(['older', 'newer']), {'newer': self.result})
+        cache.close()
+
+    def test_unserializable_result(self):
+        """
+        Results that can't be serialized are skipped, the other results are stored.
+        """
+        cache = SQLiteCache(self.path)
+        details = {'os': {'name': object()}}
+        unserializable = ParsedResult('unknown', 'bad', 0, details, (), ('', '', '', ''))
+        cache.set_many({'good': self.result, 'bad': unserializable})
+        self.assertEqual(cache.get_many(['good', 'bad']), {'good': self.result})
+        cache.set('bad', unserializable)
+        cache.close()
+
+    def test_shared_between_processes(self):
+        """
+        A user agent parsed by one process is served to the others.
+        """
+        first = UACache(shared=SQLiteCache(self.path))
+        second = UACache(shared=SQLiteCache(self.path))
+
+        first[self.result.ua_hash] = self.result
+        self.assertEqual(second.get(self.result.ua_hash), self.result)
+        self.assertEqual(second.shared_hits, 1)
+        # Now cached in process
+        self.assertIn(self.result.ua_hash, second)
+
+    def test_configure_user_agents(self):
+        default_cache = DDCache['user_agents']
+        try:
+            DDCache.clear_user_agents()
+            DDCache.configure_user_agents(shared=SQLiteCache(self.path))
+            DeviceDetector(ANDROID).parse()
+            DDCache.clear_user_agents()
+            cached = DeviceDetector(ANDROID).parse()
+            self.assertTrue(cached.parsed)
+            self.assertEqual(cached.device_model(), 'Galaxy A51')
+            self.assertEqual(DDCache['user_agents'].shared_hits, 1)
+        finally:
+            DDCache['user_agents'] = default_cache
+
+
+class TestSQLiteCacheErrors(TestCase):
+
+    def test_unusable_database(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = SQLiteCache(directory)
+            with self.assertRaises(sqlite3.Error):
+                cache.connection()
+            self.assertIsNone(cache.get('key'))
+            self.assertEqual(len(cache), 0)
+
+
+__all__ = [
+    'TestSQLiteCache',
+    'TestSQLiteCacheErrors',
+]
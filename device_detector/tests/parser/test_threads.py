@@ -0,0 +1,142 @@
+import random
+from unittest import TestCase
+from unittest.mock import patch
+
+from ..base import THREADS, ParserBaseTest, run_threads
+from ...cache import ShardedUACache, UACache
+from ...device_detector import DeviceDetector
+from ...result import ParsedResult
+from ...settings import DDCache
+from ...yaml_loader import RegexLoader
+
+OPERATIONS = 20_000
+KEYS = 1000
+
+
+class TestCacheThreads(TestCase):
+
+    def stress(self, cache: UACache | ShardedUACache) -> None:
+        gets = [0] * THREADS
+        wrong: list[tuple[str, object]] = []
+
+        def operate(number: int) -> None:
+            rng = random.Random(number)
+            for _ in range(OPERATIONS):
+                key = f'{rng.randrange(KEYS):x}'
+                operation = rng.random()
+                if operation < 0.6:
+                    gets[number] += 1
+                    if (value := cache.get(key)) is not None and value != f'value-{key}':
+                        wrong.append((key, value))
+                elif operation < 0.85:
+                    cache[key] = f'value-{key}'
+                elif operation < 0.95:
+                    cache.set_worthless(key, f'value-{key}')
+                elif operation < 0.99:
+                    cache.discard(key)
+                else:
+                    cache.get_many([f'{rng.randrange(KEYS):x}' for _ in range(10)])
+
+        self.assertEqual(run_threads(operate), [])
+        self.assertEqual(wrong, [])
+
+        stats = cache.stats()
+        gets_many = stats['hits'] + stats['misses'] - sum(gets)
+        self.assertEqual(gets_many % 10, 0)
+        shards = cache.shards if isinstance(cache, ShardedUACache) else (cache,)
+        for shard in shards:
+            self.assertLessEqual(len(shard.entries), shard.max_entries)
+            self.assertLessEqual(len(shard.worthless), shard.max_worthless)
+            self.assertEqual(set(shard.sizes), set(shard.entries))
+            self.assertEqual(set(shard.expires), set(shard.entries))
+            self.assertEqual(set(shard.worthless_expires), set(shard.worthless))
+            self.assertEqual(shard.total_bytes, sum(shard.sizes.values()))
+            self.assertLessEqual(shard.total_bytes, shard.max_bytes)
+
+    def test_uacache(self):
+        self.stress(UACache(max_entries=256, max_bytes=256 * 100, ttl=60, max_worthless=64))
+
+    def test_uacache_admission(self):
+        self.stress(UACache(max_entries=256, max_bytes=256 * 100, ttl=60, admission=True))
+
+    def test_sharded_uacache(self):
+        self.stress(ShardedUACache(
+            shards=4,
+            max_entries=256,
+            max_bytes=256 * 100,
+            ttl=60,
+            max_worthless=64,
+        ))
+
+    def test_sharded_limits(self):
+        cache = ShardedUACache(shards=4, max_entries=100, max_bytes=4000, max_worthless=10)
+        self.assertEqual([shard.max_entries for shard in cache.shards], [25] * 4)
+        self.assertEqual(cache.configuration()['max_bytes'], 4000)
+        for key in range(1000):
+            cache[str(key)] = key
+        self.assertLessEqual(len(cache), 100)
+        self.assertEqual(cache.stats()['entries'], len(cache))
+        self.assertEqual(len(cache.hottest(10)), 10)
+        with self.assertRaises(ValueError):
+            ShardedUACache(shards=8, max_entries=4)
+
+
+class TestParseThreads(ParserBaseTest):
+
+    fixture_files = [
+        'tests/fixtures/upstream/smartphone-1.yml',
+    ]
+
+    SECTIONS = ('regexes', 'corasick', 'candidates', 'combined', 'scanners', 'client_hint_models')
+
+    def setUp(self):
+        super().setUp()
+        self.loaded = {section: DDCache[section] for section in self.SECTIONS}
+        self.default_cache = DDCache['user_agents']
+
+    def tearDown(self):
+        DDCache.update(self.loaded)
+        DDCache['user_agents'] = self.default_cache
+        super().tearDown()
+
+    def test_parse(self):
+        user_agents = self.fixture_user_agents(200)
+        DDCache.clear_user_agents()
+        expected = {
+            ua: ParsedResult.from_detector(DeviceDetector(ua).parse()) for ua in user_agents
+        }
+
+        # Parse with empty rule caches, so that all threads race to load the rules
+        for section in self.SECTIONS:
+            DDCache[section] = {}
+        DDCache.configure_user_agents(max_entries=64, shards=4)
+
+        loads: dict[str, int] = {}
+        load_regex_list = RegexLoader.load_regex_list
+
+        def counted_load(parser: RegexLoader) -> list[dict]:
+            loads[parser.cache_name] = loads.get(parser.cache_name, 0) + 1
+            return load_regex_list(parser)
+
+        wrong = []
+
+        def parse(number: int) -> None:
+            rng = random.Random(number)
+            for ua in rng.sample(user_agents, len(user_agents)):
+                parsed = ParsedResult.from_detector(DeviceDetector(ua).parse())
+                if parsed != expected[ua]:
+                    wrong.append(ua)
+
+        with patch.object(RegexLoader, 'load_regex_list', counted_load):
+            self.assertEqual(run_threads(parse, threads=4), [])
+
+        self.assertEqual(wrong, [])
+        # The rules of each parser are loaded once, by one of the threads
+        self.assertTrue(loads)
+        self.assertEqual(set(loads.values()), {1})
+
+
+__all__ = [
+    'TestCacheThreads',
+    'TestParseThreads',
+]
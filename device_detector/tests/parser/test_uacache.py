@@ -0,0 +1,132 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from ..base import CHROME, UUID
+from ...cache import CacheBackend, UACache
+from ...device_detector import DeviceDetector
+from ...settings import DDCache
+
+
+class TestUACache(TestCase):
+
+    def test_least_recently_used(self):
+        cache = UACache(max_entries=2)
+        cache['a'] = 1
+        cache['b'] = 2
+        self.assertEqual(cache.get('a'), 1)
+        cache['c'] = 3
+        self.assertEqual(list(cache), ['a', 'c'])
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(
+            cache.stats(),
+            {
+                'entries': 2,
+                'worthless': 0,
+                'bytes': 0,
+                'hits': 1,
+                'misses': 1,
+                'evictions': 1,
+                'rejections': 0,
+                'shared_hits': 0,
+            },
+        )
+
+    def test_max_bytes(self):
+        cache = UACache(max_entries=10, max_bytes=10, sizeof=len)
+        cache['a'] = 'abcd'
+        cache['b'] = 'efgh'
+        cache['a'] = 'ijklmn'
+        self.assertEqual(list(cache), ['b', 'a'])
+        self.assertEqual(cache.total_bytes, 10)
+        cache['c'] = 'op'
+        self.assertEqual(list(cache), ['a', 'c'])
+        cache['d'] = 'too long to cache'
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.total_bytes, 0)
+
+    def test_ttl(self):
+        cache = UACache(ttl=60)
+        with patch('device_detector.cache.monotonic', return_value=100.0):
+            cache['a'] = 1
+            cache['b'] = 2
+        with patch('device_detector.cache.monotonic', return_value=159.0):
+            self.assertEqual(cache['a'], 1)
+        with patch('device_detector.cache.monotonic', return_value=160.0):
+            with self.assertRaises(KeyError):
+                cache['a']
+            cache.purge_expired()
+        self.assertEqual(len(cache), 0)
+
+    def test_worthless(self):
+        cache = UACache(max_entries=2, max_worthless=1)
+        cache['a'] = 1
+        cache.set_worthless('x', 2)
+        cache.set_worthless('y', 3)
+        self.assertEqual(cache.get('y'), 3)
+        self.assertIsNone(cache.get('x'))
+        self.assertEqual(list(cache), ['a'])
+
+    def test_worthless_ttl(self):
+        cache = UACache(ttl=60)
+        with patch('device_detector.cache.monotonic', return_value=100.0):
+            cache.set_worthless('x', 1)
+            cache.set_worthless('y', 2)
+        with patch('device_detector.cache.monotonic', return_value=159.0):
+            self.assertEqual(cache.get('x'), 1)
+        with patch('device_detector.cache.monotonic', return_value=160.0):
+            self.assertIsNone(cache.get('x'))
+            self.assertEqual(cache.worthless_entries(), [])
+        self.assertEqual(cache.worthless_expires, {})
+
+    def test_worthless_user_agent(self):
+        DDCache.clear_user_agents()
+        DeviceDetector(UUID).parse()
+        self.assertEqual(DDCache['user_agents'].stats()['worthless'], 1)
+        cached = DeviceDetector(UUID).parse()
+        self.assertTrue(cached.is_worthless())
+
+    def test_cache_backend(self):
+        with self.assertRaises(TypeError):
+            CacheBackend()
+
+        class DictCache(CacheBackend):
+            def __init__(self):
+                self.values = {}
+
+            def get_many(self, keys):
+                return {key: self.values[key] for key in keys if key in self.values}
+
+            def set_many(self, items):
+                self.values.update(items)
+
+            def clear(self):
+                self.values.clear()
+
+        cache = DictCache()
+        cache.set('a', 1)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+
+    def test_invalid_limits(self):
+        for limits in ({'max_entries': 0}, {'max_bytes': 0}, {'ttl': -1}, {'max_worthless': -1}):
+            with self.assertRaises(ValueError, msg=limits):
+                UACache(**limits)
+
+    def test_configure_user_agents(self):
+        default_cache = DDCache['user_agents']
+        try:
+            DDCache.clear_user_agents()
+            detector = DeviceDetector(CHROME).parse()
+
+            cache = DDCache.configure_user_agents(max_entries=5, max_bytes=1_000_000, ttl=60)
+            self.assertIs(DDCache['user_agents'], cache)
+            self.assertEqual(DeviceDetector(CHROME).parse().pretty_print(), detector.pretty_print())
+            self.assertGreater(cache.total_bytes, 0)
+            self.assertEqual(cache.hits, 1)
+        finally:
+            DDCache['user_agents'] = default_cache
+
+
+__all__ = [
+    'TestUACache',
+]
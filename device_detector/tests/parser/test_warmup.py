@@ -0,0 +1,109 @@
+import os
+import tempfile
+from unittest.mock import patch
+
+from ..base import ANDROID, BOT, ParserBaseTest
+from ...device_detector import DeviceDetector
+from ...parser import Bot, Camera, OSFragment, VendorFragment
+from ...settings import DDCache
+from ...warmup import (
+    dump_user_agents,
+    load_user_agents,
+    preload,
+    preparse_user_agents,
+    read_frequency_list,
+)
+
+
+class TestPreload(ParserBaseTest):
+
+    def test_preload(self):
+        compiled = preload(parsers=(Bot, Camera), freeze_gc=False)
+        self.assertGreater(compiled, 0)
+
+        for Parser in (Bot, Camera):
+            self.assertIn(Parser.__name__, DDCache['regexes'])
+            self.assertIn(Parser.__name__, DDCache['corasick'])
+            for rule in DDCache['regexes'][Parser.__name__]:
+                self.assertIsNotNone(rule['regex']._compiled)
+
+        self.assertTrue(DDCache['app_details'])
+        self.assertTrue(DDCache['normalize_regexes'])
+
+    def test_preload_fragment_parsers(self):
+        preload(parsers=(OSFragment, VendorFragment), compile_regexes=False, freeze_gc=False)
+
+        ua = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; Trident/7.0; MDDRJS; rv:11.0) like Gecko'
+        vendor_fragment = VendorFragment(ua, None)
+        brands = [rule['brand'] for rule in vendor_fragment.candidate_regexes()]
+        self.assertEqual(brands, ['Dell'])
+        self.assertEqual(vendor_fragment.parse().ua_data['brand'], 'Dell')
+
+
+class TestSnapshot(ParserBaseTest):
+
+    user_agents = (
+        ANDROID,
+        'Mozilla/5.0 (iPhone; CPU iPhone OS 16_5 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.5 Mobile/15E148 Safari/604.1',
+        BOT,
+    )
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'user_agents.jsonl')
+        self.default_cache = DDCache['user_agents']
+        DDCache.clear_user_agents()
+
+    def tearDown(self):
+        DDCache['user_agents'] = self.default_cache
+        self.directory.cleanup()
+        super().tearDown()
+
+    def test_dump_and_load(self):
+        for ua in self.user_agents:
+            DeviceDetector(ua).parse()
+        # The first user agent is now the most recently used
+        DeviceDetector(self.user_agents[0])
+        expected = dict(DDCache['user_agents'].hottest())
+
+        self.assertEqual(dump_user_agents(self.path, max_entries=2), 2)
+        DDCache.clear_user_agents()
+        self.assertEqual(load_user_agents(self.path), 2)
+
+        cache = DDCache['user_agents']
+        self.assertEqual([key for key, _ in cache.hottest()], list(expected)[:2])
+        for key, result in cache.hottest():
+            self.assertEqual(result, expected[key])
+        self.assertTrue(DeviceDetector(self.user_agents[0]).parsed)
+
+    def test_other_rules_version(self):
+        DeviceDetector(self.user_agents[0]).parse()
+        with patch('device_detector.warmup.rules_version', return_value='other'):
+            dump_user_agents(self.path)
+        DDCache.clear_user_agents()
+
+        self.assertEqual(load_user_agents(self.path), 0)
+        self.assertEqual(len(DDCache['user_agents']), 0)
+        self.assertEqual(load_user_agents(os.path.join(self.directory.name, 'missing')), 0)
+
+    def test_preparse_frequency_list(self):
+        with open(self.path, 'w', encoding='utf-8') as ff:
+            ff.write(f'      2 {self.user_agents[1]}\n')
+            ff.write(f'     10 {self.user_agents[0]}\n')
+            ff.write(f'{self.user_agents[2]}\n')
+            ff.write('\n')
+        user_agents = read_frequency_list(self.path)
+        self.assertEqual(user_agents, list(self.user_agents))
+
+        DDCache.configure_user_agents(max_entries=2)
+        self.assertEqual(preparse_user_agents(user_agents), 2)
+        self.assertTrue(DeviceDetector(self.user_agents[0]).parsed)
+        self.assertTrue(DeviceDetector(self.user_agents[1]).parsed)
+        self.assertNotIn(DeviceDetector(self.user_agents[2]).ua_hash, DDCache['user_agents'])
+
+
+__all__ = [
+    'TestPreload',
+    'TestSnapshot',
+]
@@ -4,6 +4,7 @@ from string import punctuation
 from urllib.parse import unquote
 from .enums import AppType
 from .lazy_regex import RegexLazy, RegexLazyIgnore
+from .settings import CLIENT_HINT_HEADERS
 
 PUNC_SPACE = f'{punctuation} '
 trans_tbl = str.maketrans(dict.fromkeys(PUNC_SPACE, ''))
@@ -106,15 +107,20 @@ def ua_hash(user_agent: str, headers: dict | None = None) -> str:
     """
     Return short hash of User Agent string for
     memory-efficient cache key.
+
+    Only the client hint headers are part of the key, under the same
+    name for each of their spellings, so that other request headers,
+    such as cookies and request IDs, don't make every key unique.
+    The hints are sorted by name, so that the order of the headers
+    doesn't change the key either.
     """
-    if headers:
-        try:
-            cache_key = f'{user_agent}{"-".join(sorted(headers.values()))}'
-        except TypeError:
-            cache_key = f'{user_agent}{headers}'
-    else:
-        cache_key = user_agent
+    hints = []
+    for key, value in (headers or {}).items():
+        if name := CLIENT_HINT_HEADERS.get(key.lower().replace('_', '-')):
+            hints.append(f'{name}:{value}')
+    hints.sort()
 
+    cache_key = '\n'.join((user_agent, *hints)) if hints else user_agent
     return blake2s(cache_key.encode('utf-8')).hexdigest()
 
 
@@ -202,6 +208,16 @@ def clean_ua(user_agent: str, user_agent_lower: str) -> str:
     return ua
 
 
+def canonical_ua(user_agent: str) -> str:
+    """
+    Lowercase User Agent string, as cleaned for parsing, so that
+    variants differing only in the noise removed by clean_ua,
+    such as numeric suffixes, percent-encoding and null prefixes,
+    share their cache key.
+    """
+    return clean_ua(user_agent, user_agent.lower()).lower()
+
+
 def mostly_repeating_characters(user_agent: str) -> bool:
     """
     User Agent string is mostly repeating characters
@@ -482,6 +498,7 @@ __all__ = (
     'long_ua_no_punctuation',
     'only_numerals_and_punctuation',
     'mostly_numerals',
+    'canonical_ua',
     'clean_ua',
     'mostly_repeating_characters',
     'random_alphanumeric_string',
@@ -0,0 +1,249 @@
+"""
+Warm up all caches before forking worker processes.
+
+Every process lazily loads the rule fixtures, compiles regexes and builds
+the AhoCorasick automatons on first use. Pre-fork servers (gunicorn, uwsgi)
+can call preload() in the master process, so that workers inherit the
+loaded rules instead of each building their own copy.
+
+The user agent cache starts empty too. dump_user_agents() writes its hottest
+entries to a snapshot file, such as on shutdown, and load_user_agents()
+restores them on startup, as long as the rules haven't changed. Without a
+snapshot, preparse_user_agents() fills the cache from a list of user agents,
+such as the most frequent user agents in the logs.
+"""
+
+import gc
+import json
+import os
+import re
+import sys
+import tempfile
+from collections.abc import Iterable
+from itertools import islice
+
+from .bundle import rules_version
+from .device_detector import DeviceDetector
+from .lazy_regex import RegexLazy
+from .literals import ModelList
+from .parser import OS, Bot, Device, OSFragment, VendorFragment
+from .parser.client.browser import Engine
+from .result import ParsedResult
+from .settings import DDCache
+from .yaml_loader import RegexLoader, app_pretty_names_types_data, normalized_regex_list
+
+PRELOAD_PARSERS: tuple[type[RegexLoader], ...] = (
+    *DeviceDetector.CLIENT_PARSERS,
+    *DeviceDetector.DEVICE_PARSERS,
+    Bot,
+    OS,
+    Engine,
+    VendorFragment,
+    OSFragment,
+)
+
+# Increment when the layout of user agent snapshots changes
+SNAPSHOT_FORMAT = 3
+# Line of a frequency list, as written by `sort | uniq -c`
+FREQUENCY_LINE = re.compile(r'^\s*(\d+) (.+)$')
+
+
+def rule_regexes(rule: dict) -> Iterable[RegexLazy]:
+    """
+    All regexes of a single rule entry loaded from a fixture file.
+    """
+    if 'regex' in rule:
+        yield rule['regex']
+    yield from rule.get('regexes', [])
+    for key in ('models', 'versions'):
+        for entry in rule.get(key, []):
+            yield entry['regex']
+
+
+def module_regexes() -> Iterable[RegexLazy]:
+    """
+    Module-level regex constants of all loaded device_detector modules.
+    """
+    for name, module in list(sys.modules.items()):
+        if not name.startswith('device_detector'):
+            continue
+        for value in list(vars(module).values()):
+            if isinstance(value, RegexLazy):
+                yield value
+            elif isinstance(value, (list, tuple)):
+                yield from (v for v in value if isinstance(v, RegexLazy))
+
+
+def preload(
+    parsers: Iterable[type[RegexLoader]] = PRELOAD_PARSERS,
+    compile_regexes: bool = True,
+    freeze_gc: bool = True,
+) -> int:
+    """
+    Load the regexes, AhoCorasick patterns, candidate indexes, app
+    details and normalization regexes of all parsers into DDCache,
+    the client hint model index of the Device parser and the model
+    indexes of all brands, and build the shared scanner of all
+    DeviceDetector parsers.
+
+    Args:
+        parsers: Parser classes to load rules for
+        compile_regexes: Compile all lazy regexes, rather than on first use
+        freeze_gc: Move all objects to the permanent GC generation, so that
+            garbage collection in forked workers doesn't touch (and so copy)
+            the memory pages holding the rules.
+
+    Returns the number of regexes that were compiled.
+    """
+    app_pretty_names_types_data()
+    regexes: list[RegexLazy] = []
+
+    for normalize_regex in normalized_regex_list(DeviceDetector.fixture_files):
+        regexes.append(normalize_regex['regex'])
+
+    for Parser in parsers:
+        parser = Parser('', None)  # type: ignore[call-arg]
+        parser.load_ahocorasick_patterns()
+        parser.load_candidate_index()
+        if isinstance(parser, Device):
+            parser.load_client_hint_model_index()
+        for rule in parser.regex_list:
+            regexes.extend(rule_regexes(rule))
+            if isinstance(models := rule.get('models'), ModelList):
+                models.load_index()
+
+    DeviceDetector.parser_scanner()
+
+    compiled = 0
+    if compile_regexes:
+        regexes.extend(module_regexes())
+        for regex in regexes:
+            if regex.compiled is not None:
+                compiled += 1
+
+    if freeze_gc:
+        gc.collect()
+        gc.freeze()
+
+    return compiled
+
+
+def dump_user_agents(path: str, max_entries: int | None = None) -> int:
+    """
+    Write the hottest entries of the user agent cache to a snapshot file,
+    stamped with the rules version.
+
+    Args:
+        path: Path of the snapshot file, replaced if it exists
+        max_entries: Maximum number of entries to write, or None for all
+
+    Returns the number of user agents written.
+    """
+    results = [
+        result
+        for _, result in DDCache['user_agents'].hottest(max_entries)
+        if isinstance(result, ParsedResult)
+    ]
+    header = {'format': SNAPSHOT_FORMAT, 'version': rules_version(), 'entries': len(results)}
+
+    # Write to a temporary file first, so that processes
+    # starting up never read a partially written snapshot.
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as sf:
+            sf.write(f'{json.dumps(header)}\n')
+            for result in results:
+                sf.write(f'{result.to_json()}\n')
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    return len(results)
+
+
+def load_user_agents(path: str) -> int:
+    """
+    Restore the entries of a snapshot written by dump_user_agents into the
+    user agent cache, as far as they fit.
+
+    Snapshots of other rules versions are ignored, as their results may
+    differ from parsing with the installed rules, as are unreadable files.
+
+    Returns the number of user agents loaded.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as sf:
+            header = json.loads(sf.readline())
+            if not isinstance(header, dict) or header.get('format') != SNAPSHOT_FORMAT:
+                return 0
+            if header.get('version') != rules_version():
+                return 0
+            results = [ParsedResult.from_json(line) for line in sf]
+    except (OSError, ValueError, TypeError):
+        return 0
+
+    cache = DDCache['user_agents']
+    results = results[: cache.max_entries]
+    # Store the hottest entries last, as the most recently used
+    for result in reversed(results):
+        cache.store(result.ua_hash, result)
+
+    return len(results)
+
+
+def read_frequency_list(path: str) -> list[str]:
+    """
+    User agents of a frequency list, most frequent first.
+
+    Each line holds a count and a user agent, as written by
+    `sort | uniq -c`. Lines without a count are counted once.
+    """
+    counts: dict[str, int] = {}
+    with open(path, 'r', encoding='utf-8', errors='replace') as ff:
+        for line in ff:
+            if not (line := line.rstrip('\r\n')):
+                continue
+            if match := FREQUENCY_LINE.match(line):
+                count, user_agent = int(match.group(1)), match.group(2)
+            else:
+                count, user_agent = 1, line
+            counts[user_agent] = counts.get(user_agent, 0) + count
+
+    return sorted(counts, key=counts.__getitem__, reverse=True)
+
+
+def preparse_user_agents(user_agents: Iterable[str], max_entries: int | None = None) -> int:
+    """
+    Parse the user agents into the user agent cache, such as the
+    most frequent user agents of the logs, most frequent first.
+
+    Args:
+        user_agents: User agents to parse, most frequent first
+        max_entries: Maximum number of user agents to parse,
+            or None for as many as the cache holds
+
+    Returns the number of user agents parsed.
+    """
+    if max_entries is None:
+        max_entries = DDCache['user_agents'].max_entries
+
+    # Parse the most frequent user agents last, as the most recently used
+    user_agents = list(islice(user_agents, max_entries))
+    for user_agent in reversed(user_agents):
+        DeviceDetector(user_agent).parse()
+
+    return len(user_agents)
+
+
+__all__ = (
+    'PRELOAD_PARSERS',
+    'SNAPSHOT_FORMAT',
+    'dump_user_agents',
+    'load_user_agents',
+    'preload',
+    'preparse_user_agents',
+    'read_frequency_list',
+)
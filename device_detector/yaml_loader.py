@@ -15,7 +15,10 @@ except ImportError:
     from yaml import SafeLoader  # type: ignore[assignment]
 
 import device_detector
+from .bundle import bundled_fixture
+from .combined import CombinedRegexList
 from .lazy_regex import RegexLazyIgnore
+from .literals import LiteralIndex, ModelList
 from .settings import BOUNDED_REGEX, DDCache, ROOT
 from .enums import AppType
 
@@ -35,8 +38,13 @@ class RegexLoader:
     @staticmethod
     def load_from_yaml(yfile: str) -> dict | list:
         """
-        Load yaml from regexes directory, or extract from the egg
+        Load yaml from regexes directory, or extract from the egg.
+
+        Use the precompiled rule bundle instead, if one has been built.
         """
+        if (bundled := bundled_fixture(yfile)) is not None:
+            return bundled
+
         yml_file_path = f'{ROOT}/{yfile}'
         if Path(yml_file_path).exists():
             with open(yml_file_path, 'r', encoding="utf-8") as yf:
@@ -67,9 +75,12 @@ class RegexLoader:
 
     @property
     def regex_list(self) -> list[dict]:
-        if (regexes := DDCache['regexes'].get(self.cache_name)) is not None:
-            return regexes
+        return DDCache.load('regexes', self.cache_name, self.load_regex_list)
 
+    def load_regex_list(self) -> list[dict]:
+        """
+        Load the rules of all fixture files, with their regexes wrapped as lazy regexes.
+        """
         all_regexes = []
         for fixture in self.fixture_files:
             regexes = self.yaml_to_list(f'regexes/{fixture}')
@@ -77,26 +88,32 @@ class RegexLoader:
             for regex in regexes:
                 if 'regex' in regex:
                     regex['regex'] = RegexLazyIgnore(BOUNDED_REGEX.format(regex['regex']))
-                for model in regex.get('models', []):
-                    model['regex'] = RegexLazyIgnore(BOUNDED_REGEX.format(model['regex']))
+                if 'models' in regex:
+                    for model in regex['models']:
+                        model['regex'] = RegexLazyIgnore(BOUNDED_REGEX.format(model['regex']))
+                    regex['models'] = ModelList(regex['models'])
                 for version in regex.get('versions', []):
                     version['regex'] = RegexLazyIgnore(BOUNDED_REGEX.format(version['regex']))
 
             all_regexes.extend(regexes)
 
-        DDCache['regexes'][self.cache_name] = all_regexes
-
         return all_regexes
 
     def load_ahocorasick_patterns(self) -> ahocorasick_rs.AhoCorasick | None:
         """
         Load AhoCorasick words from file, or expand from regexes.
         """
-        try:
-            return DDCache['corasick'][self.cache_name]
-        except KeyError:
-            pass
 
+        def build() -> ahocorasick_rs.AhoCorasick | None:
+            all_corasick_words = self.load_ahocorasick_words()
+            return ahocorasick_rs.AhoCorasick(all_corasick_words) if all_corasick_words else None
+
+        return DDCache.load('corasick', self.cache_name, build)
+
+    def load_ahocorasick_words(self) -> set[str]:
+        """
+        Load AhoCorasick words of all fixture files, and the manually defined words.
+        """
         all_corasick_words: set[str] = set()
         for fixture in self.fixture_files:
             ac_fixture = f'regexes/ahocorasick/{fixture}'
@@ -106,10 +123,34 @@ class RegexLoader:
             if words := set(self.load_from_yaml(ac_fixture)):
                 all_corasick_words.update(words)
 
-        ac = ahocorasick_rs.AhoCorasick(all_corasick_words) if all_corasick_words else None
-        DDCache['corasick'][self.cache_name] = ac
+        return all_corasick_words
+
+    def load_candidate_index(self) -> LiteralIndex:
+        """
+        Index the regex_list rules by the literals that any match of
+        the rule regex must contain, so that only the rules that can
+        possibly match a user agent need to be checked.
+
+        Rules with a list of regexes are indexed by the literals of all
+        their regexes, as any of them may match.
+        """
+
+        def build() -> LiteralIndex:
+            return LiteralIndex([
+                rule['regex'].pattern
+                if 'regex' in rule
+                else '|'.join(f'(?:{regex.pattern})' for regex in rule['regexes'])
+                for rule in self.regex_list
+            ])
 
-        return ac
+        return DDCache.load('candidates', self.cache_name, build)
+
+    def load_combined_regexes(self) -> CombinedRegexList:
+        """
+        Join the regex_list rules into a few large alternations, so that
+        the first matching rule can be found with fewer regex searches.
+        """
+        return DDCache.load('combined', self.cache_name, lambda: CombinedRegexList(self.regex_list))
 
     def load_manually_defined_words(self):
         """
@@ -144,6 +185,16 @@ def app_pretty_names_types_data() -> dict[str, AppNameType]:
     if appdetails := DDCache.get(cache_key, {}):
         return appdetails
 
+    with DDCache.lock(cache_key):
+        if appdetails := DDCache.get(cache_key, {}):
+            return appdetails
+        return load_app_details()
+
+
+def load_app_details() -> dict[str, AppNameType]:
+    """
+    Load App Details data of all fixtures into DDCache.
+    """
     regex_loader = RegexLoader()
     all_app_details = {}
     for fixture, dtype in (
@@ -195,7 +246,7 @@ def app_pretty_names_types_data() -> dict[str, AppNameType]:
                 'type': dtype,
             }
 
-    DDCache[cache_key] = generalized_details
+    DDCache['app_details'] = generalized_details
 
     return generalized_details
 
@@ -205,13 +256,19 @@ def normalized_regex_list(fixture_files: list[str]) -> list:
     if regexes := DDCache.get(cache_key, []):
         return regexes
 
-    regex_loader = RegexLoader()
-    for fixture in fixture_files:
-        regexes.extend(regex_loader.yaml_to_list(f'regexes/{fixture}'))
+    with DDCache.lock(cache_key):
+        if regexes := DDCache.get(cache_key, []):
+            return regexes
+
+        # Build a new list, as other threads return the cached list once it isn't empty
+        regexes = []
+        regex_loader = RegexLoader()
+        for fixture in fixture_files:
+            regexes.extend(regex_loader.yaml_to_list(f'regexes/{fixture}'))
 
-    for regex in regexes:
-        regex['regex'] = RegexLazyIgnore(regex['regex'])
+        for regex in regexes:
+            regex['regex'] = RegexLazyIgnore(regex['regex'])
 
-    DDCache[cache_key] = regexes
+        DDCache[cache_key] = regexes
 
     return regexes
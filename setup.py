@@ -36,7 +36,7 @@ setup(
     url='https://github.com/thinkwelltwd/device_detector',
     include_package_data=True,
     package_data={
-        '': ['*.yml'],
+        '': ['*.yml', '*.bundle'],
     },
     install_requires=[
         'ahocorasick-rs',
@@ -45,6 +45,9 @@ setup(
         'backports.strenum; python_version <= "3.10"',
         'typing_extensions; python_version <= "3.10"',
     ],
+    extras_require={
+        're2': ['google-re2'],
+    },
     classifiers=[
         'Environment :: Web Environment',
         'Intended Audience :: Developers',